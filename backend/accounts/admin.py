@@ -3,7 +3,7 @@ Django admin configuration for accounts app
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import RevokedToken, User
 
 
 @admin.register(User)
@@ -31,3 +31,13 @@ class UserAdmin(BaseUserAdmin):
     )
     
     readonly_fields = ['date_joined', 'last_login']
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    """
+    Admin interface for revoked refresh tokens
+    """
+    list_display = ['jti', 'user', 'expires_at', 'revoked_at']
+    search_fields = ['jti', 'user__email']
+    readonly_fields = ['jti', 'user', 'expires_at', 'revoked_at']
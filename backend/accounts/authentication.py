@@ -0,0 +1,151 @@
+"""
+Authentication classes for the API
+"""
+import time
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ClaimsUser(TokenUser):
+    """
+    Lightweight request user built from ProfileRefreshToken claims.
+    Offers the role checks and profile ids the read-only views need,
+    without a database row behind it.
+    """
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+    
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+    
+    @cached_property
+    def student_profile_id(self):
+        """Student PK from the token, looked up if the profile was created after login"""
+        student_id = self.token.get('student_id')
+        if student_id is None and self.is_student():
+            from students.models import Student
+            student_id = Student.objects.filter(user_id=self.id).values_list('id', flat=True).first()
+        return student_id
+    
+    @cached_property
+    def teacher_profile_id(self):
+        """Teacher PK from the token, looked up if the profile was created after login"""
+        teacher_id = self.token.get('teacher_id')
+        if teacher_id is None and self.is_teacher():
+            from teachers.models import Teacher
+            teacher_id = Teacher.objects.filter(user_id=self.id).values_list('id', flat=True).first()
+        return teacher_id
+    
+    def is_admin(self):
+        """Check if user is an admin"""
+        return self.role == 'ADMIN'
+    
+    def is_teacher(self):
+        """Check if user is a teacher"""
+        return self.role == 'TEACHER'
+    
+    def is_student(self):
+        """Check if user is a student"""
+        return self.role == 'STUDENT'
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the user lookup where it is safe to.
+    Safe-method requests to views with allow_claims_user = True get a
+    ClaimsUser built from the token; everything else (writes, views that
+    need the real User, tokens issued before role claims existed) loads
+    the user as JWTAuthentication does.
+    
+    Claims are trusted for settings.JWT_CLAIMS_MAX_AGE seconds after they
+    were read from the user (at login or the last refresh), by default the
+    access-token lifetime. Changing a user's role or active flag, deleting
+    the user or removing their profile marks claims issued before then as
+    stale (UserCache.invalidate_claims), and those requests load the user.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        
+        validated_token = self.get_validated_token(raw_token)
+        
+        if self.can_use_claims(request, validated_token):
+            user = ClaimsUser(validated_token)
+            if not user.is_active:
+                raise AuthenticationFailed('User is inactive', code='user_inactive')
+            return user, validated_token
+        
+        return self.get_user(validated_token), validated_token
+    
+    def can_use_claims(self, request, validated_token):
+        """Check if this request can be served from token claims alone"""
+        view = getattr(request, 'parser_context', {}).get('view')
+        claims_iat = validated_token.get('claims_iat')
+        if not (
+            request.method in SAFE_METHODS and
+            getattr(view, 'allow_claims_user', False) and
+            'role' in validated_token and
+            claims_iat is not None and
+            time.time() - claims_iat <= settings.JWT_CLAIMS_MAX_AGE
+        ):
+            return False
+        
+        from .user_cache import user_cache
+        invalidated_at = user_cache.claims_invalidated_at(validated_token.get(api_settings.USER_ID_CLAIM))
+        # claims_iat is whole seconds, so a token from the same second as the change is distrusted
+        return invalidated_at is None or claims_iat > invalidated_at
+    
+    def get_user(self, validated_token):
+        """
+        Load the user as JWTAuthentication does, with both profile ids
+        selected in the same query
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        
+        try:
+            user = self.user_model.objects.with_profile_ids().get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+class CachedJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    ClaimsJWTAuthentication that keeps recently loaded users in
+    accounts.user_cache, so requests needing the real User skip the
+    per-request SELECT. Entries are dropped whenever the user is saved
+    or deleted (see accounts.signals).
+    """
+    def get_user(self, validated_token):
+        from .user_cache import user_cache
+        
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        elif not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
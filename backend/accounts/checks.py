@@ -0,0 +1,60 @@
+"""
+Deployment checks for the caches that must be shared between workers
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+
+def is_process_local(alias):
+    """Check if a Django cache alias keeps its entries inside one process"""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@register(Tags.security, deploy=True)
+def check_claims_invalidation_cache(app_configs, **kwargs):
+    from .user_cache import user_cache
+    
+    alias = user_cache.config['CACHE_ALIAS']
+    if settings.JWT_CLAIMS_MAX_AGE > 0 and is_process_local(alias):
+        return [Warning(
+            f"CACHES['{alias}'] is process-local, so a role change or deactivation "
+            f"only stops token claims from being trusted on the worker that made it; "
+            f"other workers trust them for up to JWT_CLAIMS_MAX_AGE ({settings.JWT_CLAIMS_MAX_AGE}s).",
+            hint="Point USER_CACHE['CACHE_ALIAS'] at a shared cache such as Redis, or lower JWT_CLAIMS_MAX_AGE.",
+            id='accounts.W001',
+        )]
+    return []
+
+
+@register(Tags.security, deploy=True)
+def check_revocation_cache(app_configs, **kwargs):
+    from .revocation import revocation_store
+    
+    alias = revocation_store.config['CACHE_ALIAS']
+    if is_process_local(alias):
+        return [Warning(
+            f"TOKEN_REVOCATION uses the process-local CACHES['{alias}'], so revocations cannot be "
+            f"announced to other workers and every token refresh queries revoked_tokens.",
+            hint="Point TOKEN_REVOCATION['CACHE_ALIAS'] at a shared cache such as Redis.",
+            id='accounts.W002',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_replica_pin_cache(app_configs, **kwargs):
+    from sms_backend.replicas import replica_aliases
+    
+    alias = getattr(settings, 'DATABASE_REPLICAS', {}).get('CACHE_ALIAS', 'default')
+    if replica_aliases() and is_process_local(alias):
+        return [Error(
+            f"Read replicas are configured but DATABASE_REPLICAS uses the process-local "
+            f"CACHES['{alias}'], so a write pins its user to the primary only on the worker "
+            f"that handled it and the next request may read a lagging replica.",
+            hint="Point DATABASE_REPLICAS['CACHE_ALIAS'] at a shared cache such as Redis.",
+            id='accounts.E001',
+        )]
+    return []
@@ -0,0 +1,141 @@
+"""
+Sparse fieldsets (?fields=) and opt-in nesting (?expand=) for read serializers
+"""
+from django.utils.module_loading import import_string
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_sparse_params(request):
+    """
+    Return (fields, expand) from the query string as sets of dotted paths,
+    e.g. ?fields=id,course.course_code&expand=course -> ({'id', 'course.course_code'}, {'course'}).
+    fields is None when the parameter is absent, meaning all fields.
+    """
+    if request is None:
+        return None, set()
+    params = request.query_params
+    fields = _split(params.get(FIELDS_PARAM)) if FIELDS_PARAM in params else None
+    return fields, _split(params.get(EXPAND_PARAM))
+
+
+def _split(value):
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+def _top(paths):
+    """First segment of each dotted path"""
+    return {path.split('.', 1)[0] for path in paths}
+
+
+def _nested(paths, name):
+    """Paths below name, with the name stripped"""
+    prefix = f"{name}."
+    return {path[len(prefix):] for path in paths if path.startswith(prefix)}
+
+
+def _nested_fields(fields, name):
+    """Fields requested below name; None (all) unless dotted paths narrow it"""
+    if fields is None:
+        return None
+    return _nested(fields, name) or None
+
+
+def _resolve(serializer_class):
+    if isinstance(serializer_class, str):
+        return import_string(serializer_class)
+    return serializer_class
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin that trims the output to the requested fields and
+    renders relations compactly unless they are expanded.
+
+    Meta.expandable_fields maps a relation to (full, compact) serializers
+    (classes or dotted paths); compact may be None to render the primary
+    key. Meta.select_related maps the serializer's own fields to the joins
+    they need, e.g. {'full_name': ['user']}.
+
+    Options come from the fields/expand keyword arguments or, for the
+    top-level serializer, from the request in the context.
+    """
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        if fields is None and expand is None:
+            self._sparse_options = None
+        else:
+            self._sparse_options = (fields, set(expand or ()))
+        super().__init__(*args, **kwargs)
+
+    def get_sparse_options(self):
+        if self._sparse_options is None:
+            self._sparse_options = parse_sparse_params(self.context.get('request'))
+        return self._sparse_options
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.get_sparse_options()
+
+        if requested is not None:
+            keep = _top(requested)
+            for name in list(fields):
+                if name not in keep:
+                    del fields[name]
+
+        expanded = _top(expand)
+        for name, (full, compact) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name not in fields:
+                continue
+            serializer_class = _resolve(full if name in expanded else compact)
+            if serializer_class is None:
+                from rest_framework.serializers import PrimaryKeyRelatedField
+                fields[name] = PrimaryKeyRelatedField(read_only=True)
+            else:
+                fields[name] = serializer_class(
+                    read_only=True,
+                    fields=_nested_fields(requested, name),
+                    expand=_nested(expand, name)
+                )
+        return fields
+
+    @classmethod
+    def get_select_related(cls, fields=None, expand=()):
+        """select_related paths needed to render these fields without extra queries"""
+        paths = []
+        for name, joins in getattr(cls.Meta, 'select_related', {}).items():
+            if fields is None or name in _top(fields):
+                paths.extend(joins)
+        expanded = _top(expand)
+        for name, (full, compact) in getattr(cls.Meta, 'expandable_fields', {}).items():
+            if fields is not None and name not in _top(fields):
+                continue
+            serializer_class = _resolve(full if name in expanded else compact)
+            if serializer_class is None:
+                continue
+            paths.append(name)
+            if hasattr(serializer_class, 'get_select_related'):
+                paths.extend(
+                    f"{name}__{path}"
+                    for path in serializer_class.get_select_related(
+                        _nested_fields(fields, name), _nested(expand, name)
+                    )
+                )
+        return paths
+
+
+class SparseFieldsViewMixin:
+    """
+    View mixin that narrows select_related to what read_serializer_class
+    will render for this request's ?fields= and ?expand=.
+    """
+    read_serializer_class = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.read_serializer_class is None:
+            return queryset
+        fields, expand = parse_sparse_params(self.request)
+        paths = self.read_serializer_class.get_select_related(fields, expand)
+        queryset = queryset.select_related(None)
+        return queryset.select_related(*dict.fromkeys(paths)) if paths else queryset
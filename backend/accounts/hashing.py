@@ -0,0 +1,38 @@
+"""
+Password hashing spread over a process pool
+
+Kept free of model and DRF imports so spawned workers only need Django's
+settings to be importable.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Below this many passwords the pool start-up costs more than it saves
+POOL_THRESHOLD = 16
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _hash(password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Return make_password(p) for each password, in order.
+    None gives an unusable password, as with create_user(password=None).
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(passwords) < POOL_THRESHOLD:
+        return [_hash(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(_hash, passwords, chunksize=chunksize))
@@ -0,0 +1,239 @@
+"""
+Bulk import of users with their student/teacher profiles from CSV
+"""
+import csv
+from collections import Counter
+
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from search.index import update_documents
+from students.models import Student
+from teachers.models import Teacher
+from .hashing import hash_passwords
+from .models import User
+
+# Max parameters per IN (...) lookup when checking existing values
+LOOKUP_BATCH_SIZE = 1000
+
+STUDENT_REQUIRED = [
+    'student_id', 'date_of_birth', 'gender', 'grade',
+    'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relation',
+]
+TEACHER_REQUIRED = ['teacher_id', 'department', 'specialization', 'qualification']
+STUDENT_FIELDS = STUDENT_REQUIRED + ['address']
+TEACHER_FIELDS = TEACHER_REQUIRED + ['experience_years', 'office_room']
+
+
+class ImportTooLarge(Exception):
+    """The file has more rows than the importer was allowed to take"""
+    def __init__(self, max_rows):
+        self.max_rows = max_rows
+        super().__init__(f"The file has more than {max_rows} rows.")
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    """
+    One CSV row: the user plus the profile columns for its role.
+    Empty cells count as missing. A blank password leaves the account
+    with an unusable password until it is reset.
+    """
+    email = serializers.EmailField(max_length=255)
+    username = serializers.CharField(max_length=150)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    phone_number = serializers.CharField(max_length=20, required=False)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='STUDENT')
+    password = serializers.CharField(required=False, write_only=True)
+
+    # Student profile
+    student_id = serializers.CharField(max_length=20, required=False)
+    date_of_birth = serializers.DateField(required=False)
+    gender = serializers.ChoiceField(choices=Student.GENDER_CHOICES, required=False)
+    grade = serializers.ChoiceField(choices=Student.GRADE_CHOICES, required=False)
+    address = serializers.CharField(required=False)
+    emergency_contact_name = serializers.CharField(max_length=100, required=False)
+    emergency_contact_phone = serializers.CharField(max_length=20, required=False)
+    emergency_contact_relation = serializers.CharField(max_length=50, required=False)
+
+    # Teacher profile
+    teacher_id = serializers.CharField(max_length=20, required=False)
+    department = serializers.ChoiceField(choices=Teacher.DEPARTMENT_CHOICES, required=False)
+    specialization = serializers.CharField(max_length=100, required=False)
+    qualification = serializers.CharField(max_length=200, required=False)
+    experience_years = serializers.IntegerField(min_value=0, required=False)
+    office_room = serializers.CharField(max_length=50, required=False)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate(self, attrs):
+        """Check the profile columns the role needs and the password strength"""
+        required = {'STUDENT': STUDENT_REQUIRED, 'TEACHER': TEACHER_REQUIRED}.get(attrs['role'], [])
+        missing = {
+            field: ['This field is required.'] for field in required if field not in attrs
+        }
+        if missing:
+            raise serializers.ValidationError(missing)
+
+        password = attrs.get('password')
+        if password:
+            user = User(
+                email=attrs['email'], username=attrs['username'],
+                first_name=attrs['first_name'], last_name=attrs['last_name']
+            )
+            try:
+                validate_password(password, user)
+            except ValidationError as e:
+                raise serializers.ValidationError({'password': list(e.messages)})
+        return attrs
+
+
+class UserImporter:
+    """
+    Validate and create users from CSV rows.
+
+    Every row is checked on its own, then uniqueness of email, username,
+    student_id and teacher_id is checked with set-based queries against
+    the database and within the file. Passwords of the remaining rows are
+    hashed on a process pool, and users plus profiles are inserted with
+    bulk_create, one transaction per chunk. Results are reported per row.
+
+    With max_rows set, a file with more rows raises ImportTooLarge before
+    anything is hashed or written.
+    """
+    def __init__(self, chunk_size=500, workers=None, dry_run=False, max_rows=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.max_rows = max_rows
+
+    def run(self, text_stream):
+        """Import from a text stream of CSV with a header row"""
+        reader = csv.DictReader(text_stream)
+        results, valid = [], []
+        for line, raw in enumerate(reader, start=2):
+            if self.max_rows is not None and len(results) >= self.max_rows:
+                raise ImportTooLarge(self.max_rows)
+            row = {
+                key.strip(): value.strip()
+                for key, value in raw.items()
+                if key and value is not None and value.strip()
+            }
+            result = {'line': line, 'email': row.get('email'), 'success': False, 'user_id': None, 'errors': {}}
+            results.append(result)
+
+            serializer = UserImportRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((result, serializer.validated_data))
+            else:
+                result['errors'] = serializer.errors
+
+        valid = self.check_uniqueness(valid)
+
+        if not self.dry_run:
+            self.create(valid)
+        else:
+            for result, _ in valid:
+                result['success'] = True
+
+        succeeded = sum(1 for result in results if result['success'])
+        return {
+            'total': len(results),
+            'created': 0 if self.dry_run else succeeded,
+            'failed': len(results) - succeeded,
+            'dry_run': self.dry_run,
+            'results': results,
+        }
+
+    def check_uniqueness(self, rows):
+        """Drop rows whose unique values exist already or repeat within the file"""
+        checks = [
+            ('email', User, 'email', 'A user with this email already exists.'),
+            ('username', User, 'username', 'A user with this username already exists.'),
+            ('student_id', Student, 'student_id', 'A student with this ID already exists.'),
+            ('teacher_id', Teacher, 'teacher_id', 'A teacher with this ID already exists.'),
+        ]
+        for field, model, column, message in checks:
+            values = [data[field] for _, data in rows if field in data]
+            existing = self.existing_values(model, column, values)
+            counts = Counter(values)
+            for result, data in rows:
+                value = data.get(field)
+                if value is None:
+                    continue
+                if value in existing:
+                    result['errors'].setdefault(field, []).append(message)
+                elif counts[value] > 1:
+                    result['errors'].setdefault(field, []).append(f"Duplicate {field} in this file.")
+        return [(result, data) for result, data in rows if not result['errors']]
+
+    def existing_values(self, model, column, values):
+        existing = set()
+        values = list(set(values))
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            batch = values[start:start + LOOKUP_BATCH_SIZE]
+            existing.update(
+                model.objects.filter(**{f"{column}__in": batch}).values_list(column, flat=True)
+            )
+        return existing
+
+    def create(self, rows):
+        hashes = hash_passwords((data.get('password') for _, data in rows), workers=self.workers)
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            try:
+                self.create_chunk(chunk, hashes[start:start + self.chunk_size])
+            except IntegrityError as e:
+                # Lost a race with another writer; report it on every row of the chunk
+                for result, _ in chunk:
+                    result['errors'] = {'non_field_errors': [f"Could not be saved: {e}"]}
+
+        if rows:
+            from stats.summary import invalidate_summary
+            invalidate_summary()
+
+    @transaction.atomic
+    def create_chunk(self, chunk, hashes):
+        users = User.objects.bulk_create([
+            User(
+                email=data['email'],
+                username=data['username'],
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                phone_number=data.get('phone_number'),
+                role=data['role'],
+                password=password_hash,
+            )
+            for (_, data), password_hash in zip(chunk, hashes)
+        ])
+
+        # Backends without RETURNING (MySQL) leave pk unset; look the ids up by email
+        if any(user.pk is None for user in users):
+            ids = dict(
+                User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id')
+            )
+            for user in users:
+                user.pk = ids[user.email]
+
+        students, teachers = [], []
+        for (result, data), user in zip(chunk, users):
+            if data['role'] == 'STUDENT':
+                students.append(Student(user_id=user.pk, **{f: data[f] for f in STUDENT_FIELDS if f in data}))
+            elif data['role'] == 'TEACHER':
+                teachers.append(Teacher(user_id=user.pk, **{f: data[f] for f in TEACHER_FIELDS if f in data}))
+        Student.objects.bulk_create(students)
+        Teacher.objects.bulk_create(teachers)
+        
+        # bulk_create sends no post_save, so write the search documents here
+        user_ids = [user.pk for user in users]
+        if students:
+            update_documents(Student.objects.filter(user_id__in=user_ids))
+        if teachers:
+            update_documents(Teacher.objects.filter(user_id__in=user_ids))
+
+        for (result, _), user in zip(chunk, users):
+            result['success'] = True
+            result['user_id'] = user.pk
@@ -0,0 +1,179 @@
+"""
+Check FastJSONRenderer/FastJSONParser against DRF's JSON classes and
+measure their throughput
+
+Usage:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --rows 50000 --repeat 5
+    python manage.py benchmark_json --parity-only
+
+The parity cases cover the types our responses carry (Decimal, dates,
+aware and naive datetimes, lazy strings, ErrorDetail, unicode, floats);
+the command fails if any rendered payload differs by a single byte. The
+same cases run in accounts.tests.JSONRendererParityTests.
+"""
+import datetime
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.parsers import FastJSONParser
+from accounts.renderers import FastJSONRenderer, orjson
+
+
+def parity_cases():
+    """Payloads that must render identically with both renderers"""
+    aware = timezone.make_aware(datetime.datetime(2024, 1, 15, 10, 30, 0, 123456), datetime.timezone.utc)
+    local = timezone.localtime(aware)
+    return OrderedDict([
+        ('decimal', {'gpa': Decimal('3.50'), 'grade_points': Decimal('4.00'), 'zero': Decimal('0')}),
+        ('date', {'date_of_birth': datetime.date(2005, 6, 15)}),
+        ('datetime_utc', {'created_at': aware}),
+        ('datetime_local', {'created_at': local}),
+        ('datetime_no_micro', {'created_at': aware.replace(microsecond=0)}),
+        ('datetime_naive', {'created_at': datetime.datetime(2024, 1, 15, 10, 30)}),
+        ('time', {'starts': datetime.time(9, 15)}),
+        ('timedelta', {'duration': datetime.timedelta(hours=1, seconds=5)}),
+        ('uuid', {'id': uuid.UUID('12345678-1234-5678-1234-567812345678')}),
+        ('lazy_string', {'message': gettext_lazy('This field is required.')}),
+        ('error_detail', {'email': [ErrorDetail('Enter a valid email address.', code='invalid')]}),
+        ('unicode', {'name': 'Nguyễn Văn An', 'emoji': '📚', 'separators': 'a b c'}),
+        ('escapes', {'text': 'quote " backslash \\ newline \n tab \t control \x01'}),
+        ('numbers', {'int': 2 ** 53, 'negative': -17, 'float': 0.6667, 'bool': True, 'none': None}),
+        ('floats', {'large': 1e16, 'small': 1e-7, 'tiny': 1e-05, 'max': 1.79e308, 'third': 1 / 3}),
+        ('nested_float', {'results': [{'id': 1, 'stats': {'hit_ratio': 1.5e-07}}]}),
+        ('decimal_exponent', {'value': Decimal('1E+16')}),
+        ('big_int', {'value': 2 ** 70}),
+        ('int_keys', {1: 'one', 2: 'two'}),
+        ('nested', OrderedDict([('results', [OrderedDict([('id', 1), ('tags', ('a', 'b'))])]), ('count', 1)])),
+        ('empty', {'list': [], 'dict': {}, 'string': ''}),
+    ])
+
+
+def invalid_payloads():
+    """Payloads both renderers must refuse with ValueError"""
+    return OrderedDict([
+        ('nan', {'value': float('nan')}),
+        ('infinity', {'value': float('inf')}),
+        ('negative_infinity', {'values': [1, float('-inf')]}),
+    ])
+
+
+INVALID_BODIES = (b'{"a": NaN}', b'{"a": 1,}', b'', b'{"a": "\xff"}')
+
+
+def sample_rows(count):
+    """Rows shaped like the serialized enrollment list payload"""
+    now = timezone.localtime().isoformat()
+    return {
+        'count': count,
+        'next': None,
+        'previous': None,
+        'results': [
+            OrderedDict([
+                ('id', i),
+                ('student', OrderedDict([('id', i), ('student_id', f"STU{i:07d}"), ('full_name', f"Student {i}")])),
+                ('course', OrderedDict([('id', i % 50), ('course_code', f"C{i % 50:03d}"), ('course_name', 'Course')])),
+                ('enrollment_date', now),
+                ('status', 'ENROLLED'),
+                ('grade', 'A'),
+                ('grade_points', '4.00'),
+                ('updated_at', now),
+            ])
+            for i in range(count)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Verify FastJSONRenderer/FastJSONParser parity with DRF and benchmark throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows in the benchmark payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer; the best run is reported')
+        parser.add_argument('--parity-only', action='store_true', help='Only run the parity checks')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back to JSONRenderer'))
+
+        self.check_parity()
+        if options['parity_only']:
+            return
+
+        payload = sample_rows(options['rows'])
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        stock_time, body = self.best(lambda: stock.render(payload), options['repeat'])
+        fast_time, fast_body = self.best(lambda: fast.render(payload), options['repeat'])
+        if body != fast_body:
+            raise CommandError('Benchmark payload rendered differently')
+        self.report('render', len(body), stock_time, fast_time)
+
+        stock_parser, fast_parser = JSONParser(), FastJSONParser()
+        stock_time, _ = self.best(lambda: stock_parser.parse(BytesIO(body)), options['repeat'])
+        fast_time, _ = self.best(lambda: fast_parser.parse(BytesIO(body)), options['repeat'])
+        self.report('parse', len(body), stock_time, fast_time)
+
+    def check_parity(self):
+        stock, fast = JSONRenderer(), FastJSONRenderer()
+        stock_parser, fast_parser = JSONParser(), FastJSONParser()
+        failures = []
+        for name, payload in parity_cases().items():
+            expected = stock.render(payload)
+            actual = fast.render(payload)
+            if expected != actual:
+                failures.append(f"render {name}: {expected!r} != {actual!r}")
+                continue
+            if stock_parser.parse(BytesIO(expected)) != fast_parser.parse(BytesIO(actual)):
+                failures.append(f"parse {name}")
+
+        for name, payload in invalid_payloads().items():
+            errors = []
+            for renderer in (stock, fast):
+                try:
+                    renderer.render(payload)
+                    errors.append(None)
+                except Exception as exc:
+                    errors.append(type(exc).__name__)
+            if errors[0] != errors[1]:
+                failures.append(f"render error {name}: {errors[0]} != {errors[1]}")
+
+        for body in INVALID_BODIES:
+            errors = []
+            for parser in (stock_parser, fast_parser):
+                try:
+                    parser.parse(BytesIO(body))
+                    errors.append(None)
+                except Exception as exc:
+                    errors.append(type(exc).__name__)
+            if errors[0] != errors[1]:
+                failures.append(f"parse error {body!r}: {errors[0]} != {errors[1]}")
+
+        if failures:
+            raise CommandError('JSON parity failures:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f"Parity: {len(parity_cases())} payloads, {len(invalid_payloads())} invalid payloads "
+            f"and {len(INVALID_BODIES)} invalid bodies match"))
+
+    def best(self, func, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def report(self, label, size, stock_time, fast_time):
+        self.stdout.write(
+            f"{label}: {size / 1e6:.1f} MB, DRF {size / stock_time / 1e6:.1f} MB/s, "
+            f"fast {size / fast_time / 1e6:.1f} MB/s ({stock_time / fast_time:.1f}x)"
+        )
@@ -0,0 +1,61 @@
+"""
+Check that every configured database answers and is migrated
+
+Runs the same check as GET /health/ready, then lists the tables and any
+unapplied migrations of each database.
+
+Usage:
+    python manage.py check_database
+    python manage.py check_database --database default
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+from sms_backend.health import check_database
+
+
+class Command(BaseCommand):
+    help = 'Check database connectivity, connection settings and pending migrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            help='Alias to check (repeatable); defaults to every configured database',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['database'] or list(connections)
+        failed = []
+
+        for alias in aliases:
+            if alias not in connections:
+                raise CommandError(f"Unknown database alias '{alias}'")
+
+            ok, report = check_database(alias)
+            settings_dict = connections[alias].settings_dict
+            self.stdout.write(f"[{alias}] {report['vendor']} {settings_dict['NAME']}")
+            if not ok:
+                self.stdout.write(self.style.ERROR(f"  connection failed: {report['error']}"))
+                self.stdout.write("  Check DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT in .env")
+                failed.append(alias)
+                continue
+
+            self.stdout.write(
+                f"  SELECT 1 in {report['latency_ms']} ms; CONN_MAX_AGE={report['conn_max_age']}, "
+                f"CONN_HEALTH_CHECKS={report['health_checks']}, pool_size={report['pool_size']}"
+            )
+            tables = connections[alias].introspection.table_names()
+            self.stdout.write(f"  {len(tables)} table(s)")
+
+            executor = MigrationExecutor(connections[alias])
+            pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+            if pending:
+                self.stdout.write(self.style.WARNING(
+                    f"  {len(pending)} unapplied migration(s); run 'python manage.py migrate'"
+                ))
+
+        if failed:
+            raise CommandError(f"Database check failed for: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(aliases)} database(s) ready"))
@@ -0,0 +1,48 @@
+"""
+Delete revoked refresh tokens that have passed their expiry
+
+Usage:
+    python manage.py purge_revoked_tokens
+    python manage.py purge_revoked_tokens --dry-run
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import RevokedToken
+from accounts.revocation import revocation_store
+
+
+class Command(BaseCommand):
+    help = 'Remove expired rows from the refresh token revocation list'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report how many rows would be removed without deleting them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows deleted per statement',
+        )
+
+    def handle(self, *args, **options):
+        expired = RevokedToken.objects.filter(expires_at__lte=timezone.now())
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired revoked token(s) would be removed")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+
+        if deleted:
+            revocation_store.bump_version()
+
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} expired revoked token(s)"))
@@ -3,7 +3,9 @@ Custom User Model with Role-Based Access Control
 """
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
 class UserManager(BaseUserManager):
@@ -38,6 +40,18 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def with_profile_ids(self):
+        """
+        Users with student_profile_id and teacher_profile_id loaded in the
+        same query, so reading them does not cost a query each
+        """
+        from students.models import Student
+        from teachers.models import Teacher
+        return self.get_queryset().annotate(
+            student_profile_id=Subquery(Student.objects.filter(user_id=OuterRef('pk')).order_by().values('id')[:1]),
+            teacher_profile_id=Subquery(Teacher.objects.filter(user_id=OuterRef('pk')).order_by().values('id')[:1]),
+        )
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     """
@@ -92,11 +106,24 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['email']),
             models.Index(fields=['username']),
             models.Index(fields=['role']),
+            models.Index(fields=['date_joined', 'id']),
         ]
     
     def __str__(self):
         return f"{self.email} ({self.get_role_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what access-token claims were read from (see accounts.signals)
+        instance._original_claims = (instance.__dict__.get('role'), instance.__dict__.get('is_active'))
+        return instance
+    
+    @property
+    def claims_changed(self):
+        """Check if the role or active flag differ from the loaded row"""
+        return getattr(self, '_original_claims', None) != (self.role, self.is_active)
+    
     @property
     def full_name(self):
         """Return user's full name"""
@@ -113,3 +140,48 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_student(self):
         """Check if user is a student"""
         return self.role == 'STUDENT'
+    
+    # Both profile ids cost a query on first access unless the user was
+    # loaded through User.objects.with_profile_ids(), as authentication does
+    @cached_property
+    def student_profile_id(self):
+        """Primary key of the linked Student profile, or None"""
+        from students.models import Student
+        return Student.objects.filter(user_id=self.pk).values_list('id', flat=True).first()
+    
+    @cached_property
+    def teacher_profile_id(self):
+        """Primary key of the linked Teacher profile, or None"""
+        from teachers.models import Teacher
+        return Teacher.objects.filter(user_id=self.pk).values_list('id', flat=True).first()
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh token JTI revoked by logout or rotation.
+    Rows are only needed until the token would have expired anyway;
+    the purge_revoked_tokens command removes the rest.
+    """
+    id = models.BigAutoField(primary_key=True)
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revoked_tokens'
+    )
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'revoked_tokens'
+        verbose_name = 'Revoked Token'
+        verbose_name_plural = 'Revoked Tokens'
+        ordering = ['-revoked_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at:%Y-%m-%d %H:%M})"
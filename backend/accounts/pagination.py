@@ -0,0 +1,174 @@
+"""
+Pagination classes shared by the list endpoints
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on the view's cursor_ordering, e.g.
+    ('-enrollment_date', '-id'). Each page filters past the last row
+    seen instead of using OFFSET, and no COUNT(*) is run, so page N
+    costs the same as page 1.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(view.cursor_ordering)
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        ordering = tuple(_invert(field) for field in self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(queryset.model, ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        """Return (position values, reverse) from the cursor query parameter"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse):
+        position = [
+            _to_cursor_value(_row_value(row, field.lstrip('-'))) for field in self.ordering
+        ]
+        payload = json.dumps({'p': position, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _seek(self, model, ordering, position):
+        """
+        Build the lexicographic "after this row" condition, e.g. for
+        ('-enrollment_date', '-id'):
+        enrollment_date < v0 OR (enrollment_date = v0 AND id < v1)
+        """
+        names = [field.lstrip('-') for field in ordering]
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, position)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        for i, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f"{names[i]}__{lookup}": values[i]})
+            for name, value in zip(names[:i], values[:i]):
+                step &= Q(**{name: value})
+            condition |= step
+        return condition
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+    Views that define cursor_ordering switch to KeysetPagination when the
+    request carries ?pagination=cursor or a ?cursor= token. Keyset pages
+    always follow cursor_ordering, so combining them with ?ordering= is a
+    400 rather than a silently ignored parameter.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if getattr(view, 'cursor_ordering', None) and (
+            request.query_params.get('pagination') == 'cursor' or
+            KeysetPagination.cursor_query_param in request.query_params
+        ):
+            if request.query_params.get(api_settings.ORDERING_PARAM):
+                raise ValidationError({
+                    api_settings.ORDERING_PARAM: ['Cursor pagination cannot be combined with ordering.']
+                })
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def _invert(field):
+    """Flip the direction of an ordering term"""
+    return field[1:] if field.startswith('-') else f"-{field}"
+
+
+def _row_value(row, name):
+    """Read an ordering value from a model instance or a values() row"""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _to_cursor_value(value):
+    """Make an ordering value JSON safe"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
@@ -0,0 +1,41 @@
+"""
+JSON parser backed by orjson when it is installed
+"""
+import codecs
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    Drop-in JSONParser that decodes with orjson when available.
+    Input orjson refuses (invalid JSON, integers over 64 bits) is handed
+    to JSONParser, which either parses it or raises the usual ParseError.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        raw = stream.read()
+        try:
+            if _codec_name(encoding) == 'utf-8':
+                return orjson.loads(raw)
+            return orjson.loads(raw.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            return super().parse(BytesIO(raw), media_type, parser_context)
+
+
+def _codec_name(encoding):
+    """Canonical codec name, e.g. 'UTF8' -> 'utf-8'"""
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return encoding
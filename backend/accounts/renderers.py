@@ -0,0 +1,137 @@
+"""
+Renderers: orjson-backed JSON and the export formats
+"""
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def has_float(value):
+    """Whether a float or Decimal occurs anywhere in dicts, lists and tuples"""
+    if isinstance(value, dict):
+        value = value.values()
+    elif not isinstance(value, (list, tuple)):
+        return isinstance(value, (float, Decimal))
+    for item in value:
+        # Exact type checks first: rows are mostly strings and integers
+        kind = type(item)
+        if kind is str or kind is int or item is None or kind is bool:
+            continue
+        if has_float(item):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when available.
+    Types orjson does not handle the way DRF does (datetimes, Decimal,
+    lazy strings, ...) are passed to DRF's own JSONEncoder.default, so the
+    bytes match JSONRenderer's compact output. Indented output, ASCII
+    escaping, payloads orjson rejects (e.g. integers over 64 bits) and
+    installs without orjson fall back to JSONRenderer.
+
+    Payloads holding floats or Decimals also fall back: orjson writes
+    1e16 as "1e16" where json writes "1e+16", and renders NaN and
+    infinity as null where JSONRenderer raises ValueError.
+    """
+    encoder = encoders.JSONEncoder()
+
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if has_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match JSONRenderer's escaping of the JavaScript line terminators
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+_datetime_field = serializers.DateTimeField()
+_date_field = serializers.DateField()
+
+
+def export_value(value):
+    """Format a database value the way the JSON API does"""
+    if isinstance(value, datetime.datetime):
+        return _datetime_field.to_representation(value)
+    if isinstance(value, datetime.date):
+        return _date_field.to_representation(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def csv_value(value):
+    value = export_value(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return FastJSONRenderer().render(value).decode('utf-8')
+    return value
+
+
+def as_rows(data):
+    """A response body as a list of row dicts: lists as is, an object as one row"""
+    if data is None:
+        return []
+    return data if isinstance(data, list) else [data]
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    text/csv (?format=csv). Export views stream their own body (see
+    accounts.exports); other data is rendered as one row per list item,
+    with the union of their keys as the header and nested values as JSON.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = as_rows(data)
+        if not rows:
+            return b''
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow([csv_value(row.get(name)) for name in names])
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    application/x-ndjson (?format=ndjson). Export views stream their own
+    body; other data is rendered as one JSON line per list item.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer = FastJSONRenderer()
+        return b''.join(renderer.render(row) + b'\n' for row in as_rows(data))
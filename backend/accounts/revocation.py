@@ -0,0 +1,178 @@
+"""
+In-memory revocation check for refresh token JTIs
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    Sized for `capacity` items at the given false positive rate; positions
+    come from double hashing a single blake2b digest.
+    """
+    def __init__(self, capacity, false_positive_rate=0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Revoked refresh token JTIs held as a Bloom filter plus an exact
+    {jti: expiry} map, rebuilt from RevokedToken rows that have not yet
+    expired. Tokens the filter has never seen, the common case, are
+    accepted without a query.
+
+    The snapshot is rebuilt every REBUILD_INTERVAL seconds, and as soon as
+    another process revokes a token when CACHE_ALIAS points at a shared
+    cache (each revoke bumps a version key there). With a process-local
+    cache (LocMemCache, DummyCache) other workers' revocations cannot be
+    announced, so a JTI missing from the snapshot is confirmed against
+    the RevokedToken table instead; refresh token checks then cost one
+    indexed lookup, but a token revoked on one worker is refused on all.
+    Configured through settings.TOKEN_REVOCATION.
+    """
+    version_key = 'auth:revocation:version'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._expiries = {}
+        self._built_at = 0.0
+        self._version = None
+        self.checks = 0
+        self.bloom_negatives = 0
+        self.database_checks = 0
+        self.rebuilds = 0
+
+    @property
+    def config(self):
+        return {
+            'REBUILD_INTERVAL': 60,
+            'FALSE_POSITIVE_RATE': 0.001,
+            'CACHE_ALIAS': 'default',
+            **getattr(settings, 'TOKEN_REVOCATION', {}),
+        }
+
+    @property
+    def cache(self):
+        return caches[self.config['CACHE_ALIAS']]
+
+    @property
+    def shared(self):
+        """Whether the version key reaches other processes"""
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def is_revoked(self, jti):
+        """Check if the JTI has been revoked"""
+        self._ensure_fresh()
+        self.checks += 1
+        bloom, expiries = self._bloom, self._expiries
+        if jti in bloom and jti in expiries:
+            return True
+        if self.shared:
+            if jti not in bloom:
+                self.bloom_negatives += 1
+            return False
+        # Possibly revoked by another process since the last rebuild
+        from .models import RevokedToken
+        self.database_checks += 1
+        return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+    def revoke(self, jti, expires_at, user_id=None):
+        """Record a revoked JTI; expires_at is a datetime or epoch seconds"""
+        from .models import RevokedToken
+
+        if not isinstance(expires_at, datetime):
+            expires_at = datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at)],
+            ignore_conflicts=True
+        )
+
+        with self._lock:
+            if self._bloom is not None:
+                self._expiries[jti] = expires_at.timestamp()
+                self._bloom.add(jti)
+                if self._bloom.count > self._bloom.capacity:
+                    self._built_at = 0.0
+        self.bump_version()
+
+    def bump_version(self):
+        """Tell other processes their snapshot is out of date"""
+        self._version = uuid.uuid4().hex
+        self.cache.set(self.version_key, self._version, None)
+
+    def rebuild(self):
+        """Reload unexpired revoked JTIs from the database"""
+        from .models import RevokedToken
+
+        # Read the version first: a revoke committed while the rows are
+        # loaded then leaves the snapshot stale instead of marked current
+        version = self.cache.get(self.version_key)
+        rows = RevokedToken.objects.filter(
+            expires_at__gt=timezone.now()
+        ).values_list('jti', 'expires_at')
+        expiries = {jti: expires_at.timestamp() for jti, expires_at in rows.iterator(chunk_size=5000)}
+
+        bloom = BloomFilter(max(1024, len(expiries) * 2), self.config['FALSE_POSITIVE_RATE'])
+        for jti in expiries:
+            bloom.add(jti)
+
+        with self._lock:
+            self._bloom = bloom
+            self._expiries = expiries
+            self._built_at = time.monotonic()
+            self._version = version
+            self.rebuilds += 1
+
+    def _ensure_fresh(self):
+        stale = (
+            self._bloom is None or
+            time.monotonic() - self._built_at > self.config['REBUILD_INTERVAL'] or
+            (self.shared and self.cache.get(self.version_key) != self._version)
+        )
+        if stale:
+            self.rebuild()
+
+    def stats(self):
+        return {
+            'checks': self.checks,
+            'bloom_negatives': self.bloom_negatives,
+            'database_checks': self.database_checks,
+            'rebuilds': self.rebuilds,
+            'revoked': len(self._expiries),
+            'bloom_bits': self._bloom.size if self._bloom else 0,
+            'bloom_hashes': self._bloom.hash_count if self._bloom else 0,
+        }
+
+
+revocation_store = RevocationStore()
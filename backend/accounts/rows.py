@@ -0,0 +1,64 @@
+"""
+Fast read path that serializes queryset.values() rows into plain dicts
+"""
+from .fieldsets import _top, parse_sparse_params
+
+
+class ValuesRowSerializer:
+    """
+    Reproduces a read serializer's default output from values() rows,
+    skipping model instantiation and per-field serializer dispatch.
+
+    Subclasses name the serializer they mirror and the values() paths they
+    read. The default to_representation(row) outputs, in the serializer's
+    field order, every field whose name is a key of the row; subclasses
+    override it for nested or computed fields. Scalar formatting (dates,
+    datetimes, decimals) is delegated to the mirrored serializer's own
+    field instances so the rendered output stays byte-identical.
+    """
+    serializer_class = None
+    values = ()
+
+    def __init__(self, fields=None, context=None):
+        self.fields = fields
+        self.context = context or {}
+        template = self.serializer_class(context=self.context, expand=())
+        self.formatters = {
+            name: field.to_representation
+            for name, field in template.fields.items()
+        }
+
+    @classmethod
+    def for_request(cls, request, context=None):
+        """
+        Row serializer for this request, or None when it asks for nested
+        fields or expansions only the full serializer can render
+        """
+        fields, expand = parse_sparse_params(request)
+        if expand or (fields is not None and any('.' in name for name in fields)):
+            return None
+        return cls(fields=fields, context=context)
+
+    def prepare(self, queryset):
+        """Turn a model queryset into the values() rows this serializer reads"""
+        return queryset.values(*self.values)
+
+    def format(self, name, value):
+        return None if value is None else self.formatters[name](value)
+
+    def to_representation(self, row):
+        return {
+            name: self.format(name, row[name])
+            for name in self.formatters
+            if name in row
+        }
+
+    def serialize(self, rows):
+        keep = _top(self.fields) if self.fields is not None else None
+        data = []
+        for row in rows:
+            item = self.to_representation(row)
+            if keep is not None:
+                item = {name: value for name, value in item.items() if name in keep}
+            data.append(item)
+        return data
@@ -2,12 +2,17 @@
 Serializers for User Authentication and Management
 """
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from .fieldsets import SparseFieldsMixin
 from .models import User
+from .tokens import ProfileRefreshToken
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for User model (read-only operations)
     """
@@ -23,6 +28,17 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined', 'last_login']
 
 
+class UserSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact user representation for nesting in other resources
+    """
+    full_name = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'full_name']
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration
@@ -167,3 +183,57 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         if User.objects.exclude(pk=user.pk).filter(username=value).exists():
             raise serializers.ValidationError("A user with this username already exists.")
         return value
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that rejects revoked refresh tokens and revokes the
+    old one on rotation. The role and profile claims are re-read from
+    the user, and inactive or deleted users get no new tokens.
+    """
+    token_class = ProfileRefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        user = User.objects.filter(pk=refresh.payload.get(jwt_settings.USER_ID_CLAIM)).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('No active account found for the given token', code='no_active_account')
+        refresh.set_user_claims(user)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        
+        return data
+
+
+class UserImportSerializer(serializers.Serializer):
+    """
+    Serializer for a CSV upload of users with student/teacher profiles.
+    See accounts.importer for the columns and how rows are processed.
+    Passwords are hashed in this process; files over USER_IMPORT_MAX_ROWS
+    raise ImportTooLarge.
+    """
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default=False)
+    
+    def create(self, validated_data):
+        import io
+        from django.conf import settings
+        from .importer import UserImporter
+        
+        upload = validated_data['file']
+        text_stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        importer = UserImporter(
+            workers=1,
+            dry_run=validated_data['dry_run'],
+            max_rows=settings.USER_IMPORT_MAX_ROWS,
+        )
+        return importer.run(text_stream)
@@ -0,0 +1,72 @@
+"""
+Signal handlers for accounts app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .user_cache import user_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop a user from the authentication cache on any change,
+    including password changes and deactivation. The entry is dropped
+    again on commit so a concurrent request cannot re-cache the old row.
+    """
+    user_id = instance.pk
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+def invalidate_claims(user_id):
+    """
+    Distrust the user's access-token claims now and again on commit, so a
+    token refreshed while the change was uncommitted is caught as well.
+    """
+    user_cache.invalidate_claims(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate_claims(user_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_claims_on_change(sender, instance, created, **kwargs):
+    """
+    Access tokens carry the user's role and active flag; once either
+    changes, claims issued before now are no longer trusted and requests
+    load the user instead.
+    """
+    if not created and instance.claims_changed:
+        invalidate_claims(instance.pk)
+    instance._original_claims = (instance.role, instance.is_active)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_claims_on_delete(sender, instance, **kwargs):
+    invalidate_claims(instance.pk)
+
+
+def invalidate_cached_profile_owner(sender, instance, **kwargs):
+    """
+    Creating or removing a student/teacher profile changes the cached
+    user's profile ids.
+    """
+    user_cache.invalidate(instance.user_id)
+
+
+def invalidate_profile_owner_claims(sender, instance, **kwargs):
+    """
+    A removed student/teacher profile leaves a stale profile id in the
+    owner's access-token claims.
+    """
+    invalidate_claims(instance.user_id)
+
+
+post_save.connect(invalidate_cached_profile_owner, sender='students.Student', dispatch_uid='user-cache-student-save')
+post_delete.connect(invalidate_cached_profile_owner, sender='students.Student', dispatch_uid='user-cache-student-delete')
+post_save.connect(invalidate_cached_profile_owner, sender='teachers.Teacher', dispatch_uid='user-cache-teacher-save')
+post_delete.connect(invalidate_cached_profile_owner, sender='teachers.Teacher', dispatch_uid='user-cache-teacher-delete')
+post_delete.connect(invalidate_profile_owner_claims, sender='students.Student', dispatch_uid='claims-student-delete')
+post_delete.connect(invalidate_profile_owner_claims, sender='teachers.Teacher', dispatch_uid='claims-teacher-delete')
@@ -0,0 +1,442 @@
+import tempfile
+import uuid
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from teachers.models import Teacher
+
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from .checks import check_revocation_cache
+from .importer import UserImporter
+from .management.commands.benchmark_json import INVALID_BODIES, invalid_payloads, parity_cases
+from .models import RevokedToken, User
+from .parsers import FastJSONParser
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer
+from .revocation import RevocationStore
+from .rows import ValuesRowSerializer
+from .serializers import RevocableTokenRefreshSerializer, UserSerializer
+from .tokens import ProfileRefreshToken
+from .user_cache import UserCache
+
+
+class WorkerStore(RevocationStore):
+    """RevocationStore of one worker process, using its own cache alias"""
+    def __init__(self, alias):
+        super().__init__()
+        self.alias = alias
+
+    @property
+    def config(self):
+        return {**super().config, 'CACHE_ALIAS': self.alias}
+
+
+def new_jti():
+    return uuid.uuid4().hex
+
+
+@override_settings(CACHES={
+    # Two LocMemCaches with different locations behave like the
+    # process-local caches of two separate workers
+    'worker_a': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker-a'},
+    'worker_b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker-b'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class RevocationStoreTests(TestCase):
+    def setUp(self):
+        self.expires_at = timezone.now() + timedelta(days=1)
+
+    def test_revoked_token_is_refused_by_revoking_worker(self):
+        store = WorkerStore('worker_a')
+        jti = new_jti()
+        self.assertFalse(store.is_revoked(jti))
+        store.revoke(jti, self.expires_at)
+        self.assertTrue(store.is_revoked(jti))
+
+    def test_revocation_reaches_other_worker_with_local_cache(self):
+        worker_a, worker_b = WorkerStore('worker_a'), WorkerStore('worker_b')
+        self.assertFalse(worker_a.shared)
+        jti = new_jti()
+        # Both snapshots are built before the revocation
+        self.assertFalse(worker_a.is_revoked(jti))
+        self.assertFalse(worker_b.is_revoked(jti))
+        rebuilds = worker_b.rebuilds
+
+        worker_a.revoke(jti, self.expires_at)
+
+        self.assertTrue(worker_b.is_revoked(jti))
+        self.assertEqual(worker_b.rebuilds, rebuilds)
+        self.assertGreater(worker_b.database_checks, 0)
+
+    def test_revocation_reaches_other_worker_with_shared_cache(self):
+        worker_a, worker_b = WorkerStore('shared'), WorkerStore('shared')
+        self.assertTrue(worker_a.shared)
+        jti = new_jti()
+        self.assertFalse(worker_b.is_revoked(jti))
+        rebuilds = worker_b.rebuilds
+
+        worker_a.revoke(jti, self.expires_at)
+
+        self.assertTrue(worker_b.is_revoked(jti))
+        self.assertEqual(worker_b.rebuilds, rebuilds + 1)
+        self.assertEqual(worker_b.database_checks, 0)
+
+    def test_revocation_during_rebuild_is_not_missed(self):
+        worker_a, worker_b = WorkerStore('shared'), WorkerStore('shared')
+        jti = new_jti()
+        filter_revoked = RevokedToken.objects.filter
+
+        def revoke_after_read(*args, **kwargs):
+            # Another worker revokes right after this rebuild read its rows
+            rows = list(filter_revoked(*args, **kwargs).values_list('jti', 'expires_at'))
+            worker_a.revoke(jti, self.expires_at)
+            return mock.Mock(**{'values_list.return_value.iterator.return_value': rows})
+
+        with mock.patch.object(RevokedToken.objects, 'filter', side_effect=revoke_after_read):
+            worker_b.rebuild()
+
+        self.assertTrue(worker_b.is_revoked(jti))
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([warning.id for warning in check_revocation_cache(None)], ['accounts.W002'])
+        with self.settings(TOKEN_REVOCATION={'CACHE_ALIAS': 'shared'}):
+            self.assertEqual(check_revocation_cache(None), [])
+
+    def test_shared_cache_accepts_valid_tokens_without_query(self):
+        store = WorkerStore('shared')
+        store.is_revoked(new_jti())
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked(new_jti()))
+
+    def test_expired_revocation_is_ignored(self):
+        worker_a, worker_b = WorkerStore('worker_a'), WorkerStore('worker_b')
+        jti = new_jti()
+        worker_b.is_revoked(new_jti())
+        worker_a.revoke(jti, timezone.now() - timedelta(minutes=1))
+        self.assertFalse(worker_b.is_revoked(jti))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+})
+class UserCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cached@x.com', 'pw', username='cached', role='STUDENT')
+
+    def test_process_local_entries_use_local_ttl(self):
+        for backend in ('local', 'shared'):
+            with self.subTest(backend=backend), override_settings(USER_CACHE={'BACKEND': backend}):
+                cache = UserCache()
+                self.assertFalse(cache.shared)
+                self.assertEqual(cache.ttl, 5)
+                self.assertEqual(cache.backend.ttl, 5)
+
+    @override_settings(USER_CACHE={'BACKEND': 'shared', 'CACHE_ALIAS': 'shared'})
+    def test_invalidation_reaches_other_worker_with_shared_cache(self):
+        worker_a, worker_b = UserCache(), UserCache()
+        self.assertTrue(worker_a.shared)
+        self.assertEqual(worker_a.ttl, 300)
+        worker_b.set(self.user)
+        self.assertEqual(worker_b.get(self.user.pk).email, 'cached@x.com')
+
+        worker_a.invalidate(self.user.pk)
+
+        self.assertIsNone(worker_b.get(self.user.pk))
+
+
+class ClaimsView:
+    allow_claims_user = True
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('claims@x.com', 'pw', username='claims', role='TEACHER')
+
+    def authenticate(self, access):
+        request = Request(
+            APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {access}"),
+            parser_context={'view': ClaimsView()},
+        )
+        user, token = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def test_fresh_claims_skip_the_user_lookup(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertTrue(user.is_teacher())
+
+    @override_settings(JWT_CLAIMS_MAX_AGE=60)
+    def test_old_claims_load_the_user(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['claims_iat'] -= 61
+        User.objects.filter(pk=self.user.pk).update(role='STUDENT')
+        user = self.authenticate(access)
+        self.assertIsInstance(user, User)
+        self.assertTrue(user.is_student())
+
+    def test_old_claims_of_deactivated_user_are_refused(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['claims_iat'] -= 3600
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_claims_are_trusted_for_the_access_token_lifetime(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['claims_iat'] -= 1800
+        self.assertIsInstance(self.authenticate(access), ClaimsUser)
+
+    def test_role_change_distrusts_earlier_claims(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['claims_iat'] -= 1
+        user = User.objects.get(pk=self.user.pk)
+        user.role = 'STUDENT'
+        user.save()
+        user = self.authenticate(access)
+        self.assertIsInstance(user, User)
+        self.assertTrue(user.is_student())
+
+    def test_unrelated_save_keeps_claims(self):
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        access['claims_iat'] -= 1
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        self.assertIsInstance(self.authenticate(access), ClaimsUser)
+
+    def test_loaded_user_has_profile_ids(self):
+        teacher = Teacher.objects.create(
+            user=self.user, teacher_id='T1', department='MATH', specialization='x', qualification='y'
+        )
+        access = ProfileRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user = ClaimsJWTAuthentication().get_user(access)
+            self.assertEqual((user.teacher_profile_id, user.student_profile_id), (teacher.pk, None))
+
+    def test_refresh_rereads_claims(self):
+        refresh = ProfileRefreshToken.for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(role='ADMIN')
+        serializer = RevocableTokenRefreshSerializer(data={'refresh': str(refresh)})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(ProfileRefreshToken(serializer.validated_data['refresh'])['role'], 'ADMIN')
+
+    def test_refresh_refused_for_deactivated_user(self):
+        refresh = ProfileRefreshToken.for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        serializer = RevocableTokenRefreshSerializer(data={'refresh': str(refresh)})
+        with self.assertRaises(AuthenticationFailed):
+            serializer.is_valid()
+
+
+class UserRowSerializer(ValuesRowSerializer):
+    serializer_class = UserSerializer
+    values = ('id', 'email', 'username', 'role', 'is_active', 'date_joined', 'last_login')
+
+
+class ValuesRowSerializerTests(TestCase):
+    def test_default_representation_matches_serializer(self):
+        User.objects.create_user('rows@x.com', 'pw', username='rows', role='STUDENT', last_login=timezone.now())
+        queryset = User.objects.filter(email='rows@x.com')
+        rows = UserRowSerializer()
+        expected = UserSerializer(queryset.get()).data
+        item = rows.serialize(rows.prepare(queryset))[0]
+        self.assertEqual(list(item), list(UserRowSerializer.values))
+        self.assertEqual(item, {name: expected[name] for name in UserRowSerializer.values})
+
+
+class JSONRendererParityTests(TestCase):
+    def test_payloads_render_identically(self):
+        for name, payload in parity_cases().items():
+            with self.subTest(name):
+                expected = JSONRenderer().render(payload)
+                self.assertEqual(FastJSONRenderer().render(payload), expected)
+                self.assertEqual(
+                    FastJSONParser().parse(BytesIO(expected)),
+                    JSONParser().parse(BytesIO(expected))
+                )
+
+    def test_non_finite_floats_are_refused(self):
+        for name, payload in invalid_payloads().items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(payload)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(payload)
+
+    def test_invalid_bodies_fail_alike(self):
+        for body in INVALID_BODIES:
+            with self.subTest(body):
+                errors = []
+                for parser in (JSONParser(), FastJSONParser()):
+                    with self.assertRaises(Exception) as raised:
+                        parser.parse(BytesIO(body))
+                    errors.append(type(raised.exception))
+                self.assertEqual(errors[0], errors[1])
+
+
+class ExportRendererTests(TestCase):
+    data = [
+        {'id': 1, 'email': 'a@x.com', 'is_active': True, 'user': {'id': 3}},
+        {'id': 2, 'email': 'b@x.com', 'is_active': False, 'phone_number': None},
+    ]
+
+    def test_csv_render(self):
+        self.assertEqual(
+            CSVRenderer().render(self.data).decode(),
+            'id,email,is_active,user,phone_number\r\n'
+            '1,a@x.com,true,"{""id"":3}",\r\n'
+            '2,b@x.com,false,,\r\n'
+        )
+        self.assertEqual(CSVRenderer().render({'detail': 'Not found.'}).decode(), 'detail\r\nNot found.\r\n')
+        self.assertEqual(CSVRenderer().render(None), b'')
+
+    def test_ndjson_render(self):
+        self.assertEqual(
+            NDJSONRenderer().render(self.data),
+            b'{"id":1,"email":"a@x.com","is_active":true,"user":{"id":3}}\n'
+            b'{"id":2,"email":"b@x.com","is_active":false,"phone_number":null}\n'
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@x.com', 'pw', username='admin', role='ADMIN')
+        for number in range(6):
+            User.objects.create_user(f"user{number}@x.com", 'pw', username=f"user{number}", role='STUDENT')
+        # Rows sharing the leading sort key must still page on the id tie-breaker
+        User.objects.update(date_joined=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def pages(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_pages_are_continuous_over_equal_timestamps(self):
+        pages = self.pages('/api/auth/users/?pagination=cursor&page_size=3', 'next')
+        expected = list(User.objects.order_by('-date_joined', '-id').values_list('id', flat=True))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_links_walk_back(self):
+        forward = self.pages('/api/auth/users/?pagination=cursor&page_size=3', 'next')
+        response = self.client.get('/api/auth/users/?pagination=cursor&page_size=3')
+        last = self.client.get(self.client.get(response.data['next']).data['next'])
+        backward = self.pages(last.data['previous'], 'previous')
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_ordering_is_rejected_in_cursor_mode(self):
+        response = self.client.get('/api/auth/users/?pagination=cursor&ordering=email')
+        self.assertEqual(response.status_code, 400)
+
+
+IMPORT_HEADER = 'email,username,first_name,last_name,role,password,teacher_id,department,specialization,qualification\n'
+
+
+def import_row(number, **overrides):
+    row = {
+        'email': f"t{number}@x.com", 'username': f"t{number}", 'first_name': 'T', 'last_name': str(number),
+        'role': 'TEACHER', 'password': 'Correct-Horse-42', 'teacher_id': f"T{number}",
+        'department': 'MATH', 'specialization': 's', 'qualification': 'q',
+    }
+    row.update(overrides)
+    return ','.join(row.values()) + '\n'
+
+
+class UserImportTests(TestCase):
+    def run_import(self, *rows, **kwargs):
+        return UserImporter(workers=1, **kwargs).run(StringIO(IMPORT_HEADER + ''.join(rows)))
+
+    def errors(self, result):
+        return {row['line']: sorted(row['errors']) for row in result['results'] if row['errors']}
+
+    def test_valid_rows_are_created_with_profiles(self):
+        result = self.run_import(import_row(1), import_row(2, password=''))
+        self.assertEqual((result['created'], result['failed']), (2, 0))
+        first, second = User.objects.order_by('username')
+        self.assertTrue(first.check_password('Correct-Horse-42'))
+        self.assertFalse(second.has_usable_password())
+        self.assertEqual(Teacher.objects.filter(user__in=[first, second]).count(), 2)
+
+    def test_duplicate_rows_are_skipped(self):
+        User.objects.create_user('taken@x.com', 'pw', username='taken')
+        result = self.run_import(
+            import_row(1, email='taken@x.com'), import_row(2, username='twice'),
+            import_row(3, username='twice'), import_row(4, teacher_id='T5'), import_row(5),
+        )
+        self.assertEqual(self.errors(result), {
+            2: ['email'], 3: ['username'], 4: ['username'], 5: ['teacher_id'], 6: ['teacher_id'],
+        })
+        self.assertEqual(result['created'], 0)
+        self.assertFalse(Teacher.objects.exists())
+
+    def test_invalid_rows_are_reported_and_the_rest_created(self):
+        result = self.run_import(
+            import_row(1, email='not-an-email'), import_row(2, teacher_id=''),
+            import_row(3, password='123'), import_row(4),
+        )
+        self.assertEqual(self.errors(result), {2: ['email'], 3: ['teacher_id'], 4: ['password']})
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['t4'])
+
+    def test_failed_chunk_writes_nothing(self):
+        # A user created after the uniqueness check makes the chunk's insert fail
+        User.objects.create_user('t2@x.com', 'pw', username='other')
+        with mock.patch.object(UserImporter, 'existing_values', return_value=set()):
+            result = self.run_import(import_row(1), import_row(2), import_row(3))
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(self.errors(result), {line: ['non_field_errors'] for line in (2, 3, 4)})
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(Teacher.objects.exists())
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import(import_row(1), dry_run=True)
+        self.assertEqual((result['total'], result['created'], result['failed']), (1, 0, 0))
+        self.assertFalse(User.objects.exists())
+
+
+@override_settings(USER_IMPORT_MAX_ROWS=2)
+class UserImportViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@x.com', 'pw', username='admin', role='ADMIN')
+
+    def upload(self, *rows, user=None):
+        upload = SimpleUploadedFile('users.csv', (IMPORT_HEADER + ''.join(rows)).encode(), 'text/csv')
+        client = APIClient()
+        client.force_authenticate(user or self.admin)
+        return client.post(reverse('user-import'), {'file': upload}, format='multipart')
+
+    def test_import_within_the_limit(self):
+        response = self.upload(import_row(1), import_row(2))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['created'], 2)
+
+    def test_larger_files_are_refused(self):
+        response = self.upload(import_row(1), import_row(2), import_row(3))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('import_users', response.data['error']['message'])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_admin_only(self):
+        teacher = User.objects.create_user('t@x.com', 'pw', username='t', role='TEACHER')
+        self.assertEqual(self.upload(import_row(1), user=teacher).status_code, 403)
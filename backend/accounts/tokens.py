@@ -0,0 +1,54 @@
+"""
+JWT token classes carrying role and profile claims
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+from .revocation import revocation_store
+
+
+class ProfileRefreshToken(RefreshToken):
+    """
+    Refresh token that embeds the user's role, profile primary keys and
+    active flag. The claims are copied to every access token derived from
+    it, which lets ClaimsJWTAuthentication serve opted-in read-only views
+    without loading the user. They are stamped with the time they were
+    read (claims_iat) and re-read from the user on every refresh, so
+    ClaimsJWTAuthentication can refuse to trust old ones.
+    
+    Revocation (logout, rotation) goes through accounts.revocation
+    instead of simplejwt's token_blacklist app.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+    
+    def set_user_claims(self, user):
+        """Copy the user's current role, profile ids and active flag"""
+        self['role'] = user.role
+        self['is_active'] = user.is_active
+        self['student_id'] = user.student_profile_id if user.is_student() else None
+        self['teacher_id'] = user.teacher_profile_id if user.is_teacher() else None
+        self['claims_iat'] = datetime_to_epoch(self.current_time)
+    
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+    
+    def check_blacklist(self):
+        """Raise TokenError if this token has been revoked"""
+        if revocation_store.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+    
+    def blacklist(self):
+        """Revoke this token until it expires"""
+        revocation_store.revoke(
+            self.payload[api_settings.JTI_CLAIM],
+            self.payload['exp'],
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM)
+        )
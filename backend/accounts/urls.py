@@ -6,7 +6,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, LoginView, LogoutView,
     UserProfileView, ChangePasswordView,
-    UserListView, UserDetailView
+    UserListView, UserDetailView, UserImportView, UserCacheStatsView
 )
 
 urlpatterns = [
@@ -22,5 +22,7 @@ urlpatterns = [
     
     # User management endpoints (Admin only)
     path('users/', UserListView.as_view(), name='user-list'),
+    path('users/import/', UserImportView.as_view(), name='user-import'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
+    path('user-cache/', UserCacheStatsView.as_view(), name='user-cache-stats'),
 ]
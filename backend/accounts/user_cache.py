@@ -0,0 +1,207 @@
+"""
+Cache of authenticated User objects for CachedJWTAuthentication
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class LocalUserCache:
+    """
+    Process-local LRU of pickled users with a time-to-live.
+    Entries are stored pickled so every request gets its own User instance.
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return payload
+    
+    def set(self, user_id, payload):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedUserCache:
+    """
+    User cache kept in a Django cache alias (e.g. Redis or Memcached) so
+    that every worker sees the same entries and invalidations.
+    """
+    key_prefix = 'auth:user:'
+    
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+    
+    @property
+    def cache(self):
+        return caches[self.alias]
+    
+    def get(self, user_id):
+        return self.cache.get(f"{self.key_prefix}{user_id}")
+    
+    def set(self, user_id, payload):
+        self.cache.set(f"{self.key_prefix}{user_id}", payload, self.ttl)
+    
+    def delete(self, user_id):
+        self.cache.delete(f"{self.key_prefix}{user_id}")
+    
+    def clear(self):
+        # Entries expire on their own; a shared cache is never flushed wholesale
+        pass
+    
+    def __len__(self):
+        return 0
+
+
+class UserCache:
+    """
+    Front for the configured user cache backend with hit/miss counters.
+    Configured through settings.USER_CACHE:
+        ENABLED     - turn caching off entirely (default True)
+        BACKEND     - 'shared' (Django cache alias, default) or 'local'
+                      (per process LRU)
+        MAX_SIZE    - LRU capacity for the local backend
+        TTL         - seconds an entry stays valid
+        LOCAL_TTL   - cap on TTL when entries live in one process: the
+                      local backend, or a shared one whose alias is a
+                      LocMemCache. Invalidations made by other workers
+                      cannot reach those entries, so a changed or
+                      deactivated user is seen by every worker within
+                      LOCAL_TTL seconds.
+        CACHE_ALIAS - Django cache used by the shared backend
+    """
+    claims_key_prefix = 'auth:claims:'
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._backend = None
+        self._lock = threading.Lock()
+    
+    @property
+    def config(self):
+        return {
+            'ENABLED': True,
+            'BACKEND': 'shared',
+            'MAX_SIZE': 1024,
+            'TTL': 300,
+            'LOCAL_TTL': 5,
+            'CACHE_ALIAS': 'default',
+            **getattr(settings, 'USER_CACHE', {}),
+        }
+    
+    @property
+    def shared(self):
+        """Whether entries, and their invalidation, reach every worker"""
+        config = self.config
+        return (
+            config['BACKEND'] == 'shared' and
+            not isinstance(caches[config['CACHE_ALIAS']], (LocMemCache, DummyCache))
+        )
+    
+    @property
+    def ttl(self):
+        config = self.config
+        return config['TTL'] if self.shared else min(config['TTL'], config['LOCAL_TTL'])
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            config = self.config
+            if config['BACKEND'] == 'shared':
+                self._backend = SharedUserCache(config['CACHE_ALIAS'], self.ttl)
+            else:
+                self._backend = LocalUserCache(config['MAX_SIZE'], self.ttl)
+        return self._backend
+    
+    @property
+    def enabled(self):
+        return self.config['ENABLED']
+    
+    def get(self, user_id):
+        """Return a fresh copy of the cached user, or None"""
+        if not self.enabled:
+            return None
+        payload = self.backend.get(user_id)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return pickle.loads(payload) if payload is not None else None
+    
+    def set(self, user):
+        if self.enabled:
+            self.backend.set(user.pk, pickle.dumps(user, pickle.HIGHEST_PROTOCOL))
+    
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+    
+    def invalidate_claims(self, user_id):
+        """
+        Stop trusting access-token claims issued to this user before now.
+        The mark lives in CACHES[CACHE_ALIAS] for as long as claims are
+        trusted, so only a shared cache carries it to other workers.
+        """
+        caches[self.config['CACHE_ALIAS']].set(
+            f"{self.claims_key_prefix}{user_id}", time.time(), settings.JWT_CLAIMS_MAX_AGE
+        )
+    
+    def claims_invalidated_at(self, user_id):
+        """Epoch seconds of the user's last claims invalidation, or None"""
+        return caches[self.config['CACHE_ALIAS']].get(f"{self.claims_key_prefix}{user_id}")
+    
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.config['BACKEND'],
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'size': len(self.backend),
+            'max_size': self.config['MAX_SIZE'],
+            'shared': self.shared,
+            'ttl': self.ttl,
+        }
+
+
+user_cache = UserCache()
@@ -4,17 +4,18 @@ Authentication and User Management Views
 from rest_framework import generics, status, views
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import authenticate
 from django.db import transaction
 
+from .importer import ImportTooLarge
 from .models import User
 from .serializers import (
     UserSerializer, RegisterSerializer, LoginSerializer,
-    ChangePasswordSerializer, UserUpdateSerializer
+    ChangePasswordSerializer, UserUpdateSerializer, UserImportSerializer
 )
 from .permissions import IsAdmin, IsOwnerOrAdmin
+from .tokens import ProfileRefreshToken
 from .utils import success_response, error_response
 
 
@@ -36,7 +37,7 @@ class RegisterView(generics.CreateAPIView):
             user = serializer.save()
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = ProfileRefreshToken.for_user(user)
             
             return success_response(
                 data={
@@ -92,7 +93,7 @@ class LoginView(views.APIView):
                 )
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = ProfileRefreshToken.for_user(user)
             
             return success_response(
                 data={
@@ -129,7 +130,7 @@ class LogoutView(views.APIView):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
             
-            token = RefreshToken(refresh_token)
+            token = ProfileRefreshToken(refresh_token)
             token.blacklist()
             
             return success_response(
@@ -226,6 +227,7 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
+    cursor_ordering = ['-date_joined', '-id']
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -269,3 +271,50 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
             message='User deleted successfully',
             status_code=status.HTTP_204_NO_CONTENT
         )
+
+
+class UserImportView(views.APIView):
+    """
+    API endpoint to import users with student/teacher profiles from CSV (Admin only)
+    POST /api/auth/users/import/ - multipart upload with a "file" field
+    Files over USER_IMPORT_MAX_ROWS rows get 413; use the import_users command
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def post(self, request):
+        serializer = UserImportSerializer(data=request.data)
+        
+        try:
+            serializer.is_valid(raise_exception=True)
+            result = serializer.save()
+            
+            return success_response(
+                data=result,
+                message=f"User import processed: {result['created']} created, {result['failed']} failed"
+            )
+        except ImportTooLarge as e:
+            return error_response(
+                message=f"{e} Import larger files with: python manage.py import_users",
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        except Exception as e:
+            return error_response(
+                message='User import failed',
+                details=serializer.errors if hasattr(serializer, 'errors') else str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class UserCacheStatsView(views.APIView):
+    """
+    API endpoint for authentication user cache counters (Admin only)
+    GET /api/auth/user-cache/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        from .user_cache import user_cache
+        return success_response(
+            data=user_cache.stats(),
+            message='User cache statistics retrieved successfully'
+        )
@@ -2,7 +2,7 @@
 Django admin configuration for courses app
 """
 from django.contrib import admin
-from .models import Course, Enrollment
+from .models import Course, Enrollment, WaitlistEntry
 
 
 @admin.register(Course)
@@ -23,11 +23,11 @@ class CourseAdmin(admin.ModelAdmin):
             'fields': ('credits', 'semester', 'academic_year', 'schedule', 'room')
         }),
         ('Capacity & Status', {
-            'fields': ('max_students', 'status')
+            'fields': ('max_students', 'seats_taken', 'status')
         }),
     )
     
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['seats_taken', 'created_at', 'updated_at']
 
 
 @admin.register(Enrollment)
@@ -54,3 +54,19 @@ class EnrollmentAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['enrollment_date', 'updated_at', 'grade_points']
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """
+    Custom admin interface for WaitlistEntry model
+    """
+    list_display = ['student', 'course', 'created_at']
+    list_filter = ['course']
+    search_fields = [
+        'student__student_id', 'student__user__first_name', 'student__user__last_name',
+        'course__course_code', 'course__course_name'
+    ]
+    ordering = ['course', 'created_at']
+    
+    readonly_fields = ['created_at']
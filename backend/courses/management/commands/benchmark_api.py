@@ -0,0 +1,391 @@
+"""
+Benchmark every API endpoint against a generated dataset and enforce query budgets
+
+Usage:
+    python manage.py benchmark_api
+    python manage.py benchmark_api --students 5000 --enrollments 50000 --repeat 50
+    python manage.py benchmark_api --endpoint course-list --endpoint enrollment-list
+    python manage.py benchmark_api --json benchmark.json
+    python manage.py benchmark_api --allow-db
+
+Only runs against SQLite (DB_ENGINE=sqlite) unless --allow-db is given:
+the dataset is written to the configured database, and although it is
+rolled back, it holds locks and shows up to other connections' reads
+while the benchmark runs, so never point it at a shared database.
+
+A dataset is generated with generate_dataset inside a transaction that is
+rolled back afterwards, and every request additionally runs in its own
+savepoint, so writes are measured against the same state each time.
+Lists are fetched at the maximum page size, so an N+1 query pattern
+shows up as a budget overrun. The command fails when an endpoint exceeds
+its query budget, answers with an unexpected status, or when a URL of the
+accounts, students, teachers or courses apps has no benchmark case.
+"""
+import io
+import json
+import math
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import ProfileRefreshToken
+from courses.models import Course, Enrollment, WaitlistEntry
+from students.models import Student
+from teachers.models import Teacher
+
+BENCHMARKED_APPS = ['accounts', 'students', 'teachers', 'courses']
+PASSWORD = 'Password123!'
+LIST = {'page_size': 100}
+
+
+class Case:
+    """
+    One benchmarked request. budget, kwargs, data and query may be callables
+    taking the fixtures, evaluated before every run.
+    """
+    def __init__(self, label, url_name, budget, method='get', role='admin', status=200,
+                 kwargs=None, data=None, query=None, format='json'):
+        self.label = label
+        self.url_name = url_name
+        self.budget = budget
+        self.method = method
+        self.role = role
+        self.status = status
+        self.kwargs = kwargs
+        self.data = data
+        self.query = query
+        self.format = format
+
+    def resolve(self, value, fixtures):
+        return value(fixtures) if callable(value) else value
+
+    def url(self, fixtures):
+        return reverse(self.url_name, kwargs=self.resolve(self.kwargs, fixtures))
+
+
+def import_csv(fixtures):
+    rows = ['email,username,first_name,last_name,role,student_id,date_of_birth,gender,grade,'
+            'emergency_contact_name,emergency_contact_phone,emergency_contact_relation']
+    for i in range(20):
+        fixtures.counter += 1
+        n = fixtures.counter
+        rows.append(f"bench-import{n}@example.com,bench_import{n},Import,{n},STUDENT,BENCHI{n},"
+                    f"2010-01-01,F,8,Contact,000,Parent")
+    return {'file': SimpleUploadedFile('users.csv', '\n'.join(rows).encode(), content_type='text/csv')}
+
+
+def register_payload(fixtures):
+    fixtures.counter += 1
+    n = fixtures.counter
+    return {
+        'email': f"bench-register{n}@example.com", 'username': f"bench_register{n}",
+        'password': PASSWORD, 'password2': PASSWORD,
+        'first_name': 'Bench', 'last_name': 'Register', 'role': 'STUDENT',
+    }
+
+
+CASES = [
+    # Writes to users, students, teachers and courses include search.signals
+    # reading the dependent search documents, plus one upsert per document
+    # type whose text changed
+
+    # Authentication and users
+    Case('register', 'register', 8, 'post', role=None, status=201, data=register_payload),
+    Case('login', 'login', 2, 'post', role=None,
+         data=lambda f: {'email': f.student.user.email, 'password': PASSWORD}),
+    Case('logout', 'logout', 3, 'post', role='student',
+         data=lambda f: {'refresh_token': str(ProfileRefreshToken.for_user(f.student.user))}),
+    # With the default per-process cache the refresh token's JTI is also
+    # looked up in revoked_tokens; the user and profile are re-read for
+    # the new token's claims
+    Case('token refresh', 'token_refresh', 4, 'post', role=None,
+         data=lambda f: {'refresh': str(ProfileRefreshToken.for_user(f.student.user))}),
+    Case('profile', 'user-profile', 0, role='student'),
+    Case('profile update', 'user-profile', 5, 'patch', role='student', data={'phone_number': '012345678'}),
+    Case('change password', 'change-password', 5, 'post', role='student',
+         data={'old_password': PASSWORD, 'new_password': 'An0ther-Passw0rd', 'new_password2': 'An0ther-Passw0rd'}),
+    Case('user list', 'user-list', 2, query=LIST),
+    Case('user detail', 'user-detail', 1, kwargs=lambda f: {'pk': f.student.user_id}),
+    Case('user update', 'user-detail', 6, 'patch', kwargs=lambda f: {'pk': f.student.user_id},
+         data={'first_name': 'Renamed'}),
+    Case('user delete', 'user-detail', 8, 'delete', status=204, kwargs=lambda f: {'pk': f.spare_student_user.pk}),
+    Case('user import', 'user-import', 9, 'post', data=import_csv, format='multipart'),
+    Case('user cache stats', 'user-cache-stats', 0),
+
+    # Students
+    Case('student list', 'student-list-create', 2, query=LIST),
+    Case('student list (teacher)', 'student-list-create', 2, role='teacher', query=LIST),
+    Case('student list expanded', 'student-list-create', 2, query={**LIST, 'expand': 'user'}),
+    # One more query checks the full-text match found something before
+    # falling back to LIKE
+    Case('student search', 'student-list-create', 3, query={**LIST, 'search': 'an'}),
+    Case('student create', 'student-list-create', 10, 'post', status=201, data=lambda f: {
+        'user_id': f.spare_student_user.pk, 'student_id': 'BENCHNEW1', 'date_of_birth': '2010-05-01',
+        'gender': 'M', 'grade': '8', 'emergency_contact_name': 'Contact',
+        'emergency_contact_phone': '000', 'emergency_contact_relation': 'Parent',
+    }),
+    Case('student detail', 'student-detail', 1, kwargs=lambda f: {'pk': f.student.pk}),
+    Case('student update', 'student-detail', 3, 'patch', kwargs=lambda f: {'pk': f.student.pk},
+         data={'address': 'Street 1'}),
+    # Every cascaded enrollment releases its seat and GPA totals one by one
+    Case('student delete', 'student-detail', lambda f: 6 + 4 * f.student_enrollments, 'delete', status=204,
+         kwargs=lambda f: {'pk': f.student.pk}),
+    Case('student my profile', 'student-my-profile', 1, role='student'),
+    Case('student export', 'student-export', 1),
+
+    # Teachers
+    Case('teacher list', 'teacher-list-create', 2, query=LIST),
+    Case('teacher create', 'teacher-list-create', 10, 'post', status=201, data=lambda f: {
+        'user_id': f.spare_teacher_user.pk, 'teacher_id': 'BENCHNEWT1', 'department': 'MATH',
+        'specialization': 'Algebra', 'qualification': 'M.Sc.',
+    }),
+    Case('teacher detail', 'teacher-detail', 1, kwargs=lambda f: {'pk': f.teacher.pk}),
+    Case('teacher update', 'teacher-detail', 4, 'patch', kwargs=lambda f: {'pk': f.teacher.pk},
+         data={'office_room': 'B-101'}),
+    Case('teacher delete', 'teacher-detail', 7, 'delete', status=204, kwargs=lambda f: {'pk': f.teacher.pk}),
+    Case('teacher my profile', 'teacher-my-profile', 1, role='teacher'),
+    Case('teacher export', 'teacher-export', 1),
+
+    # Courses
+    Case('course list', 'course-list-create', 2, query=LIST),
+    Case('course list (student)', 'course-list-create', 2, role='student', query=LIST),
+    Case('course list expanded', 'course-list-create', 2, query={**LIST, 'expand': 'teacher'}),
+    Case('course list open seats', 'course-list-create', 2, query={**LIST, 'open_seats': 'true'}),
+    Case('course create', 'course-list-create', 12, 'post', status=201, data=lambda f: {
+        'course_code': 'BENCHNEW', 'course_name': 'New course', 'teacher_id': f.teacher.pk,
+        'semester': '1', 'academic_year': '2030-2031', 'schedule': 'Mon 08:00-09:30', 'room': 'A-1',
+    }),
+    Case('course detail', 'course-detail', 1, kwargs=lambda f: {'pk': f.open_course.pk}),
+    Case('course update', 'course-detail', 6, 'patch', kwargs=lambda f: {'pk': f.open_course.pk},
+         data={'room': 'B-202'}),
+    Case('course delete', 'course-detail', 7, 'delete', status=204, kwargs=lambda f: {'pk': f.full_course.pk}),
+    Case('course gradebook', 'course-gradebook', 7, 'post', kwargs=lambda f: {'pk': f.open_course.pk},
+         data=lambda f: {'grades': [{'student_id': pk, 'grade': 'B+'} for pk in f.graded_students]}),
+    Case('course export', 'course-export', 1),
+
+    # Enrollments
+    Case('enrollment list', 'enrollment-list-create', 2, query=LIST),
+    Case('enrollment list (student)', 'enrollment-list-create', 2, role='student', query=LIST),
+    Case('enrollment list expanded', 'enrollment-list-create', 2,
+         query={**LIST, 'expand': 'student,course'}),
+    Case('enrollment create', 'enrollment-list-create', 10, 'post', status=201,
+         data=lambda f: {'student_id': f.unenrolled_student.pk, 'course_id': f.open_course.pk}),
+    Case('enrollment bulk create', 'enrollment-bulk-create', 7, 'post', data=lambda f: {
+        'enrollments': [{'student_id': pk, 'course_id': f.open_course.pk} for pk in f.bulk_students],
+    }),
+    Case('enrollment detail', 'enrollment-detail', 1, kwargs=lambda f: {'pk': f.enrollment.pk}),
+    Case('enrollment grade', 'enrollment-detail', 9, 'patch', kwargs=lambda f: {'pk': f.enrollment.pk},
+         data={'grade': 'A-'}),
+    Case('enrollment delete', 'enrollment-detail', 6, 'delete', status=204,
+         kwargs=lambda f: {'pk': f.enrollment.pk}),
+    Case('enrollment export', 'enrollment-export', 1),
+
+    # Waitlist
+    Case('waitlist list', 'waitlist-list-create', 2, query=LIST),
+    Case('waitlist list (student)', 'waitlist-list-create', 1, role='student', query=LIST),
+    Case('waitlist join', 'waitlist-list-create', 8, 'post', status=201,
+         data=lambda f: {'student_id': f.unenrolled_student.pk, 'course_id': f.full_course.pk}),
+    Case('waitlist detail', 'waitlist-detail', 1, kwargs=lambda f: {'pk': f.waitlist_entry.pk}),
+    Case('waitlist leave', 'waitlist-detail', 2, 'delete', status=204, kwargs=lambda f: {'pk': f.waitlist_entry.pk}),
+]
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[max(0, math.ceil(q / 100 * len(samples)) - 1)]
+
+
+class Fixtures:
+    """Users, courses and rows the cases point at, picked from the generated dataset"""
+    def __init__(self):
+        self.counter = 0
+        self.admin = User.objects.filter(username__startswith='bench_admin').order_by('id').first()
+        self.teacher = Teacher.objects.select_related('user').filter(teacher_id__startswith='BENCHT').order_by('id').first()
+
+        self.open_course = Course.objects.filter(course_code__startswith='BENCH', status='ACTIVE').order_by('id').first()
+        Course.objects.filter(pk=self.open_course.pk).update(max_students=self.open_course.seats_taken + 500)
+        enrolled = Enrollment.objects.filter(course=self.open_course, status='ENROLLED').order_by('id')
+        self.enrollment = enrolled.first()
+        self.student = Student.objects.select_related('user').get(pk=self.enrollment.student_id)
+        self.graded_students = list(enrolled.values_list('student_id', flat=True)[:50])
+        self.student_enrollments = Enrollment.objects.filter(student=self.student).count()
+
+        unenrolled = Student.objects.filter(student_id__startswith='BENCHS').exclude(
+            enrollments__course=self.open_course
+        ).order_by('id').values_list('id', flat=True)
+        others = list(unenrolled[:53])
+        self.unenrolled_student = Student.objects.get(pk=others[0])
+        self.bulk_students = others[3:53]
+
+        self.full_course = Course.objects.create(
+            course_code='BENCHFULL', course_name='Full course', semester='1', academic_year='2030-2031',
+            schedule='-', room='-', max_students=1, teacher=self.teacher,
+        )
+        Enrollment.objects.create(student_id=others[1], course=self.full_course)
+        self.waitlist_entry = WaitlistEntry.objects.create(student_id=others[2], course=self.full_course)
+
+        self.spare_student_user = User.objects.create_user(
+            email='bench-spare-student@example.com', username='bench_spare_student',
+            password=None, first_name='Spare', last_name='Student', role='STUDENT',
+        )
+        self.spare_teacher_user = User.objects.create_user(
+            email='bench-spare-teacher@example.com', username='bench_spare_teacher',
+            password=None, first_name='Spare', last_name='Teacher', role='TEACHER',
+        )
+
+    def client(self, role):
+        host = next((host for host in settings.ALLOWED_HOSTS if host and '*' not in host), 'localhost')
+        client = APIClient(SERVER_NAME=host)
+        user = {'admin': self.admin, 'teacher': self.teacher.user, 'student': self.student.user}.get(role)
+        if user is not None:
+            token = ProfileRefreshToken.for_user(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and query counts of every API endpoint and enforce query budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000, help='Students in the generated dataset')
+        parser.add_argument('--enrollments', type=int, default=20000, help='Enrollments in the generated dataset')
+        parser.add_argument('--seed', type=int, default=0, help='Dataset seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Measured runs per endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured runs per endpoint')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            help='Only run cases for this URL name (repeatable)',
+        )
+        parser.add_argument('--json', help='Also write the results to this file')
+        parser.add_argument(
+            '--allow-db',
+            action='store_true',
+            help='Run against the configured database even if it is not SQLite',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['allow_db']:
+            raise CommandError(
+                f"Refusing to benchmark against the {connection.vendor} database "
+                f"'{connection.settings_dict['NAME']}'. Run with DB_ENGINE=sqlite, or pass --allow-db "
+                "if this database holds nothing anyone else uses."
+            )
+
+        cases = CASES
+        if options['endpoint']:
+            cases = [case for case in CASES if case.url_name in options['endpoint']]
+            if not cases:
+                raise CommandError('No benchmark cases match --endpoint.')
+        else:
+            missing = self.uncovered_url_names()
+            if missing:
+                raise CommandError(f"URLs without a benchmark case: {', '.join(sorted(missing))}")
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            call_command(
+                'generate_dataset', students=options['students'], enrollments=options['enrollments'],
+                seed=options['seed'], prefix='bench', flush=True, stdout=io.StringIO(),
+            )
+            fixtures = Fixtures()
+            self.stdout.write(
+                f"Generated {options['students']} students and {options['enrollments']} enrollments "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+            results = [self.measure(case, fixtures, options['warmup'], options['repeat']) for case in cases]
+            transaction.set_rollback(True)
+
+        self.report(results)
+        if options['json']:
+            with open(options['json'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+        failures = [result for result in results if result['failures']]
+        if failures:
+            raise CommandError(
+                f"{len(failures)} endpoint(s) failed: " +
+                '; '.join(f"{result['case']}: {', '.join(result['failures'])}" for result in failures)
+            )
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} endpoints within their query budgets"))
+
+    def uncovered_url_names(self):
+        names = set()
+        for app in BENCHMARKED_APPS:
+            names.update(pattern.name for pattern in import_module(f"{app}.urls").urlpatterns if pattern.name)
+        return names - {case.url_name for case in CASES}
+
+    def request(self, case, fixtures):
+        """Issue the request in a savepoint that is rolled back; returns (seconds, status, queries)"""
+        client = fixtures.client(case.role)
+        url = case.url(fixtures)
+        data = case.resolve(case.data, fixtures)
+        query = case.resolve(case.query, fixtures)
+        if query:
+            url = f"{url}?{'&'.join(f'{key}={value}' for key, value in query.items())}"
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = getattr(client, case.method)(url, data, format=case.format)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, response.status_code, len(queries)
+
+    def measure(self, case, fixtures, warmup, repeat):
+        for _ in range(warmup):
+            self.request(case, fixtures)
+
+        timings, counts, statuses = [], [], set()
+        for _ in range(repeat):
+            elapsed, status_code, count = self.request(case, fixtures)
+            timings.append(elapsed * 1000)
+            counts.append(count)
+            statuses.add(status_code)
+        timings.sort()
+
+        budget = case.resolve(case.budget, fixtures)
+        failures = []
+        if statuses != {case.status}:
+            failures.append(f"status {sorted(statuses)} != {case.status}")
+        if max(counts) > budget:
+            failures.append(f"{max(counts)} queries > budget {budget}")
+        return {
+            'case': case.label,
+            'url_name': case.url_name,
+            'method': case.method.upper(),
+            'status': sorted(statuses),
+            'queries': max(counts),
+            'budget': budget,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'max_ms': round(timings[-1], 2),
+            'failures': failures,
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<30} {'method':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'budget':>7}"
+        )
+        for result in results:
+            line = (
+                f"{result['case']:<30} {result['method']:<7} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['queries']:>8} {result['budget']:>7}"
+            )
+            if result['failures']:
+                line = self.style.ERROR(f"{line}  {'; '.join(result['failures'])}")
+            self.stdout.write(line)
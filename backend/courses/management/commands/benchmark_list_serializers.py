@@ -0,0 +1,147 @@
+"""
+Compare the model serializers with the values()-based row serializers
+used by the student and enrollment lists
+
+Usage:
+    python manage.py benchmark_list_serializers
+    python manage.py benchmark_list_serializers --rows 50000 --repeat 5
+
+Without --use-existing, --rows students and enrollments are inserted in a
+transaction that is rolled back afterwards. The rendered JSON of both
+paths is compared byte for byte and the command fails on any difference.
+"""
+import datetime
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from courses.serializers import EnrollmentRowSerializer, EnrollmentSerializer
+from students.models import Student
+from students.serializers import StudentRowSerializer, StudentSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rows/sec of the model vs values() read serializers and check output parity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of rows to serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best run is reported')
+        parser.add_argument(
+            '--use-existing',
+            action='store_true',
+            help='Benchmark the rows already in the database instead of generated ones',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            if not options['use_existing']:
+                self.create_rows(rows)
+
+            students = Student.objects.order_by('-enrollment_date', '-id')[:rows]
+            enrollments = Enrollment.objects.order_by('-enrollment_date', '-id')[:rows]
+
+            self.compare(
+                'students',
+                lambda: StudentSerializer(
+                    students.select_related('user'), many=True, expand=()
+                ).data,
+                lambda: StudentRowSerializer().serialize(StudentRowSerializer().prepare(students)),
+                options['repeat']
+            )
+            self.compare(
+                'enrollments',
+                lambda: EnrollmentSerializer(
+                    enrollments.select_related('student__user', 'course'), many=True, expand=()
+                ).data,
+                lambda: EnrollmentRowSerializer().serialize(EnrollmentRowSerializer().prepare(enrollments)),
+                options['repeat']
+            )
+
+            transaction.set_rollback(True)
+
+    def create_rows(self, count):
+        """Insert count students, each enrolled in one of ten courses"""
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(
+                email=f"bench-{tag}-{i}@example.com",
+                username=f"bench-{tag}-{i}",
+                first_name='Bench',
+                last_name=str(i),
+                role='STUDENT',
+                password=password,
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__startswith=f"bench-{tag}-").order_by('id'))
+
+        students = Student.objects.bulk_create([
+            Student(
+                user=user,
+                student_id=f"B{tag}{i}"[:20],
+                date_of_birth=datetime.date(2005 + i % 10, 1 + i % 12, 1 + i % 28),
+                gender='MF'[i % 2],
+                grade=str(1 + i % 12),
+                emergency_contact_name='Contact',
+                emergency_contact_phone='000',
+                emergency_contact_relation='Parent',
+            )
+            for i, user in enumerate(users)
+        ], batch_size=1000)
+        if students[0].pk is None:
+            students = list(Student.objects.filter(student_id__startswith=f"B{tag}").order_by('id'))
+
+        courses = [
+            Course.objects.create(
+                course_code=f"BENCH-{tag}-{i}",
+                course_name=f"Benchmark course {i}",
+                semester='1',
+                academic_year='0000-0000',
+                schedule='-',
+                room='-',
+                max_students=count,
+            )
+            for i in range(10)
+        ]
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=courses[i % len(courses)], grade='B', grade_points='3.00')
+            for i, student in enumerate(students)
+        ], batch_size=1000)
+
+    def compare(self, label, model_path, row_path, repeat):
+        renderer = JSONRenderer()
+        model_time, model_bytes, count = self.run(model_path, renderer, repeat)
+        row_time, row_bytes, _ = self.run(row_path, renderer, repeat)
+
+        if model_bytes != row_bytes:
+            raise CommandError(f"{label}: row serializer output differs from the model serializer")
+
+        self.stdout.write(
+            f"{label}: {count} rows, model serializer {self.rate(count, model_time)} rows/s, "
+            f"values() rows {self.rate(count, row_time)} rows/s "
+            f"({model_time / row_time:.1f}x), {len(row_bytes)} bytes identical"
+        )
+
+    def run(self, build, renderer, repeat):
+        """Best wall time over repeat runs of query + serialize + render"""
+        best, output, count = None, None, 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = build()
+            output = renderer.render(data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            count = len(data)
+        return best, output, count
+
+    def rate(self, count, seconds):
+        return f"{count / seconds:,.0f}" if seconds else 'n/a'
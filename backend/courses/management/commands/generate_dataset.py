@@ -0,0 +1,352 @@
+"""
+Generate a large, deterministic synthetic dataset for load and scale testing
+
+Usage:
+    python manage.py generate_dataset
+    python manage.py generate_dataset --students 100000 --enrollments 1000000
+    python manage.py generate_dataset --seed 7 --years 4 --courses-per-term 60
+    python manage.py generate_dataset --flush
+
+Every generated user, profile and course is tagged with --prefix so a
+dataset can be removed again with --flush. The same seed and options
+always produce the same rows (timestamps excepted). All generated users
+share one password (--password), hashed once.
+"""
+import datetime
+import random
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from courses.models import Course, Enrollment, WaitlistEntry
+from search.index import update_documents
+from stats.summary import invalidate_summary
+from students.models import Student, compute_gpa, quantize_points
+from teachers.models import Teacher
+
+FIRST_NAMES = [
+    'Alex', 'Bora', 'Chantha', 'Dara', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas',
+    'Kanha', 'Lina', 'Mateo', 'Nita', 'Omar', 'Priya', 'Quinn', 'Rith', 'Sophea', 'Tariq',
+    'Uma', 'Vanna', 'Wei', 'Ximena', 'Yuki', 'Zara',
+]
+LAST_NAMES = [
+    'Chan', 'Dubois', 'Ek', 'Garcia', 'Heng', 'Ito', 'Keo', 'Kim', 'Lim', 'Martin',
+    'Nguyen', 'Okafor', 'Phan', 'Rossi', 'Sok', 'Silva', 'Tan', 'Vong', 'Weber', 'Yang',
+]
+RELATIONS = ['Mother', 'Father', 'Guardian', 'Grandparent', 'Sibling']
+QUALIFICATIONS = ['B.Ed.', 'B.Sc.', 'M.A.', 'M.Sc.', 'M.Ed.', 'Ph.D.']
+DAYS = ['Mon/Wed/Fri', 'Tue/Thu', 'Mon/Wed', 'Wed/Fri']
+HOURS = ['08:00-09:30', '09:30-11:00', '11:00-12:30', '13:00-14:30', '14:30-16:00']
+
+# Relative frequency of each letter grade for a student of average ability
+GRADE_WEIGHTS = [
+    ('A+', 3), ('A', 9), ('A-', 10), ('B+', 12), ('B', 14), ('B-', 12), ('C+', 10),
+    ('C', 9), ('C-', 6), ('D+', 4), ('D', 3), ('F', 5), ('I', 2), ('W', 1),
+]
+DROP_RATE = 0.04
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load a seeded synthetic dataset of users, students, teachers, courses and enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; equal seeds give equal data')
+        parser.add_argument('--students', type=int, default=1000, help='Number of students')
+        parser.add_argument('--teachers-per-department', type=int, default=3, help='Teachers in each department')
+        parser.add_argument('--admins', type=int, default=2, help='Number of administrators')
+        parser.add_argument('--years', type=int, default=2, help='Number of academic years')
+        parser.add_argument('--first-year', type=int, default=2023, help='Start of the first academic year')
+        parser.add_argument('--courses-per-term', type=int, default=20, help='Courses in each semester')
+        parser.add_argument('--enrollments', type=int, default=10000, help='Total number of enrollments')
+        parser.add_argument('--password', default='Password123!', help='Password of every generated user')
+        parser.add_argument('--prefix', default='gen', help='Tag for generated usernames, emails and codes')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Students inserted per batch')
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Delete the data previously generated with --prefix first',
+        )
+
+    def handle(self, *args, **options):
+        self.prefix = options['prefix'].lower()
+        self.code = options['prefix'].upper()
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.domain = 'example.com'
+
+        terms = options['years'] * len(Course.SEMESTER_CHOICES)
+        course_count = terms * options['courses_per_term']
+        if options['students'] < 1 or course_count < 1:
+            raise CommandError('Need at least one student and one course.')
+        if options['enrollments'] > options['students'] * course_count:
+            raise CommandError(
+                f"{options['enrollments']} enrollments do not fit {options['students']} students "
+                f"x {course_count} courses."
+            )
+        if len(f"{self.code}S{options['students']:07d}") > 20:
+            raise CommandError('--prefix is too long for the 20 character student IDs.')
+
+        if options['flush']:
+            self.flush()
+        elif User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Data with prefix '{self.prefix}' exists already. Use --flush to replace it.")
+
+        started = time.perf_counter()
+        self.password = make_password(options['password'])
+
+        with transaction.atomic():
+            self.create_admins(options['admins'])
+            teachers = self.create_teachers(options['teachers_per_department'])
+            courses = self.create_courses(
+                teachers, options['first_year'], options['years'], options['courses_per_term']
+            )
+            seats = self.create_students(
+                options['students'], options['enrollments'], courses,
+                datetime.date(options['first_year'] + options['years'] - 1, 9, 1)
+            )
+            self.update_seats(courses, seats)
+            self.index_documents()
+            invalidate_summary()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {options['admins']} admins, {len(teachers)} teachers, {len(courses)} courses, "
+            f"{options['students']} students and {options['enrollments']} enrollments "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def flush(self):
+        started = time.perf_counter()
+        generated_course = Q(course__course_code__startswith=self.code)
+        generated_student = Q(student__user__username__startswith=f"{self.prefix}_")
+        with transaction.atomic():
+            # Enrollments of a generated student in a generated course only feed
+            # seat counts and GPA totals of rows deleted right after, so they skip
+            # the per-row bookkeeping of the Enrollment delete signals. Any other
+            # enrollment touching generated data (a real student in a generated
+            # course, or the reverse) goes through delete() to keep the surviving
+            # side's seats and GPA correct.
+            Enrollment.objects.filter(generated_course & generated_student)._raw_delete(Enrollment.objects.db)
+            Enrollment.objects.filter(generated_course | generated_student).delete()
+            WaitlistEntry.objects.filter(generated_course | generated_student).delete()
+            Course.objects.filter(course_code__startswith=self.code).delete()
+            deleted, _ = User.objects.filter(username__startswith=f"{self.prefix}_").delete()
+        self.log(f"Flushed previous '{self.prefix}' data ({deleted} rows)", started)
+
+    def index_documents(self):
+        """bulk_create skips the search signals; write the generated rows' documents"""
+        started = time.perf_counter()
+        generated_user = Q(user__username__startswith=f"{self.prefix}_")
+        written = (
+            update_documents(Teacher.objects.filter(generated_user)) +
+            update_documents(Course.objects.filter(course_code__startswith=self.code)) +
+            update_documents(Student.objects.filter(generated_user))
+        )
+        self.log(f"Indexed {written} search documents", started)
+
+    def log(self, message, started):
+        self.stdout.write(f"  {message} in {time.perf_counter() - started:.1f}s")
+
+    def name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def build_user(self, role, number):
+        first_name, last_name = self.name()
+        username = f"{self.prefix}_{role.lower()}{number}"
+        return User(
+            email=f"{username}@{self.domain}",
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            phone_number=f"0{self.rng.randrange(10 ** 8, 10 ** 9)}",
+            role=role,
+            password=self.password,
+            is_staff=role == 'ADMIN',
+        )
+
+    def insert_users(self, users):
+        return self.insert_with_pks(User, users, 'username')
+
+    def insert_with_pks(self, model, objects, key):
+        """
+        bulk_create model rows and set their ids, looked up by a unique key
+        on backends without RETURNING (MySQL)
+        """
+        objects = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        if objects and objects[0].pk is None:
+            ids = dict(
+                model.objects.filter(**{f"{key}__in": [getattr(obj, key) for obj in objects]})
+                .values_list(key, 'id')
+            )
+            for obj in objects:
+                obj.pk = ids[getattr(obj, key)]
+        return objects
+
+    def create_admins(self, count):
+        started = time.perf_counter()
+        self.insert_users([self.build_user('ADMIN', i) for i in range(1, count + 1)])
+        self.log(f"Created {count} admins", started)
+
+    def create_teachers(self, per_department):
+        started = time.perf_counter()
+        departments = [code for code, _ in Teacher.DEPARTMENT_CHOICES]
+        users = self.insert_users([
+            self.build_user('TEACHER', i) for i in range(1, len(departments) * per_department + 1)
+        ])
+        teachers = self.insert_with_pks(Teacher, [
+            Teacher(
+                user_id=user.pk,
+                teacher_id=f"{self.code}T{i:05d}",
+                department=departments[(i - 1) % len(departments)],
+                specialization=dict(Teacher.DEPARTMENT_CHOICES)[departments[(i - 1) % len(departments)]],
+                qualification=self.rng.choice(QUALIFICATIONS),
+                experience_years=self.rng.randint(0, 35),
+                office_room=f"{self.rng.choice('ABCDE')}-{self.rng.randint(100, 399)}",
+            )
+            for i, user in enumerate(users, start=1)
+        ], 'teacher_id')
+        self.log(f"Created {len(teachers)} teachers", started)
+        return teachers
+
+    def create_courses(self, teachers, first_year, years, per_term):
+        started = time.perf_counter()
+        by_department = {}
+        for teacher in teachers:
+            by_department.setdefault(teacher.department, []).append(teacher)
+        departments = sorted(by_department)
+
+        courses = []
+        for year in range(first_year, first_year + years):
+            academic_year = f"{year}-{year + 1}"
+            last_year = year == first_year + years - 1
+            for semester, _ in Course.SEMESTER_CHOICES:
+                for n in range(per_term):
+                    department = departments[n % len(departments)]
+                    level = 100 * (1 + n // len(departments) % 4)
+                    courses.append(Course(
+                        course_code=f"{self.code}{department[:4]}{level + n}-{year % 100}{semester}",
+                        course_name=f"{dict(Teacher.DEPARTMENT_CHOICES)[department]} {level + n}",
+                        description=f"Generated {department.lower()} course for {academic_year}.",
+                        teacher=self.rng.choice(by_department[department]) if teachers else None,
+                        credits=self.rng.choice([2, 3, 3, 3, 4, 4, 5]),
+                        semester=semester,
+                        academic_year=academic_year,
+                        schedule=f"{self.rng.choice(DAYS)} {self.rng.choice(HOURS)}",
+                        room=f"{self.rng.choice('ABCDE')}-{self.rng.randint(100, 399)}",
+                        max_students=self.rng.choice([20, 25, 30, 35, 40]),
+                        status='ACTIVE' if last_year else 'COMPLETED',
+                    ))
+        courses = self.insert_with_pks(Course, courses, 'course_code')
+        self.log(f"Created {len(courses)} courses", started)
+        return courses
+
+    def plan_enrollments(self, ability, count, courses, weights):
+        """
+        Pick count distinct courses for one student and a status and grade for each.
+        Popular courses are drawn more often; grades shift with the student's ability.
+        """
+        picked = set()
+        while len(picked) < count:
+            picked.update(self.rng.choices(range(len(courses)), cum_weights=weights, k=count - len(picked)))
+
+        plan = []
+        for index in sorted(picked):
+            course = courses[index]
+            if self.rng.random() < DROP_RATE:
+                plan.append((course, 'DROPPED', 'W' if course.status == 'COMPLETED' else None))
+            elif course.status == 'COMPLETED':
+                letter = self.rng.choices(self.grade_letters, weights=self.grade_weights[ability])[0]
+                plan.append((course, 'COMPLETED', letter))
+            else:
+                plan.append((course, 'ENROLLED', None))
+        return plan
+
+    def create_students(self, count, enrollments, courses, term_start):
+        """Insert students batch by batch with their enrollments and matching GPA totals"""
+        started = time.perf_counter()
+        self.grade_letters = [letter for letter, _ in GRADE_WEIGHTS]
+        # Ability -2..2 moves probability mass towards better (or worse) letters
+        self.grade_weights = {
+            ability: [
+                weight * (1.25 ** (ability * (len(GRADE_WEIGHTS) / 2 - i) / 3))
+                for i, (_, weight) in enumerate(GRADE_WEIGHTS)
+            ]
+            for ability in range(-2, 3)
+        }
+        cum_weights, total = [], 0.0
+        for _ in courses:
+            total += 1 / (1 + self.rng.random() * 4) ** 1.5
+            cum_weights.append(total)
+
+        per_student = [enrollments // count + (1 if i < enrollments % count else 0) for i in range(count)]
+        self.rng.shuffle(per_student)
+
+        seats = Counter()
+        enrolled = 0
+        for start in range(0, count, self.batch_size):
+            numbers = range(start + 1, min(start + self.batch_size, count) + 1)
+            users = self.insert_users([self.build_user('STUDENT', number) for number in numbers])
+
+            students, plans = [], []
+            for number, user in zip(numbers, users):
+                grade = self.rng.randint(1, 12)
+                ability = self.rng.randint(-2, 2)
+                plan = self.plan_enrollments(ability, per_student[number - 1], courses, cum_weights)
+
+                quality_points, credits = Decimal('0.00'), 0
+                for course, status, letter in plan:
+                    grade_points = Enrollment.GRADE_POINTS.get(letter) if letter else None
+                    if Enrollment.counts_toward_gpa(status, grade_points):
+                        quality_points += grade_points * course.credits
+                        credits += course.credits
+                    if status == 'ENROLLED':
+                        seats[course.pk] += 1
+
+                students.append(Student(
+                    user_id=user.pk,
+                    student_id=f"{self.code}S{number:07d}",
+                    date_of_birth=term_start.replace(year=term_start.year - grade - 6) - datetime.timedelta(
+                        days=self.rng.randrange(365)
+                    ),
+                    gender=self.rng.choices('MFO', weights=[48, 48, 4])[0],
+                    grade=str(grade),
+                    address=f"{self.rng.randint(1, 999)} Street {self.rng.randint(1, 400)}",
+                    emergency_contact_name=' '.join(self.name()),
+                    emergency_contact_phone=f"0{self.rng.randrange(10 ** 8, 10 ** 9)}",
+                    emergency_contact_relation=self.rng.choice(RELATIONS),
+                    quality_points=quantize_points(quality_points),
+                    attempted_credits=credits,
+                    gpa=compute_gpa(quality_points, credits),
+                ))
+                plans.append(plan)
+
+            students = self.insert_with_pks(Student, students, 'student_id')
+            rows = [
+                Enrollment(
+                    student_id=student.pk,
+                    course_id=course.pk,
+                    status=status,
+                    grade=letter,
+                    grade_points=Enrollment.GRADE_POINTS.get(letter) if letter else None,
+                )
+                for student, plan in zip(students, plans)
+                for course, status, letter in plan
+            ]
+            Enrollment.objects.bulk_create(rows, batch_size=self.batch_size * 5)
+            enrolled += len(rows)
+            self.stdout.write(f"  {numbers[-1]}/{count} students, {enrolled} enrollments")
+
+        self.log(f"Created {count} students and {enrolled} enrollments", started)
+        return seats
+
+    def update_seats(self, courses, seats):
+        """Set seats_taken from the generated enrollments, raising capacity where needed"""
+        for course in courses:
+            course.seats_taken = seats[course.pk]
+            course.max_students = max(course.max_students, course.seats_taken)
+        Course.objects.bulk_update(courses, ['seats_taken', 'max_students'], batch_size=self.batch_size)
@@ -0,0 +1,58 @@
+"""
+Rebuild Course.seats_taken from the enrollments table and report drift
+
+Usage:
+    python manage.py reconcile_seat_counts
+    python manage.py reconcile_seat_counts --dry-run
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Recount ENROLLED enrollments per course and fix drifted seat counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing any changes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of courses written per bulk update',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+
+        drifted = []
+        checked = 0
+        courses = (
+            Course.objects.with_enrollment_counts()
+            .only('id', 'course_code', 'seats_taken')
+            .order_by('id')
+        )
+        for course in courses.iterator(chunk_size=batch_size):
+            checked += 1
+            actual = course.annotated_enrolled_count
+            if course.seats_taken != actual:
+                self.stdout.write(
+                    f"  [DRIFT] {course.course_code}: counter={course.seats_taken} actual={actual}"
+                )
+                course.seats_taken = actual
+                drifted.append(course)
+
+        if drifted and not dry_run:
+            with transaction.atomic():
+                Course.objects.bulk_update(drifted, ['seats_taken'], batch_size=batch_size)
+
+        summary = f"Checked {checked} courses, {len(drifted)} with drift"
+        if drifted:
+            summary += ' (not fixed, dry run)' if dry_run else ' (fixed)'
+        self.stdout.write(self.style.SUCCESS(summary))
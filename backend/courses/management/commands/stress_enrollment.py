@@ -0,0 +1,96 @@
+"""
+Fire concurrent enrollments at a single course and verify capacity is never exceeded
+
+Usage:
+    python manage.py stress_enrollment --capacity 25 --workers 16
+    python manage.py stress_enrollment --course-id 3 --attempts 500
+
+Without --course-id a temporary course is created and removed afterwards.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, OperationalError, close_old_connections, connection
+
+from courses.models import Course, CourseFullError, Enrollment
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'Stress-test concurrent enrollment and check the course capacity invariant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course-id', type=int, help='Existing course to enroll into')
+        parser.add_argument('--capacity', type=int, default=25, help='max_students for the temporary course')
+        parser.add_argument('--attempts', type=int, default=200, help='Number of enrollment attempts')
+        parser.add_argument('--workers', type=int, default=16, help='Thread pool size')
+
+    def handle(self, *args, **options):
+        student_ids = list(
+            Student.objects.order_by('id').values_list('id', flat=True)[:options['attempts']]
+        )
+        if not student_ids:
+            raise CommandError('No students found. Create some students first.')
+
+        temporary = options['course_id'] is None
+        if temporary:
+            course = Course.objects.create(
+                course_code=f"STRESS-{int(time.time())}",
+                course_name='Enrollment stress test',
+                semester='1',
+                academic_year='0000-0000',
+                schedule='-',
+                room='-',
+                max_students=options['capacity'],
+            )
+        else:
+            try:
+                course = Course.objects.get(pk=options['course_id'])
+            except Course.DoesNotExist:
+                raise CommandError('Course does not exist.')
+
+        # Spread the attempts over the available students; repeats exercise the duplicate path
+        attempts = [student_ids[i % len(student_ids)] for i in range(options['attempts'])]
+
+        self.stdout.write(
+            f"Enrolling into {course.course_code} (capacity {course.max_students}): "
+            f"{len(attempts)} attempts, {options['workers']} workers"
+        )
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            outcomes = list(pool.map(lambda sid: self._enroll(sid, course.pk), attempts))
+        elapsed = time.perf_counter() - started
+
+        course.refresh_from_db()
+        enrolled = Enrollment.objects.filter(course=course, status='ENROLLED').count()
+        tally = {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+
+        self.stdout.write(f"  Outcomes: {tally}")
+        self.stdout.write(f"  Throughput: {len(attempts) / elapsed:.0f} attempts/s ({elapsed:.2f}s)")
+        self.stdout.write(f"  seats_taken={course.seats_taken} enrolled={enrolled} max_students={course.max_students}")
+
+        invariant_held = enrolled == course.seats_taken and enrolled <= course.max_students
+
+        if temporary:
+            course.delete()
+
+        if not invariant_held:
+            raise CommandError('Capacity invariant violated')
+        self.stdout.write(self.style.SUCCESS('Capacity invariant held'))
+
+    def _enroll(self, student_id, course_id):
+        """Run one enrollment attempt on its own connection"""
+        close_old_connections()
+        try:
+            Enrollment.objects.create(student_id=student_id, course_id=course_id)
+            return 'enrolled'
+        except CourseFullError:
+            return 'full'
+        except IntegrityError:
+            return 'duplicate'
+        except OperationalError:
+            return 'db_error'
+        finally:
+            connection.close()
@@ -0,0 +1,34 @@
+"""
+Enrollment metrics exposed on /metrics
+"""
+from sms_backend.metrics import Counter
+
+ENROLLMENTS = Counter(
+    'sms_enrollments', 'Enrollment attempts by result (created, full, inactive, duplicate, invalid)', ['result']
+)
+
+# Validation messages that identify a rejection reason
+REJECTION_MESSAGES = {
+    'Course is full.': 'full',
+    'Course is not active.': 'inactive',
+    'Student is already enrolled in this course.': 'duplicate',
+}
+
+
+def rejection_reason(errors):
+    """Classify serializer-style errors as full, inactive, duplicate or invalid"""
+    pending = [errors]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+        elif str(value) in REJECTION_MESSAGES:
+            return REJECTION_MESSAGES[str(value)]
+    return 'invalid'
+
+
+def record_enrollment(errors=None, result=None):
+    """Count one enrollment attempt; pass the errors of a rejected one"""
+    ENROLLMENTS.inc(result=result or ('created' if errors is None else rejection_reason(errors)))
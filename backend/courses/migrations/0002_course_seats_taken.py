@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:45
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_seats_taken(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    courses = Course.objects.annotate(
+        enrolled=Count('enrollments', filter=Q(enrollments__status='ENROLLED'))
+    ).filter(enrolled__gt=0)
+    for course in courses.iterator():
+        Course.objects.filter(pk=course.pk).update(seats_taken=course.enrolled)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of ENROLLED students, maintained by Enrollment'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'seats_taken', 'max_students'], name='courses_status_92fc7f_idx'),
+        ),
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('courses', '0002_course_seats_taken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='courses.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Waitlist Entry',
+                'verbose_name_plural': 'Waitlist Entries',
+                'db_table': 'waitlist_entries',
+                'ordering': ['course', 'created_at', 'id'],
+                'indexes': [models.Index(fields=['course', 'created_at', 'id'], name='waitlist_en_course__74573e_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+    ]
@@ -1,11 +1,42 @@
 """
 Course and Enrollment Models
 """
-from django.db import models
+import logging
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from teachers.models import Teacher
 from students.models import Student
 
+logger = logging.getLogger(__name__)
+
+
+class CourseFullError(ValidationError):
+    """
+    Raised when an enrollment would take a seat in a course at capacity
+    """
+    def __init__(self):
+        super().__init__({'course_id': ['Course is full.']})
+
+
+class CourseQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for Course listings
+    """
+    def with_enrollment_counts(self):
+        """Annotate each course with its number of enrolled students"""
+        return self.annotate(
+            annotated_enrolled_count=Count('enrollments', filter=Q(enrollments__status='ENROLLED'))
+        )
+    
+    def with_open_seats(self):
+        """Restrict to courses that still have free seats"""
+        return self.filter(seats_taken__lt=F('max_students'))
+
 
 class Course(models.Model):
     """
@@ -49,6 +80,11 @@ class Course(models.Model):
     
     # Capacity
     max_students = models.PositiveIntegerField(default=30)
+    seats_taken = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of ENROLLED students, maintained by Enrollment"
+    )
     
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ACTIVE')
@@ -57,6 +93,8 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CourseQuerySet.as_manager()
+    
     class Meta:
         db_table = 'courses'
         verbose_name = 'Course'
@@ -67,20 +105,97 @@ class Course(models.Model):
             models.Index(fields=['course_code']),
             models.Index(fields=['academic_year', 'semester']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'seats_taken', 'max_students']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
         return f"{self.course_code} - {self.course_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._original_credits = instance.__dict__.get('credits')
+        instance._original_max_students = instance.__dict__.get('max_students')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save to rebuild GPA totals of enrolled students when credits
+        change, and to hand seats added by a higher max_students to the waitlist
+        """
+        original_credits = getattr(self, '_original_credits', None)
+        original_max_students = getattr(self, '_original_max_students', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if original_credits is not None and original_credits != self.credits:
+                Student.objects.filter(enrollments__course=self).recalculate_gpa()
+            if original_max_students is not None and self.max_students > original_max_students:
+                WaitlistEntry.objects.promote(self.pk, self.max_students - original_max_students)
+        self._original_credits = self.credits
+        self._original_max_students = self.max_students
+    
     @property
     def enrolled_count(self):
         """Get number of enrolled students"""
-        return self.enrollments.filter(status='ENROLLED').count()
+        # Use the value from with_enrollment_counts() when the queryset provided one
+        annotated = getattr(self, 'annotated_enrolled_count', None)
+        if annotated is not None:
+            return annotated
+        return self.seats_taken
     
     @property
     def is_full(self):
         """Check if course is at capacity"""
-        return self.enrolled_count >= self.max_students
+        return self.seats_taken >= self.max_students
+    
+    @classmethod
+    def claim_seat(cls, course_id):
+        """
+        Take one seat if the course still has room.
+        The conditional UPDATE locks the course row, so concurrent claims are
+        serialised by the database and can never push seats_taken past max_students.
+        Returns True when the seat was claimed.
+        """
+        return cls.objects.filter(
+            pk=course_id,
+            seats_taken__lt=F('max_students')
+        ).update(seats_taken=F('seats_taken') + 1) == 1
+    
+    @classmethod
+    def bulk_adjust_seats_taken(cls, deltas):
+        """Apply {course_id: delta} seat changes in a single UPDATE"""
+        deltas = {course_id: delta for course_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        cls.objects.filter(pk__in=deltas).update(
+            seats_taken=F('seats_taken') + Case(
+                *[When(pk=course_id, then=Value(delta)) for course_id, delta in deltas.items()],
+                default=Value(0),
+                output_field=models.IntegerField()
+            )
+        )
+    
+    @classmethod
+    def adjust_seats_taken(cls, course_id, delta):
+        """
+        Atomically add delta to a course's seat counter.
+        A release that would take the counter below zero is skipped and
+        logged: the counter has drifted from the enrollments table and
+        reconcile_seat_counts should be run.
+        """
+        if not delta:
+            return
+        queryset = cls.objects.filter(pk=course_id)
+        if delta < 0:
+            queryset = queryset.filter(seats_taken__gte=-delta)
+        if not queryset.update(seats_taken=F('seats_taken') + delta) and delta < 0:
+            seats_taken = cls.objects.filter(pk=course_id).values_list('seats_taken', flat=True).first()
+            if seats_taken is not None:
+                logger.warning(
+                    'Seat counter of course %s has drifted: releasing %d seat(s) with seats_taken=%d. '
+                    'Run reconcile_seat_counts.', course_id, -delta, seats_taken
+                )
 
 
 class Enrollment(models.Model):
@@ -110,6 +225,14 @@ class Enrollment(models.Model):
         ('W', 'Withdrawn'),
     ]
     
+    GRADE_POINTS = {
+        'A+': Decimal('4.00'), 'A': Decimal('4.00'), 'A-': Decimal('3.70'),
+        'B+': Decimal('3.30'), 'B': Decimal('3.00'), 'B-': Decimal('2.70'),
+        'C+': Decimal('2.30'), 'C': Decimal('2.00'), 'C-': Decimal('1.70'),
+        'D+': Decimal('1.30'), 'D': Decimal('1.00'), 'F': Decimal('0.00'),
+        'I': None, 'W': None
+    }
+    
     # Primary Key
     id = models.BigAutoField(primary_key=True)
     
@@ -151,21 +274,194 @@ class Enrollment(models.Model):
         indexes = [
             models.Index(fields=['student', 'status']),
             models.Index(fields=['course', 'status']),
-            models.Index(fields=['enrollment_date']),
+            models.Index(fields=['enrollment_date', 'id']),
         ]
     
     def __str__(self):
         return f"{self.student.student_id} - {self.course.course_code}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted state so save() can keep Course.seats_taken in sync
+        instance._original_course_id = instance.__dict__.get('course_id')
+        instance._original_status = instance.__dict__.get('status')
+        instance._original_grade_points = instance.__dict__.get('grade_points')
+        return instance
+    
+    @property
+    def holds_seat(self):
+        """Check if this enrollment occupies a seat in its course"""
+        return self.status == 'ENROLLED'
+    
+    @staticmethod
+    def counts_toward_gpa(status, grade_points):
+        """Check if an enrollment in this state is part of the student's GPA"""
+        return grade_points is not None and status != 'DROPPED'
+    
+    def _course_credits(self, course_id):
+        """Credits of the given course, reusing the loaded course when possible"""
+        if Enrollment.course.is_cached(self) and self.course.pk == course_id:
+            return self.course.credits
+        return Course.objects.filter(pk=course_id).values_list('credits', flat=True).first() or 0
+    
+    def _gpa_contribution(self, course_id, status, grade_points):
+        """(quality points, credits) this enrollment adds to the student's totals"""
+        if course_id is None or not self.counts_toward_gpa(status, grade_points):
+            return Decimal('0.00'), 0
+        credits = self._course_credits(course_id)
+        return Decimal(grade_points) * credits, credits
+    
     def save(self, *args, **kwargs):
         """Override save to update grade points based on letter grade"""
-        grade_point_map = {
-            'A+': 4.00, 'A': 4.00, 'A-': 3.70,
-            'B+': 3.30, 'B': 3.00, 'B-': 2.70,
-            'C+': 2.30, 'C': 2.00, 'C-': 1.70,
-            'D+': 1.30, 'D': 1.00, 'F': 0.00,
-            'I': None, 'W': None
-        }
-        if self.grade:
-            self.grade_points = grade_point_map.get(self.grade)
-        super().save(*args, **kwargs)
+        self.grade_points = self.GRADE_POINTS.get(self.grade) if self.grade else None
+        
+        original_course_id = getattr(self, '_original_course_id', None)
+        original_status = getattr(self, '_original_status', None)
+        original_grade_points = getattr(self, '_original_grade_points', None)
+        original_held_seat = original_status == 'ENROLLED'
+        
+        if original_course_id == self.course_id:
+            delta = int(self.holds_seat) - int(original_held_seat)
+        else:
+            delta = int(self.holds_seat)
+        
+        with transaction.atomic():
+            # Claim the seat before writing the row; a full course aborts the whole save
+            if delta > 0 and not Course.claim_seat(self.course_id):
+                raise CourseFullError()
+            if delta < 0:
+                Course.adjust_seats_taken(self.course_id, delta)
+            if original_course_id not in (None, self.course_id) and original_held_seat:
+                Course.adjust_seats_taken(original_course_id, -1)
+            super().save(*args, **kwargs)
+            # A seat freed by dropping or completing goes straight to the head of the waitlist
+            if delta < 0:
+                WaitlistEntry.objects.promote_next(self.course_id)
+            
+            # Move the student's running GPA totals by the change in this enrollment
+            if (original_course_id, original_status, original_grade_points) != \
+                    (self.course_id, self.status, self.grade_points):
+                old_points, old_credits = self._gpa_contribution(
+                    original_course_id, original_status, original_grade_points
+                )
+                new_points, new_credits = self._gpa_contribution(
+                    self.course_id, self.status, self.grade_points
+                )
+                Student.apply_grade_delta(
+                    self.student_id, new_points - old_points, new_credits - old_credits
+                )
+        
+        # Keep an already loaded course in step with the row we just updated
+        if delta and Enrollment.course.is_cached(self):
+            self.course.seats_taken = max(self.course.seats_taken + delta, 0)
+        
+        self._original_course_id = self.course_id
+        self._original_status = self.status
+        self._original_grade_points = self.grade_points
+
+
+class WaitlistQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for course waitlists
+    """
+    def with_positions(self):
+        """Annotate each entry with its 1-based place in its course's queue"""
+        ahead = WaitlistEntry.objects.filter(
+            course=OuterRef('course')
+        ).filter(
+            Q(created_at__lt=OuterRef('created_at')) |
+            Q(created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+        ).order_by().values('course').annotate(total=Count('id')).values('total')
+        return self.annotate(
+            position=Coalesce(Subquery(ahead), 0) + 1
+        )
+    
+    def promote_next(self, course_id):
+        """
+        Enroll the student at the head of a course's waitlist.
+        Must run in the transaction that freed the seat so nobody else can take it.
+        Only the head entry is locked and read; entries of students who
+        meanwhile hold an enrollment other than a DROPPED one (enrolled
+        directly, or completed with a grade) are removed and skipped, never
+        overwritten.
+        Returns the promoted enrollment, or None when the queue is empty.
+        """
+        with transaction.atomic():
+            while True:
+                entry = (
+                    self.select_for_update()
+                    .filter(course_id=course_id)
+                    .order_by('created_at', 'id')
+                    .first()
+                )
+                if entry is None:
+                    return None
+                enrollment = Enrollment.objects.filter(
+                    student_id=entry.student_id, course_id=course_id
+                ).first()
+                if enrollment is None:
+                    enrollment = Enrollment(student_id=entry.student_id, course_id=course_id)
+                elif enrollment.status != 'DROPPED':
+                    entry.delete()
+                    continue
+                enrollment.status = 'ENROLLED'
+                try:
+                    with transaction.atomic():
+                        enrollment.save()
+                except CourseFullError:
+                    # The seat is gone (e.g. capacity was lowered); keep the student queued
+                    return None
+                entry.delete()
+                return enrollment
+    
+    def promote(self, course_id, seats):
+        """
+        Hand up to `seats` freed seats to the head of a course's waitlist.
+        Returns the promoted enrollments.
+        """
+        promoted = []
+        for _ in range(seats):
+            enrollment = self.promote_next(course_id)
+            if enrollment is None:
+                break
+            promoted.append(enrollment)
+        return promoted
+
+
+class WaitlistEntry(models.Model):
+    """
+    A student queued for a seat in a full course
+    """
+    # Primary Key
+    id = models.BigAutoField(primary_key=True)
+    
+    # Relationships
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = WaitlistQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'waitlist_entries'
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist Entries'
+        ordering = ['course', 'created_at', 'id']
+        unique_together = [['student', 'course']]
+        indexes = [
+            models.Index(fields=['course', 'created_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.student_id} - {self.course.course_code} (waitlist)"
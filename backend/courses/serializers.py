@@ -1,17 +1,24 @@
 """
 Serializers for Course and Enrollment Management
 """
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Course, Enrollment
-from teachers.serializers import TeacherSerializer
-from students.serializers import StudentSerializer
+from .models import Course, Enrollment, WaitlistEntry
+from stats.summary import invalidate_summary
+from accounts.fieldsets import SparseFieldsMixin
+from accounts.rows import ValuesRowSerializer
+from teachers.serializers import TeacherSerializer, TeacherSummarySerializer
+from students.serializers import StudentSerializer, StudentSummarySerializer
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Course model (read operations)
+    teacher is a compact summary unless ?expand=teacher
     """
-    teacher = TeacherSerializer(read_only=True)
     enrolled_count = serializers.ReadOnlyField()
     is_full = serializers.ReadOnlyField()
     
@@ -24,6 +31,16 @@ class CourseSerializer(serializers.ModelSerializer):
             'is_full', 'status', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'teacher': (TeacherSerializer, TeacherSummarySerializer)}
+
+
+class CourseSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact course representation for nesting in other resources
+    """
+    class Meta:
+        model = Course
+        fields = ['id', 'course_code', 'course_name']
 
 
 class CourseCreateUpdateSerializer(serializers.ModelSerializer):
@@ -63,13 +80,11 @@ class CourseCreateUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Enrollment model (read operations)
+    student and course are compact summaries unless expanded
     """
-    student = StudentSerializer(read_only=True)
-    course = CourseSerializer(read_only=True)
-    
     class Meta:
         model = Enrollment
         fields = [
@@ -77,6 +92,44 @@ class EnrollmentSerializer(serializers.ModelSerializer):
             'status', 'grade', 'grade_points', 'updated_at'
         ]
         read_only_fields = ['id', 'enrollment_date', 'updated_at', 'grade_points']
+        expandable_fields = {
+            'student': (StudentSerializer, StudentSummarySerializer),
+            'course': (CourseSerializer, CourseSummarySerializer),
+        }
+
+
+class EnrollmentRowSerializer(ValuesRowSerializer):
+    """
+    values()-based equivalent of EnrollmentSerializer's default output,
+    used by the enrollment list
+    """
+    serializer_class = EnrollmentSerializer
+    values = (
+        'id', 'student_id', 'student__student_id',
+        'student__user__first_name', 'student__user__last_name',
+        'course_id', 'course__course_code', 'course__course_name',
+        'enrollment_date', 'status', 'grade', 'grade_points', 'updated_at',
+    )
+    
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'student': {
+                'id': row['student_id'],
+                'student_id': row['student__student_id'],
+                'full_name': f"{row['student__user__first_name']} {row['student__user__last_name']}",
+            },
+            'course': {
+                'id': row['course_id'],
+                'course_code': row['course__course_code'],
+                'course_name': row['course__course_name'],
+            },
+            'enrollment_date': self.format('enrollment_date', row['enrollment_date']),
+            'status': row['status'],
+            'grade': row['grade'],
+            'grade_points': self.format('grade_points', row['grade_points']),
+            'updated_at': self.format('updated_at', row['updated_at']),
+        }
 
 
 class EnrollmentCreateSerializer(serializers.ModelSerializer):
@@ -110,7 +163,7 @@ class EnrollmentCreateSerializer(serializers.ModelSerializer):
         if course.status != 'ACTIVE':
             raise serializers.ValidationError({"course_id": "Course is not active."})
         
-        # Check if course is full
+        # Check if course is full (the seat itself is claimed atomically on save)
         if course.is_full:
             raise serializers.ValidationError({"course_id": "Course is full."})
         
@@ -118,9 +171,195 @@ class EnrollmentCreateSerializer(serializers.ModelSerializer):
         if Enrollment.objects.filter(student=student, course=course).exists():
             raise serializers.ValidationError("Student is already enrolled in this course.")
         
+        # Hand the loaded objects to the view so it does not fetch them again
+        attrs['student'] = student
+        attrs['course'] = course
         return attrs
 
 
+class EnrollmentBulkItemSerializer(serializers.Serializer):
+    """
+    A single (student, course) pair in a bulk enrollment request
+    """
+    student_id = serializers.IntegerField()
+    course_id = serializers.IntegerField()
+
+
+class EnrollmentBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer for enrolling many students at once.
+    Rows are validated with set-based queries and inserted with bulk_create;
+    each row gets its own result instead of failing the whole batch.
+    """
+    MAX_ROWS = 1000
+    
+    enrollments = EnrollmentBulkItemSerializer(many=True, allow_empty=False, max_length=MAX_ROWS)
+    
+    def create(self, validated_data):
+        from students.models import Student
+        
+        rows = validated_data['enrollments']
+        student_ids = {row['student_id'] for row in rows}
+        course_ids = {row['course_id'] for row in rows}
+        
+        with transaction.atomic():
+            existing_students = set(
+                Student.objects.filter(id__in=student_ids).values_list('id', flat=True)
+            )
+            # Lock the courses so seat counts cannot move until the batch commits
+            courses = {
+                course.id: course
+                for course in Course.objects.select_for_update()
+                .filter(id__in=course_ids)
+                .only('id', 'status', 'max_students', 'seats_taken')
+            }
+            already_enrolled = set(
+                Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+                .values_list('student_id', 'course_id')
+            )
+            open_seats = {
+                course_id: max(course.max_students - course.seats_taken, 0)
+                for course_id, course in courses.items()
+            }
+            
+            results = []
+            accepted = []
+            seen = set()
+            for index, row in enumerate(rows):
+                pair = (row['student_id'], row['course_id'])
+                course = courses.get(row['course_id'])
+                if row['student_id'] not in existing_students:
+                    error = {'student_id': ['Student does not exist.']}
+                elif course is None:
+                    error = {'course_id': ['Course does not exist.']}
+                elif course.status != 'ACTIVE':
+                    error = {'course_id': ['Course is not active.']}
+                elif pair in already_enrolled or pair in seen:
+                    error = {'non_field_errors': ['Student is already enrolled in this course.']}
+                elif open_seats[course.id] == 0:
+                    error = {'course_id': ['Course is full.']}
+                else:
+                    error = None
+                    open_seats[course.id] -= 1
+                    seen.add(pair)
+                    accepted.append(Enrollment(student_id=pair[0], course_id=pair[1]))
+                
+                results.append({
+                    'index': index,
+                    'student_id': row['student_id'],
+                    'course_id': row['course_id'],
+                    'success': error is None,
+                    'enrollment_id': None,
+                    'errors': error,
+                })
+            
+            if accepted:
+                created = Enrollment.objects.bulk_create(accepted, batch_size=500)
+                invalidate_summary()
+                Course.bulk_adjust_seats_taken(
+                    Counter(enrollment.course_id for enrollment in accepted)
+                )
+                
+                # Backends without RETURNING (MySQL) leave pk unset on bulk_create
+                if any(enrollment.pk is None for enrollment in created):
+                    ids = dict(
+                        ((student_id, course_id), pk)
+                        for pk, student_id, course_id in Enrollment.objects.filter(
+                            student_id__in=student_ids, course_id__in=course_ids
+                        ).values_list('id', 'student_id', 'course_id')
+                    )
+                else:
+                    ids = {
+                        (enrollment.student_id, enrollment.course_id): enrollment.pk
+                        for enrollment in created
+                    }
+                for result in results:
+                    if result['success']:
+                        result['enrollment_id'] = ids.get((result['student_id'], result['course_id']))
+        
+        return {
+            'created': len(accepted),
+            'failed': len(rows) - len(accepted),
+            'results': results,
+        }
+
+
+class GradebookEntrySerializer(serializers.Serializer):
+    """
+    A single student's grade in a gradebook submission
+    """
+    student_id = serializers.IntegerField()
+    grade = serializers.ChoiceField(choices=Enrollment.GRADE_CHOICES)
+
+
+class GradebookSerializer(serializers.Serializer):
+    """
+    Serializer for posting a course's grades in one batch.
+    Expects the course in context['course'].
+    """
+    MAX_ROWS = 1000
+    
+    grades = GradebookEntrySerializer(many=True, allow_empty=False, max_length=MAX_ROWS)
+    mark_completed = serializers.BooleanField(default=False)
+    
+    def validate_grades(self, value):
+        """Validate that every student is enrolled in the course, once"""
+        course = self.context['course']
+        student_ids = [row['student_id'] for row in value]
+        
+        if len(set(student_ids)) != len(student_ids):
+            raise serializers.ValidationError("Each student may only appear once.")
+        
+        enrollments = {
+            enrollment.student_id: enrollment
+            for enrollment in Enrollment.objects.filter(course=course, student_id__in=student_ids)
+            .exclude(status='DROPPED')
+        }
+        missing = sorted(set(student_ids) - set(enrollments))
+        if missing:
+            raise serializers.ValidationError(
+                f"Students not enrolled in this course: {', '.join(map(str, missing))}"
+            )
+        
+        self._enrollments = enrollments
+        return value
+    
+    def create(self, validated_data):
+        from students.models import Student
+        
+        course = self.context['course']
+        fields = ['grade', 'grade_points', 'updated_at']
+        now = timezone.now()
+        completed = 0
+        
+        updated = []
+        for row in validated_data['grades']:
+            enrollment = self._enrollments[row['student_id']]
+            enrollment.grade = row['grade']
+            enrollment.grade_points = Enrollment.GRADE_POINTS[row['grade']]
+            enrollment.updated_at = now
+            if validated_data['mark_completed'] and enrollment.status != 'COMPLETED':
+                completed += enrollment.holds_seat
+                enrollment.status = 'COMPLETED'
+            updated.append(enrollment)
+        if validated_data['mark_completed']:
+            fields.append('status')
+        
+        with transaction.atomic():
+            Enrollment.objects.bulk_update(updated, fields, batch_size=500)
+            # Completed enrollments no longer hold a seat; the waitlist gets them
+            Course.adjust_seats_taken(course.id, -completed)
+            WaitlistEntry.objects.promote(course.id, completed)
+            Student.objects.filter(id__in=self._enrollments).recalculate_gpa()
+            if validated_data['mark_completed']:
+                invalidate_summary()
+        
+        return {
+            'updated': len(updated),
+            'students_recalculated': len(self._enrollments),
+        }
+
+
 class EnrollmentUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating enrollment status and grades
@@ -128,3 +367,72 @@ class EnrollmentUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Enrollment
         fields = ['status', 'grade']
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for WaitlistEntry model (read operations)
+    """
+    student_code = serializers.CharField(source='student.student_id', read_only=True)
+    course_code = serializers.CharField(source='course.course_code', read_only=True)
+    position = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'student', 'student_code', 'course', 'course_code',
+            'position', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class WaitlistEntryCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for joining a course waitlist
+    """
+    student_id = serializers.IntegerField()
+    course_id = serializers.IntegerField()
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = ['student_id', 'course_id']
+    
+    def validate(self, attrs):
+        """Validate waitlist entry creation"""
+        from students.models import Student
+        
+        # Check if student exists
+        try:
+            student = Student.objects.get(id=attrs['student_id'])
+        except Student.DoesNotExist:
+            raise serializers.ValidationError({"student_id": "Student does not exist."})
+        
+        # Students may only queue themselves
+        request = self.context.get('request')
+        if request and request.user.is_student() and student.user_id != request.user.id:
+            raise serializers.ValidationError({"student_id": "You can only join waitlists for yourself."})
+        
+        # Check if course exists
+        try:
+            course = Course.objects.get(id=attrs['course_id'])
+        except Course.DoesNotExist:
+            raise serializers.ValidationError({"course_id": "Course does not exist."})
+        
+        # Check if course is active
+        if course.status != 'ACTIVE':
+            raise serializers.ValidationError({"course_id": "Course is not active."})
+        
+        # Only full courses have a waitlist
+        if not course.is_full:
+            raise serializers.ValidationError({"course_id": "Course has open seats, enroll directly."})
+        
+        # Check if already enrolled or queued; only a DROPPED enrollment may
+        # be taken up again, promotion never overwrites a completed course
+        if Enrollment.objects.filter(student=student, course=course).exclude(status='DROPPED').exists():
+            raise serializers.ValidationError("Student is already enrolled in this course.")
+        if WaitlistEntry.objects.filter(student=student, course=course).exists():
+            raise serializers.ValidationError("Student is already on the waitlist for this course.")
+        
+        attrs['student'] = student
+        attrs['course'] = course
+        return attrs
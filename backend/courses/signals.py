@@ -0,0 +1,33 @@
+"""
+Signal handlers for courses app
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Course, Enrollment, WaitlistEntry
+from students.models import Student
+
+
+@receiver(post_delete, sender=Enrollment)
+def release_seat_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Free the course seat held by a deleted enrollment.
+    Runs for cascaded deletes too (e.g. when a student is removed).
+    The waitlist is only promoted when the enrollment itself was deleted;
+    cascades from a course or student are removing the queue as well.
+    """
+    if instance.holds_seat:
+        Course.adjust_seats_taken(instance.course_id, -1)
+        if isinstance(origin, Enrollment) or getattr(origin, 'model', None) is Enrollment:
+            WaitlistEntry.objects.promote_next(instance.course_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def remove_grade_on_delete(sender, instance, **kwargs):
+    """
+    Take a deleted enrollment's grade out of the student's running GPA totals.
+    """
+    points, credits = instance._gpa_contribution(
+        instance.course_id, instance.status, instance.grade_points
+    )
+    Student.apply_grade_delta(instance.student_id, -points, -credits)
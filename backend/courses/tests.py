@@ -0,0 +1,518 @@
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from students.models import Student
+from teachers.models import Teacher
+
+from .models import Course, CourseFullError, Enrollment, WaitlistEntry
+from .serializers import (
+    EnrollmentRowSerializer, EnrollmentSerializer, GradebookSerializer, WaitlistEntryCreateSerializer
+)
+
+
+def make_student(number, **kwargs):
+    user = User.objects.create_user(
+        f"student{number}@x.com", 'pw', username=f"student{number}",
+        first_name='Student', last_name=str(number), role='STUDENT'
+    )
+    return Student.objects.create(
+        user=user, student_id=f"S{number:05d}", date_of_birth=datetime.date(2010, 1, 1), gender='M',
+        grade='10', emergency_contact_name='e', emergency_contact_phone='1', emergency_contact_relation='r',
+        **kwargs
+    )
+
+
+def make_course(code, max_students=2, credits=3):
+    user = User.objects.create_user(f"{code.lower()}@x.com", 'pw', username=code.lower(), role='TEACHER')
+    teacher = Teacher.objects.create(
+        user=user, teacher_id=f"T{code}", department='MATH', specialization='x', qualification='y'
+    )
+    return Course.objects.create(
+        course_code=code, course_name=code, teacher=teacher, semester='1', academic_year='2024-2025',
+        schedule='s', room='r', max_students=max_students, credits=credits
+    )
+
+
+def seats_taken(course):
+    return Course.objects.values_list('seats_taken', flat=True).get(pk=course.pk)
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self):
+        self.course = make_course('C1', max_students=2)
+        self.students = [make_student(number) for number in range(3)]
+
+    def test_enrollment_claims_and_releases_seats(self):
+        first = Enrollment.objects.create(student=self.students[0], course=self.course)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        self.assertEqual(seats_taken(self.course), 2)
+
+        first.status = 'DROPPED'
+        first.save()
+        self.assertEqual(seats_taken(self.course), 1)
+
+        first.status = 'ENROLLED'
+        first.save()
+        self.assertEqual(seats_taken(self.course), 2)
+
+        first.delete()
+        self.assertEqual(seats_taken(self.course), 1)
+
+    def test_completed_enrollment_frees_its_seat(self):
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course)
+        enrollment.status = 'COMPLETED'
+        enrollment.save()
+        self.assertEqual(seats_taken(self.course), 0)
+
+    def test_full_course_rejects_enrollment(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        with self.assertRaises(CourseFullError):
+            Enrollment.objects.create(student=self.students[2], course=self.course)
+        self.assertEqual(seats_taken(self.course), 2)
+        self.assertFalse(Enrollment.objects.filter(student=self.students[2]).exists())
+
+    def test_drifted_counter_is_logged(self):
+        enrollment = Enrollment.objects.create(student=self.students[0], course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(seats_taken=0)
+        with self.assertLogs('courses.models', 'WARNING') as logs:
+            enrollment.delete()
+        self.assertIn('reconcile_seat_counts', logs.output[0])
+        self.assertEqual(seats_taken(self.course), 0)
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    def enroll(self, student_id):
+        """One enrollment attempt on the thread's own connection"""
+        try:
+            # SQLite refuses concurrent writers instead of queueing them
+            for attempt in range(50):
+                try:
+                    Enrollment.objects.create(student_id=student_id, course_id=self.course.pk)
+                    return 'enrolled'
+                except CourseFullError:
+                    return 'full'
+                except OperationalError:
+                    time.sleep(0.01)
+            return 'db_error'
+        finally:
+            connection.close()
+
+    def test_parallel_enrollments_never_exceed_capacity(self):
+        self.course = make_course('C1', max_students=5)
+        student_ids = [make_student(number).pk for number in range(20)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            outcomes = list(pool.map(self.enroll, student_ids))
+
+        enrolled = Enrollment.objects.filter(course=self.course, status='ENROLLED').count()
+        self.assertLessEqual(seats_taken(self.course), self.course.max_students)
+        self.assertEqual(enrolled, seats_taken(self.course))
+        self.assertEqual(enrolled, outcomes.count('enrolled'))
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), enrolled)
+        self.assertEqual(enrolled, self.course.max_students)
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.course = make_course('C1', max_students=1)
+        self.holder, self.queued, self.other = (make_student(number) for number in range(3))
+        self.seat = Enrollment.objects.create(student=self.holder, course=self.course)
+
+    def join(self, student):
+        serializer = WaitlistEntryCreateSerializer(data={'student_id': student.pk, 'course_id': self.course.pk})
+        if serializer.is_valid():
+            return serializer.save()
+        return serializer.errors
+
+    def test_join_full_course(self):
+        self.assertIsInstance(self.join(self.queued), WaitlistEntry)
+        self.assertNotIsInstance(self.join(self.queued), WaitlistEntry)
+
+    def test_join_rejected_for_any_enrollment_but_dropped(self):
+        for status in ('ENROLLED', 'COMPLETED'):
+            with self.subTest(status=status):
+                self.seat.status = status
+                self.seat.save()
+                if status == 'COMPLETED':
+                    # Refill the seat the completed enrollment freed
+                    Enrollment.objects.create(student=self.other, course=self.course)
+                self.assertNotIsInstance(self.join(self.holder), WaitlistEntry)
+
+    def test_dropped_student_may_rejoin(self):
+        self.seat.status = 'DROPPED'
+        self.seat.save()
+        Enrollment.objects.create(student=self.other, course=self.course)
+        self.assertIsInstance(self.join(self.holder), WaitlistEntry)
+
+    def test_drop_promotes_head_of_queue(self):
+        self.join(self.queued)
+        self.join(self.other)
+        self.seat.status = 'DROPPED'
+        self.seat.save()
+
+        promoted = Enrollment.objects.get(student=self.queued, course=self.course)
+        self.assertEqual(promoted.status, 'ENROLLED')
+        self.assertEqual(seats_taken(self.course), 1)
+        self.assertEqual(list(WaitlistEntry.objects.values_list('student', flat=True)), [self.other.pk])
+
+    def test_delete_promotes_head_of_queue(self):
+        self.join(self.queued)
+        self.seat.delete()
+        promoted = Enrollment.objects.get(student=self.queued, course=self.course)
+        self.assertEqual(promoted.status, 'ENROLLED')
+        self.assertEqual(seats_taken(self.course), 1)
+
+    def test_promotion_skips_students_with_a_non_dropped_enrollment(self):
+        self.join(self.queued)
+        self.join(self.other)
+        # The queued student meanwhile completed the course (e.g. set by an admin)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=self.queued, course=self.course, status='COMPLETED', grade='B')
+        ])
+        self.seat.status = 'DROPPED'
+        self.seat.save()
+
+        completed = Enrollment.objects.get(student=self.queued, course=self.course)
+        self.assertEqual((completed.status, completed.grade), ('COMPLETED', 'B'))
+        self.assertEqual(Enrollment.objects.get(student=self.other, course=self.course).status, 'ENROLLED')
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_promotion_reenrolls_dropped_enrollment(self):
+        Enrollment.objects.bulk_create([Enrollment(student=self.queued, course=self.course, status='DROPPED')])
+        self.join(self.queued)
+        self.seat.status = 'DROPPED'
+        self.seat.save()
+        self.assertEqual(Enrollment.objects.get(student=self.queued, course=self.course).status, 'ENROLLED')
+
+
+    def test_completion_promotes_head_of_queue(self):
+        self.join(self.queued)
+        self.seat.status = 'COMPLETED'
+        self.seat.save()
+        self.assertEqual(Enrollment.objects.get(student=self.queued, course=self.course).status, 'ENROLLED')
+        self.assertEqual(seats_taken(self.course), 1)
+
+    def test_raising_capacity_promotes_queue(self):
+        self.join(self.queued)
+        self.join(self.other)
+        self.course.refresh_from_db()
+        self.course.max_students = 3
+        self.course.save()
+        self.assertEqual(
+            set(Enrollment.objects.filter(course=self.course, status='ENROLLED').values_list('student', flat=True)),
+            {self.holder.pk, self.queued.pk, self.other.pk}
+        )
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_gradebook_completion_promotes_queue(self):
+        self.join(self.queued)
+        serializer = GradebookSerializer(
+            data={'grades': [{'student_id': self.holder.pk, 'grade': 'A'}], 'mark_completed': True},
+            context={'course': self.course}
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(Enrollment.objects.get(student=self.queued, course=self.course).status, 'ENROLLED')
+        self.assertEqual(seats_taken(self.course), 1)
+
+    def test_promotion_reads_only_the_head_of_queue(self):
+        self.join(self.queued)
+        self.join(self.other)
+        self.seat.status = 'DROPPED'
+        with CaptureQueriesContext(connection) as queries:
+            self.seat.save()
+        reads = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "waitlist_entries"' in query['sql']
+        ]
+        self.assertTrue(reads)
+        for sql in reads:
+            self.assertIn('LIMIT 1', sql)
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@x.com', 'pw', username='admin', role='ADMIN')
+        self.course = make_course('C1', max_students=2)
+        self.inactive = make_course('C2')
+        Course.objects.filter(pk=self.inactive.pk).update(status='CANCELLED')
+        self.students = [make_student(number) for number in range(3)]
+
+    def post(self, user, rows):
+        return api_client(user).post(reverse('enrollment-bulk-create'), {'enrollments': rows}, format='json')
+
+    def test_partial_results(self):
+        first, second, third = (student.pk for student in self.students)
+        response = self.post(self.admin, [
+            {'student_id': first, 'course_id': self.course.pk},
+            {'student_id': first, 'course_id': self.course.pk},
+            {'student_id': 999999, 'course_id': self.course.pk},
+            {'student_id': second, 'course_id': self.inactive.pk},
+            {'student_id': second, 'course_id': self.course.pk},
+            {'student_id': third, 'course_id': self.course.pk},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual((data['created'], data['failed']), (2, 4))
+        self.assertEqual([row['success'] for row in data['results']], [True, False, False, False, True, False])
+        self.assertEqual(
+            data['results'][1]['errors'], {'non_field_errors': ['Student is already enrolled in this course.']}
+        )
+        self.assertEqual(data['results'][2]['errors'], {'student_id': ['Student does not exist.']})
+        self.assertEqual(data['results'][3]['errors'], {'course_id': ['Course is not active.']})
+        self.assertEqual(data['results'][5]['errors'], {'course_id': ['Course is full.']})
+
+        enrollments = dict(Enrollment.objects.filter(course=self.course).values_list('student_id', 'id'))
+        self.assertEqual(enrollments, {
+            first: data['results'][0]['enrollment_id'],
+            second: data['results'][4]['enrollment_id'],
+        })
+        self.assertEqual(seats_taken(self.course), 2)
+
+    def test_full_course_rejects_every_row(self):
+        Course.objects.filter(pk=self.course.pk).update(max_students=0)
+        response = self.post(self.admin, [
+            {'student_id': student.pk, 'course_id': self.course.pk} for student in self.students
+        ])
+        data = response.json()['data']
+        self.assertEqual((data['created'], data['failed']), (0, 3))
+        self.assertFalse(Enrollment.objects.exists())
+        self.assertEqual(seats_taken(self.course), 0)
+
+    def test_students_may_not_bulk_enroll(self):
+        response = self.post(self.students[0].user, [{'student_id': self.students[0].pk, 'course_id': self.course.pk}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Enrollment.objects.exists())
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.course = make_course('MATH', max_students=5, credits=4)
+        self.other = make_course('ART', max_students=5, credits=2)
+        self.students = [make_student(number) for number in range(2)]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+        Enrollment.objects.create(student=self.students[0], course=self.other, grade='C')
+
+    def post(self, user, grades, mark_completed=True):
+        return api_client(user).post(
+            reverse('course-gradebook', kwargs={'pk': self.course.pk}),
+            {'grades': grades, 'mark_completed': mark_completed},
+            format='json'
+        )
+
+    def test_teacher_grades_own_course(self):
+        first, second = self.students
+        response = self.post(self.course.teacher.user, [
+            {'student_id': first.pk, 'grade': 'A'},
+            {'student_id': second.pk, 'grade': 'B-'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], {'updated': 2, 'students_recalculated': 2})
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        # (4.00 * 4 + 2.00 * 2) / 6
+        self.assertEqual(
+            (first.gpa, first.quality_points, first.attempted_credits), (Decimal('3.33'), Decimal('20.00'), 6)
+        )
+        self.assertEqual(
+            (second.gpa, second.quality_points, second.attempted_credits), (Decimal('2.70'), Decimal('10.80'), 4)
+        )
+        self.assertEqual(
+            set(Enrollment.objects.filter(course=self.course).values_list('status', flat=True)), {'COMPLETED'}
+        )
+        self.assertEqual(seats_taken(self.course), 0)
+
+    def test_teacher_may_not_grade_another_teachers_course(self):
+        response = self.post(self.other.teacher.user, [{'student_id': self.students[0].pk, 'grade': 'F'}])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Enrollment.objects.filter(course=self.course, grade__isnull=False).exists())
+
+    def test_admin_may_grade_any_course(self):
+        admin = User.objects.create_user('admin@x.com', 'pw', username='admin', role='ADMIN')
+        response = self.post(admin, [{'student_id': self.students[1].pk, 'grade': 'A'}], mark_completed=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Enrollment.objects.get(student=self.students[1], course=self.course).status, 'ENROLLED')
+
+    def test_unenrolled_student_rejects_the_batch(self):
+        outsider = make_student(9)
+        response = self.post(self.course.teacher.user, [
+            {'student_id': self.students[0].pk, 'grade': 'A'},
+            {'student_id': outsider.pk, 'grade': 'A'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Enrollment.objects.filter(course=self.course, grade__isnull=False).exists())
+
+
+class GPATests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        self.math = make_course('MATH', max_students=5, credits=3)
+        self.art = make_course('ART', max_students=5, credits=1)
+
+    def totals(self):
+        self.student.refresh_from_db()
+        return self.student.gpa, self.student.quality_points, self.student.attempted_credits
+
+    def test_grades_update_running_totals(self):
+        math = Enrollment.objects.create(student=self.student, course=self.math, grade='A')
+        Enrollment.objects.create(student=self.student, course=self.art, grade='C')
+        self.assertEqual(self.totals(), (Decimal('3.50'), Decimal('14.00'), 4))
+
+        math.grade = 'B'
+        math.save()
+        self.assertEqual(self.totals(), (Decimal('2.75'), Decimal('11.00'), 4))
+
+        math.grade = 'I'
+        math.save()
+        self.assertEqual(self.totals(), (Decimal('2.00'), Decimal('2.00'), 1))
+
+    def test_dropped_and_deleted_enrollments_leave_gpa(self):
+        math = Enrollment.objects.create(student=self.student, course=self.math, grade='A')
+        art = Enrollment.objects.create(student=self.student, course=self.art, grade='C')
+        art.status = 'DROPPED'
+        art.save()
+        self.assertEqual(self.totals(), (Decimal('4.00'), Decimal('12.00'), 3))
+        math.delete()
+        self.assertEqual(self.totals(), (Decimal('0.00'), Decimal('0.00'), 0))
+
+    def test_credit_change_rebuilds_gpa(self):
+        Enrollment.objects.create(student=self.student, course=self.math, grade='A')
+        Enrollment.objects.create(student=self.student, course=self.art, grade='C')
+        self.art.credits = 3
+        self.art.save()
+        self.assertEqual(self.totals(), (Decimal('3.00'), Decimal('18.00'), 6))
+
+    def test_running_totals_match_recalculation(self):
+        Enrollment.objects.create(student=self.student, course=self.math, grade='B+')
+        Enrollment.objects.create(student=self.student, course=self.art, grade='A-')
+        running = self.totals()
+        Student.objects.filter(pk=self.student.pk).update(gpa=0, quality_points=0, attempted_credits=0)
+        Student.objects.filter(pk=self.student.pk).recalculate_gpa()
+        self.assertEqual(self.totals(), running)
+
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.course = make_course('C1')
+        self.client = api_client(make_student(1).user)
+
+    def get(self, query=''):
+        response = self.client.get(f"{reverse('course-detail', kwargs={'pk': self.course.pk})}{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_default_renders_compact_relations(self):
+        data = self.get()
+        self.assertEqual(data['teacher'], {'id': self.course.teacher.pk, 'teacher_id': 'TC1', 'full_name': ' '})
+        self.assertIn('description', data)
+
+    def test_fields_trims_output(self):
+        self.assertEqual(self.get('?fields=id,course_code'), {'id': self.course.pk, 'course_code': 'C1'})
+
+    def test_expand_nests_full_serializer(self):
+        teacher = self.get('?expand=teacher')['teacher']
+        self.assertEqual(teacher['department'], 'MATH')
+        self.assertEqual(teacher['user'], {'id': self.course.teacher.user_id, 'email': 'c1@x.com', 'full_name': ' '})
+
+    def test_dotted_fields_and_nested_expand(self):
+        data = self.get('?fields=id,teacher.teacher_id,teacher.user&expand=teacher.user')
+        self.assertEqual(list(data), ['id', 'teacher'])
+        # Expanding teacher.user expands teacher too
+        self.assertEqual(list(data['teacher']), ['user', 'teacher_id'])
+        self.assertEqual(data['teacher']['user']['username'], 'c1')
+
+    def test_list_skips_joins_for_unrequested_relations(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{reverse('course-list-create')}?fields=id,course_code")
+        self.assertEqual(response.json()['results'], [{'id': self.course.pk, 'course_code': 'C1'}])
+        self.assertFalse(any('"teachers"' in query['sql'] for query in queries))
+
+
+class EnrollmentRowSerializerTests(TestCase):
+    def test_rows_match_enrollment_serializer(self):
+        course = make_course('C1')
+        Enrollment.objects.create(student=make_student(1), course=course, grade='B+')
+        Enrollment.objects.create(student=make_student(2), course=course)
+        queryset = Enrollment.objects.select_related('student__user', 'course').order_by('id')
+        rows = EnrollmentRowSerializer()
+        self.assertEqual(rows.serialize(rows.prepare(queryset)), EnrollmentSerializer(queryset, many=True).data)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.course = make_course('C1')
+        self.student = make_student(1)
+        self.other = make_student(2)
+        self.mine = Enrollment.objects.create(student=self.student, course=self.course, grade='A')
+        Enrollment.objects.create(student=self.other, course=self.course)
+
+    def export(self, user, url, **params):
+        response = api_client(user).get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_course_csv(self):
+        body = self.export(self.student.user, reverse('course-export'), fields='course_code,teacher_name,enrolled_count')
+        self.assertEqual(body, 'course_code,teacher_name,enrolled_count\r\nC1, ,2\r\n')
+
+    def test_course_ndjson(self):
+        body = self.export(self.student.user, reverse('course-export'), format='ndjson', fields='id,credits,status')
+        self.assertEqual(body, f'{{"id":{self.course.pk},"credits":3,"status":"ACTIVE"}}\n')
+
+    def test_course_export_requires_authentication(self):
+        response = APIClient().get(reverse('course-export'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_students_export_only_their_enrollments(self):
+        body = self.export(self.student.user, reverse('enrollment-export'), format='ndjson', fields='student_code,grade')
+        self.assertEqual(body, '{"student_code":"S00001","grade":"A"}\n')
+
+    def test_teacher_exports_every_enrollment(self):
+        body = self.export(self.course.teacher.user, reverse('enrollment-export'), fields='student_code,grade_points')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'student_code,grade_points')
+        self.assertCountEqual(lines[1:], ['S00001,4.00', 'S00002,'])
+
+
+class GenerateDatasetFlushTests(TestCase):
+    def generate(self, *args):
+        call_command(
+            'generate_dataset', '--students', '20', '--enrollments', '60', '--years', '1',
+            '--courses-per-term', '2', *args, stdout=StringIO()
+        )
+
+    def test_flush_keeps_real_students_totals(self):
+        self.generate()
+        student = make_student(1)
+        course = Course.objects.filter(course_code__startswith='GEN').first()
+        Enrollment.objects.create(student=student, course=course, status='COMPLETED', grade='A')
+        student.refresh_from_db()
+        self.assertEqual(student.gpa, Decimal('4.00'))
+
+        self.generate('--flush')
+
+        student.refresh_from_db()
+        self.assertFalse(Enrollment.objects.filter(student=student).exists())
+        self.assertEqual((student.gpa, student.quality_points, student.attempted_credits), (Decimal('0.00'), 0, 0))
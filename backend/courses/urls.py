@@ -3,16 +3,26 @@ URL patterns for course and enrollment endpoints
 """
 from django.urls import path
 from .views import (
-    CourseListCreateView, CourseDetailView,
-    EnrollmentListCreateView, EnrollmentDetailView
+    CourseListCreateView, CourseDetailView, CourseGradebookView, CourseExportView,
+    EnrollmentListCreateView, EnrollmentDetailView, EnrollmentBulkCreateView,
+    EnrollmentExportView,
+    WaitlistListCreateView, WaitlistEntryDetailView
 )
 
 urlpatterns = [
     # Course endpoints
     path('', CourseListCreateView.as_view(), name='course-list-create'),
+    path('export/', CourseExportView.as_view(), name='course-export'),
     path('<int:pk>/', CourseDetailView.as_view(), name='course-detail'),
+    path('<int:pk>/grades/', CourseGradebookView.as_view(), name='course-gradebook'),
     
     # Enrollment endpoints
     path('enrollments/', EnrollmentListCreateView.as_view(), name='enrollment-list-create'),
+    path('enrollments/bulk/', EnrollmentBulkCreateView.as_view(), name='enrollment-bulk-create'),
+    path('enrollments/export/', EnrollmentExportView.as_view(), name='enrollment-export'),
     path('enrollments/<int:pk>/', EnrollmentDetailView.as_view(), name='enrollment-detail'),
+    
+    # Waitlist endpoints
+    path('waitlist/', WaitlistListCreateView.as_view(), name='waitlist-list-create'),
+    path('waitlist/<int:pk>/', WaitlistEntryDetailView.as_view(), name='waitlist-detail'),
 ]
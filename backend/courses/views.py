@@ -1,31 +1,44 @@
 """
 Course and Enrollment Management Views
 """
-from rest_framework import generics, status, filters
+from rest_framework import generics, status, filters, views
+from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
 
-from .models import Course, Enrollment
+from .metrics import record_enrollment
+from .models import Course, CourseFullError, Enrollment, WaitlistEntry
 from .serializers import (
     CourseSerializer, CourseCreateUpdateSerializer,
-    EnrollmentSerializer, EnrollmentCreateSerializer, EnrollmentUpdateSerializer
+    EnrollmentSerializer, EnrollmentRowSerializer,
+    EnrollmentCreateSerializer, EnrollmentUpdateSerializer,
+    EnrollmentBulkCreateSerializer, GradebookSerializer,
+    WaitlistEntrySerializer, WaitlistEntryCreateSerializer
 )
+from accounts.exports import ExportMixin
+from accounts.fieldsets import SparseFieldsViewMixin
 from accounts.permissions import IsAdminOrTeacher, IsAdmin
 from accounts.utils import success_response, error_response
+from search.filters import FullTextSearchFilter
 
 
-class CourseListCreateView(generics.ListCreateAPIView):
+class CourseListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     API endpoint to list and create courses
     GET /api/courses/ - All authenticated users can view
     POST /api/courses/ - Only admins and teachers can create
     """
     queryset = Course.objects.select_related('teacher__user').all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    read_serializer_class = CourseSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['semester', 'academic_year', 'status', 'teacher']
     search_fields = ['course_code', 'course_name', 'teacher__user__first_name', 'teacher__user__last_name']
     ordering_fields = ['created_at', 'course_code']
     ordering = ['-created_at']
+    cursor_ordering = ['-created_at', '-id']
+    allow_claims_user = True
     
     def get_permissions(self):
         """
@@ -35,6 +48,15 @@ class CourseListCreateView(generics.ListCreateAPIView):
             return [IsAdminOrTeacher()]
         return []  # Allow all authenticated users to view (handled by IsAuthenticated in settings)
     
+    def get_queryset(self):
+        """
+        Optionally restrict the catalog to courses with free seats (?open_seats=true)
+        """
+        queryset = super().get_queryset()
+        if self.request.query_params.get('open_seats', '').lower() in ('1', 'true'):
+            queryset = queryset.with_open_seats()
+        return queryset
+    
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CourseCreateUpdateSerializer
@@ -45,10 +67,10 @@ class CourseListCreateView(generics.ListCreateAPIView):
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = CourseSerializer(page, many=True)
+            serializer = CourseSerializer(page, many=True, context=self.get_serializer_context())
             return self.get_paginated_response(serializer.data)
         
-        serializer = CourseSerializer(queryset, many=True)
+        serializer = CourseSerializer(queryset, many=True, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Courses retrieved successfully'
@@ -70,7 +92,7 @@ class CourseListCreateView(generics.ListCreateAPIView):
             course = serializer.save()
             
             return success_response(
-                data=CourseSerializer(course).data,
+                data=CourseSerializer(course, context=self.get_serializer_context()).data,
                 message='Course created successfully',
                 status_code=status.HTTP_201_CREATED
             )
@@ -82,7 +104,7 @@ class CourseListCreateView(generics.ListCreateAPIView):
             )
 
 
-class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to get, update, or delete a specific course
     GET /api/courses/<id>/ - All authenticated users can view
@@ -91,6 +113,8 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
     DELETE /api/courses/<id>/ - Only admins and teachers can delete
     """
     queryset = Course.objects.select_related('teacher__user').all()
+    read_serializer_class = CourseSerializer
+    allow_claims_user = True
     
     def get_permissions(self):
         """
@@ -107,7 +131,7 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = CourseSerializer(instance)
+        serializer = CourseSerializer(instance, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Course retrieved successfully'
@@ -123,7 +147,7 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
             self.perform_update(serializer)
             
             return success_response(
-                data=CourseSerializer(instance).data,
+                data=CourseSerializer(instance, context=self.get_serializer_context()).data,
                 message='Course updated successfully'
             )
         except Exception as e:
@@ -149,17 +173,61 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
-class EnrollmentListCreateView(generics.ListCreateAPIView):
+class CourseGradebookView(views.APIView):
+    """
+    API endpoint to post final grades for a course in one batch
+    POST /api/courses/<id>/grades/ - Only admins and the course's teacher
+    """
+    permission_classes = [IsAdminOrTeacher]
+    
+    def post(self, request, pk):
+        try:
+            course = Course.objects.get(pk=pk)
+        except Course.DoesNotExist:
+            return error_response(
+                message='Course not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Teachers may only grade the courses they teach
+        if not request.user.is_admin() and course.teacher_id != request.user.teacher_profile_id:
+            return error_response(
+                message='You can only grade your own courses',
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = GradebookSerializer(data=request.data, context={'course': course})
+        
+        try:
+            serializer.is_valid(raise_exception=True)
+            result = serializer.save()
+            
+            return success_response(
+                data=result,
+                message='Grades updated successfully'
+            )
+        except Exception as e:
+            return error_response(
+                message='Grade update failed',
+                details=serializer.errors if hasattr(serializer, 'errors') else str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class EnrollmentListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     API endpoint to list and create enrollments
     GET /api/courses/enrollments/ - All authenticated users (students see their own)
     POST /api/courses/enrollments/ - All authenticated users (students can enroll)
     """
     queryset = Enrollment.objects.select_related('student__user', 'course__teacher__user').all()
+    read_serializer_class = EnrollmentSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'course', 'student']
     ordering_fields = ['enrollment_date', 'grade_points']
     ordering = ['-enrollment_date']
+    cursor_ordering = ['-enrollment_date', '-id']
+    allow_claims_user = True
     
     def get_queryset(self):
         """
@@ -170,12 +238,10 @@ class EnrollmentListCreateView(generics.ListCreateAPIView):
         
         if user.is_student():
             # Students only see their own enrollments
-            from students.models import Student
-            try:
-                student = Student.objects.get(user=user)
-                return queryset.filter(student=student)
-            except Student.DoesNotExist:
+            student_id = user.student_profile_id
+            if student_id is None:
                 return queryset.none()
+            return queryset.filter(student_id=student_id)
         
         # Admins and teachers see all enrollments
         return queryset
@@ -187,15 +253,27 @@ class EnrollmentListCreateView(generics.ListCreateAPIView):
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        
+        # Plain listings are built from values() rows; nested fields and
+        # expansions go through the full serializer
+        rows = EnrollmentRowSerializer.for_request(request, context=self.get_serializer_context())
+        if rows is not None:
+            queryset = rows.prepare(queryset)
+        
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = EnrollmentSerializer(page, many=True)
+            if rows is not None:
+                return self.get_paginated_response(rows.serialize(page))
+            serializer = EnrollmentSerializer(page, many=True, context=self.get_serializer_context())
             return self.get_paginated_response(serializer.data)
         
-        serializer = EnrollmentSerializer(queryset, many=True)
+        if rows is not None:
+            data = rows.serialize(queryset)
+        else:
+            data = EnrollmentSerializer(queryset, many=True, context=self.get_serializer_context()).data
         return success_response(
-            data=serializer.data,
+            data=data,
             message='Enrollments retrieved successfully'
         )
     
@@ -206,21 +284,35 @@ class EnrollmentListCreateView(generics.ListCreateAPIView):
         try:
             serializer.is_valid(raise_exception=True)
             
-            from students.models import Student
-            student = Student.objects.get(id=serializer.validated_data['student_id'])
-            course = Course.objects.get(id=serializer.validated_data['course_id'])
-            
+            # Enrollment.save() claims the seat with a conditional UPDATE on the
+            # course row, so concurrent requests cannot overbook the course
             enrollment = Enrollment.objects.create(
-                student=student,
-                course=course
+                student=serializer.validated_data['student'],
+                course=serializer.validated_data['course']
             )
+            record_enrollment()
             
             return success_response(
-                data=EnrollmentSerializer(enrollment).data,
+                data=EnrollmentSerializer(enrollment, context=self.get_serializer_context()).data,
                 message='Enrollment created successfully',
                 status_code=status.HTTP_201_CREATED
             )
+        except CourseFullError as e:
+            record_enrollment(result='full')
+            return error_response(
+                message='Enrollment creation failed',
+                details=e.message_dict,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except IntegrityError:
+            record_enrollment(result='duplicate')
+            return error_response(
+                message='Enrollment creation failed',
+                details={'non_field_errors': ['Student is already enrolled in this course.']},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
+            record_enrollment(serializer.errors if hasattr(serializer, 'errors') else {})
             return error_response(
                 message='Enrollment creation failed',
                 details=serializer.errors if hasattr(serializer, 'errors') else str(e),
@@ -228,7 +320,35 @@ class EnrollmentListCreateView(generics.ListCreateAPIView):
             )
 
 
-class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EnrollmentBulkCreateView(views.APIView):
+    """
+    API endpoint to enroll many students at once
+    POST /api/courses/enrollments/bulk/ - Only admins and teachers
+    """
+    permission_classes = [IsAdminOrTeacher]
+    
+    def post(self, request):
+        serializer = EnrollmentBulkCreateSerializer(data=request.data)
+        
+        try:
+            serializer.is_valid(raise_exception=True)
+            result = serializer.save()
+            for row in result['results']:
+                record_enrollment(row['errors'])
+            
+            return success_response(
+                data=result,
+                message=f"Bulk enrollment processed: {result['created']} created, {result['failed']} failed"
+            )
+        except Exception as e:
+            return error_response(
+                message='Bulk enrollment failed',
+                details=serializer.errors if hasattr(serializer, 'errors') else str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class EnrollmentDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to get, update, or delete a specific enrollment
     GET /api/courses/enrollments/<id>/ - All authenticated users (students see their own)
@@ -237,6 +357,8 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     DELETE /api/courses/enrollments/<id>/ - Only admins and teachers
     """
     queryset = Enrollment.objects.select_related('student__user', 'course__teacher__user').all()
+    read_serializer_class = EnrollmentSerializer
+    allow_claims_user = True
     
     def get_permissions(self):
         """
@@ -255,12 +377,10 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         if user.is_student():
             # Students only see their own enrollments
-            from students.models import Student
-            try:
-                student = Student.objects.get(user=user)
-                return queryset.filter(student=student)
-            except Student.DoesNotExist:
+            student_id = user.student_profile_id
+            if student_id is None:
                 return queryset.none()
+            return queryset.filter(student_id=student_id)
         
         # Admins and teachers see all enrollments
         return queryset
@@ -272,7 +392,7 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = EnrollmentSerializer(instance)
+        serializer = EnrollmentSerializer(instance, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Enrollment retrieved successfully'
@@ -288,9 +408,15 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
             self.perform_update(serializer)
             
             return success_response(
-                data=EnrollmentSerializer(instance).data,
+                data=EnrollmentSerializer(instance, context=self.get_serializer_context()).data,
                 message='Enrollment updated successfully'
             )
+        except CourseFullError as e:
+            return error_response(
+                message='Enrollment update failed',
+                details=e.message_dict,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return error_response(
                 message='Enrollment update failed',
@@ -305,3 +431,176 @@ class EnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
             message='Enrollment deleted successfully',
             status_code=status.HTTP_204_NO_CONTENT
         )
+
+
+class WaitlistListCreateView(generics.ListCreateAPIView):
+    """
+    API endpoint to list and join course waitlists
+    GET /api/courses/waitlist/ - All authenticated users (students see their own)
+    POST /api/courses/waitlist/ - All authenticated users (students queue themselves)
+    """
+    queryset = WaitlistEntry.objects.select_related('student', 'course').with_positions()
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['course', 'student']
+    allow_claims_user = True
+    
+    def get_queryset(self):
+        """
+        Students see only their own entries, teachers/admins see all
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+        
+        if user.is_student():
+            return queryset.filter(student__user_id=user.id)
+        
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return WaitlistEntryCreateSerializer
+        return WaitlistEntrySerializer
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        
+        if page is not None:
+            serializer = WaitlistEntrySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = WaitlistEntrySerializer(queryset, many=True)
+        return success_response(
+            data=serializer.data,
+            message='Waitlist entries retrieved successfully'
+        )
+    
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        
+        try:
+            serializer.is_valid(raise_exception=True)
+            
+            entry = WaitlistEntry.objects.create(
+                student=serializer.validated_data['student'],
+                course=serializer.validated_data['course']
+            )
+            entry = self.get_queryset().get(pk=entry.pk)
+            
+            return success_response(
+                data=WaitlistEntrySerializer(entry).data,
+                message='Added to waitlist successfully',
+                status_code=status.HTTP_201_CREATED
+            )
+        except IntegrityError:
+            return error_response(
+                message='Waitlist join failed',
+                details={'non_field_errors': ['Student is already on the waitlist for this course.']},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return error_response(
+                message='Waitlist join failed',
+                details=serializer.errors if hasattr(serializer, 'errors') else str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class WaitlistEntryDetailView(generics.RetrieveDestroyAPIView):
+    """
+    API endpoint to check or leave a waitlist position
+    GET /api/courses/waitlist/<id>/ - Entry with its current queue position
+    DELETE /api/courses/waitlist/<id>/ - Leave the waitlist
+    """
+    queryset = WaitlistEntry.objects.select_related('student', 'course').with_positions()
+    serializer_class = WaitlistEntrySerializer
+    allow_claims_user = True
+    
+    def get_queryset(self):
+        """
+        Students see only their own entries, teachers/admins see all
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+        
+        if user.is_student():
+            return queryset.filter(student__user_id=user.id)
+        
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return success_response(
+            data=serializer.data,
+            message='Waitlist entry retrieved successfully'
+        )
+    
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.perform_destroy(instance)
+        return success_response(
+            message='Removed from waitlist successfully',
+            status_code=status.HTTP_204_NO_CONTENT
+        )
+
+
+class CourseExportView(ExportMixin, CourseListCreateView):
+    """
+    API endpoint to export courses as CSV or NDJSON
+    GET /api/courses/export/?format=csv
+    GET /api/courses/export/?format=ndjson
+    Accepts the same filters, search and ordering as the course list.
+    """
+    permission_classes = [IsAuthenticated]
+    export_name = 'courses'
+    export_columns = (
+        ('id', 'id'),
+        ('course_code', 'course_code'),
+        ('course_name', 'course_name'),
+        ('description', 'description'),
+        ('teacher_id', 'teacher_id'),
+        ('teacher_code', 'teacher__teacher_id'),
+        ('teacher_name', Concat('teacher__user__first_name', Value(' '), 'teacher__user__last_name')),
+        ('credits', 'credits'),
+        ('semester', 'semester'),
+        ('academic_year', 'academic_year'),
+        ('schedule', 'schedule'),
+        ('room', 'room'),
+        ('max_students', 'max_students'),
+        ('enrolled_count', 'seats_taken'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+    
+    def get_permissions(self):
+        """
+        Exports are GET only; unlike the course list they need a signed-in user
+        """
+        return [permission() for permission in self.permission_classes]
+
+
+class EnrollmentExportView(ExportMixin, EnrollmentListCreateView):
+    """
+    API endpoint to export enrollments (rosters and grades) as CSV or NDJSON
+    GET /api/courses/enrollments/export/?format=csv
+    GET /api/courses/enrollments/export/?format=ndjson
+    Students export only their own enrollments; filters match the enrollment list.
+    """
+    export_name = 'enrollments'
+    export_columns = (
+        ('id', 'id'),
+        ('student_id', 'student_id'),
+        ('student_code', 'student__student_id'),
+        ('student_name', Concat('student__user__first_name', Value(' '), 'student__user__last_name')),
+        ('course_id', 'course_id'),
+        ('course_code', 'course__course_code'),
+        ('course_name', 'course__course_name'),
+        ('enrollment_date', 'enrollment_date'),
+        ('status', 'status'),
+        ('grade', 'grade'),
+        ('grade_points', 'grade_points'),
+        ('updated_at', 'updated_at'),
+    )
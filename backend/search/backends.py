@@ -0,0 +1,150 @@
+"""
+Full-text matching against search documents
+
+A backend turns the ?search= terms into the database's full-text query
+and narrows a queryset of entities to those whose document matches,
+annotated with search_rank (higher is more relevant), optionally
+widened by a plain condition (search.filters' substring match on IDs,
+codes and emails). get_backend() returns None where full-text search
+is unavailable or turned off (settings.SEARCH['BACKEND'] = 'like'), and
+match() returns None for terms the index cannot answer; callers then
+fall back to LIKE.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# Letters and digits; everything else, underscore included, separates
+# tokens, as in MySQL's full-text parser and FTS5's unicode61 tokenizer
+TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(terms):
+    return [token.lower() for term in terms for token in TOKEN.findall(term)]
+
+
+class FullTextBackend:
+    """Base class; subclasses build the vendor's MATCH syntax"""
+    def __init__(self, connection):
+        self.connection = connection
+        self.quote = connection.ops.quote_name
+
+    def match(self, queryset, document, tokens, also=None):
+        """
+        `queryset` narrowed to entities whose document matches `tokens`,
+        or that satisfy the Q object `also`, annotated with search_rank
+        (NULL for rows matched only through `also`). None if the index
+        cannot answer.
+        """
+        query = self.query(document, tokens)
+        if query is None:
+            return None
+        condition = Q(pk__in=self.matching_keys(document, query))
+        if also is not None:
+            condition |= also
+        return queryset.filter(condition).annotate(search_rank=self.rank(queryset, document, query))
+
+    def query(self, document, tokens):
+        """The vendor's MATCH argument for `tokens`, or None"""
+        raise NotImplementedError
+
+    def matching_keys(self, document, query):
+        raise NotImplementedError
+
+    def rank(self, queryset, document, query):
+        raise NotImplementedError
+
+    def outer_key(self, queryset):
+        """Primary key column of the entity table in the outer query"""
+        meta = queryset.model._meta
+        return f"{self.quote(meta.db_table)}.{self.quote(meta.pk.column)}"
+
+    def document_columns(self, document):
+        meta = document._meta
+        return self.quote(meta.db_table), self.quote(meta.pk.column)
+
+
+class MySQLBackend(FullTextBackend):
+    """
+    MATCH ... AGAINST in boolean mode against the FULLTEXT index: every
+    token is required and matches as a word prefix ('+smi* +jo*').
+    InnoDB does not index words shorter than innodb_ft_min_token_size,
+    so searches containing one go to LIKE instead.
+    """
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.min_token_length = getattr(settings, 'SEARCH', {}).get('MYSQL_MIN_TOKEN_LENGTH', 3)
+
+    def query(self, document, tokens):
+        if any(len(token) < self.min_token_length for token in tokens):
+            return None
+        return ' '.join(f"+{token}*" for token in tokens)
+
+    def against(self, document):
+        table, key = self.document_columns(document)
+        return f"MATCH ({table}.{self.quote('body')}) AGAINST (%s IN BOOLEAN MODE)"
+
+    def matching_keys(self, document, query):
+        table, key = self.document_columns(document)
+        return RawSQL(f"SELECT {key} FROM {table} WHERE {self.against(document)}", [query])
+
+    def rank(self, queryset, document, query):
+        table, key = self.document_columns(document)
+        return RawSQL(
+            f"SELECT {self.against(document)} FROM {table} WHERE {table}.{key} = {self.outer_key(queryset)}",
+            [query],
+            output_field=FloatField(),
+        )
+
+
+class SQLiteBackend(FullTextBackend):
+    """
+    FTS5 MATCH against <document table>_fts, every token required as a
+    prefix ('"smi"* "jo"*'), ranked by bm25. Needs the FTS5 table created
+    by the search migrations, which SQLite builds without FTS5 skip.
+    """
+    _available = {}
+
+    def fts_table(self, document):
+        return f"{document._meta.db_table}_fts"
+
+    def available(self, document):
+        key = (self.connection.alias, document)
+        if key not in self._available:
+            self._available[key] = self.fts_table(document) in self.connection.introspection.table_names()
+        return self._available[key]
+
+    def query(self, document, tokens):
+        if not self.available(document):
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matching_keys(self, document, query):
+        fts = self.quote(self.fts_table(document))
+        return RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [query])
+
+    def rank(self, queryset, document, query):
+        fts = self.quote(self.fts_table(document))
+        return RawSQL(
+            f"SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {self.outer_key(queryset)}",
+            [query],
+            output_field=FloatField(),
+        )
+
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def get_backend(alias):
+    """The full-text backend for a database alias, or None to use LIKE"""
+    if getattr(settings, 'SEARCH', {}).get('BACKEND', 'fulltext') != 'fulltext':
+        return None
+    connection = connections[alias]
+    backend_class = BACKENDS.get(connection.vendor)
+    return backend_class(connection) if backend_class else None
@@ -0,0 +1,56 @@
+"""
+Search filter backend for the list endpoints
+"""
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .backends import get_backend, tokenize
+from .index import document_for
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= answered from the entity's search document and the
+    database's full-text index (search.backends) instead of LIKE
+    '%term%' across search_fields. Every term must match the start of a
+    word, or be contained in one of the document's identifier_fields
+    (IDs, codes, emails), as with LIKE; results come most relevant first,
+    then in the view's ordering, unless ?ordering= is given.
+
+    Falls back to SearchFilter's LIKE over search_fields when the model
+    has no search document, the database has no full-text index, the
+    terms cannot be answered by it, or nothing matched, so a fragment
+    from the middle of a name ('ace' for Grace) is still found. List it
+    after OrderingFilter so the relevance ordering is not overridden.
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        
+        document = document_for(queryset.model)
+        backend = get_backend(queryset.db) if document is not None else None
+        tokens = tokenize(terms)
+        matched = (
+            backend.match(queryset, document, tokens, also=self.identifier_match(document, terms))
+            if backend and tokens else None
+        )
+        if matched is None or not matched.exists():
+            return super().filter_queryset(request, queryset, view)
+        
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return matched
+        return matched.order_by('-search_rank', *(queryset.query.order_by or queryset.model._meta.ordering))
+    
+    def identifier_match(self, document, terms):
+        """Every term contained in one of the document's identifier fields"""
+        if not document.identifier_fields:
+            return None
+        return reduce(operator.and_, (
+            reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in document.identifier_fields))
+            for term in terms
+        ))
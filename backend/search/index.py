@@ -0,0 +1,84 @@
+"""
+Building search documents from the entities they index
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.constants import LOOKUP_SEP
+
+from .models import CourseDocument, StudentDocument, TeacherDocument
+
+DOCUMENTS = (StudentDocument, TeacherDocument, CourseDocument)
+WRITE_BATCH_SIZE = 1000
+
+
+def entity_model(document):
+    return document._meta.pk.related_model
+
+
+def document_for(model):
+    """The search document model indexing `model`, or None"""
+    model = model._meta.concrete_model
+    for document in DOCUMENTS:
+        if entity_model(document) is model:
+            return document
+    return None
+
+
+def document_body(values):
+    return ' '.join(str(value) for value in values if value not in (None, ''))
+
+
+def update_documents(queryset, using=DEFAULT_DB_ALIAS):
+    """
+    Rewrite the search documents of every entity in `queryset` whose text
+    changed. The source fields and the current document body come from one
+    SELECT, so a save that leaves the text alone costs no write. Returns
+    the number of documents written.
+    """
+    document = document_for(queryset.model)
+    key = document._meta.pk.attname
+    current = f"{document._meta.pk.remote_field.related_name}__body"
+    rows = queryset.using(using).order_by().values_list('pk', current, *document.source_fields)
+    documents = []
+    for pk, body, *values in rows:
+        text = document_body(values)
+        if text != body:
+            documents.append(document(**{key: pk}, body=text))
+    if not documents:
+        return 0
+
+    # One INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE per batch; MySQL
+    # takes no conflict target
+    features = connections[using].features
+    unique_fields = [key] if features.supports_update_conflicts_with_target else None
+    document.objects.using(using).bulk_create(
+        documents,
+        batch_size=WRITE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['body'],
+    )
+    return len(documents)
+
+
+def dependencies():
+    """
+    Every model whose rows feed a search document, as
+    (model, entity, lookup, fields): saving a `model` row that changes
+    one of `fields` rewrites the documents of the entities matching
+    {lookup: row.pk}. For CourseDocument's 'teacher__user__first_name'
+    that gives Course ('pk', teacher), Teacher ('teacher', user) and
+    User ('teacher__user', first_name).
+    """
+    found = {}
+    for document in DOCUMENTS:
+        entity = entity_model(document)
+        for path in document.source_fields:
+            *relations, name = path.split(LOOKUP_SEP)
+            model = entity
+            for depth in range(len(relations) + 1):
+                lookup = LOOKUP_SEP.join(relations[:depth]) or 'pk'
+                field = relations[depth] if depth < len(relations) else name
+                found.setdefault((model, entity, lookup), set()).add(field)
+                if depth < len(relations):
+                    model = model._meta.get_field(relations[depth]).related_model
+    return [(model, entity, lookup, fields) for (model, entity, lookup), fields in found.items()]
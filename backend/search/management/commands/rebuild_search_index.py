@@ -0,0 +1,66 @@
+"""
+Rebuild the search documents behind ?search=
+
+Documents follow saves automatically; run this after bulk loads that
+bypass model signals (bulk_create, queryset.update(), raw SQL) or after
+changing a document's source_fields.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model student --model course
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from search.index import DOCUMENTS, entity_model, update_documents
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the student, teacher and course search documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            choices=[entity_model(document)._meta.model_name for document in DOCUMENTS],
+            help='Entity to rebuild (repeatable); defaults to all',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Entities read and written per batch',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        using = options['database']
+
+        for document in DOCUMENTS:
+            entity = entity_model(document)
+            if options['model'] and entity._meta.model_name not in options['model']:
+                continue
+
+            # Documents of deleted entities go with them (CASCADE); this
+            # only clears rows left behind by raw deletes
+            orphans = document.objects.using(using).exclude(
+                pk__in=entity.objects.using(using).values('pk')
+            ).delete()[0]
+
+            pks = list(entity.objects.using(using).order_by('pk').values_list('pk', flat=True))
+            written = 0
+            for start in range(0, len(pks), options['batch_size']):
+                batch = pks[start:start + options['batch_size']]
+                written += update_documents(entity.objects.filter(pk__in=batch), using=using)
+
+            self.stdout.write(
+                f"{entity._meta.verbose_name_plural}: {written} document(s) written, {orphans} orphan(s) removed"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
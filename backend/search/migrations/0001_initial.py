@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('students', '0004_keyset_pagination_indexes'),
+        ('courses', '0004_keyset_pagination_indexes'),
+        ('teachers', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseDocument',
+            fields=[
+                ('body', models.TextField()),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='courses.course')),
+            ],
+            options={
+                'db_table': 'search_courses',
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentDocument',
+            fields=[
+                ('body', models.TextField()),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='students.student')),
+            ],
+            options={
+                'db_table': 'search_students',
+            },
+        ),
+        migrations.CreateModel(
+            name='TeacherDocument',
+            fields=[
+                ('body', models.TextField()),
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='teachers.teacher')),
+            ],
+            options={
+                'db_table': 'search_teachers',
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:30
+
+from django.db import migrations
+
+# (table, key column, entity app, entity model, source fields) as of this migration
+DOCUMENTS = [
+    ('search_students', 'student_id', 'students', 'Student',
+     ('student_id', 'user__first_name', 'user__last_name', 'user__email')),
+    ('search_teachers', 'teacher_id', 'teachers', 'Teacher',
+     ('teacher_id', 'user__first_name', 'user__last_name', 'user__email', 'specialization')),
+    ('search_courses', 'course_id', 'courses', 'Course',
+     ('course_code', 'course_name', 'teacher__user__first_name', 'teacher__user__last_name')),
+]
+
+
+def fts5_available(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    """
+    MySQL: a FULLTEXT index on body. SQLite: an FTS5 table over body
+    (external content, no second copy of the text) kept in step with
+    the document table by triggers. Other databases search with LIKE.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        for table, _, _, _, _ in DOCUMENTS:
+            schema_editor.execute(f"CREATE FULLTEXT INDEX {table}_body_ft ON {table} (body)")
+    elif connection.vendor == 'sqlite' and fts5_available(connection):
+        for table, key, _, _, _ in DOCUMENTS:
+            fts = f"{table}_fts"
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5(body, content='{table}', content_rowid='{key}')"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, body) VALUES (new.{key}, new.body); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, body) VALUES ('delete', old.{key}, old.body); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_au AFTER UPDATE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, body) VALUES ('delete', old.{key}, old.body); "
+                f"INSERT INTO {fts}(rowid, body) VALUES (new.{key}, new.body); END"
+            )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        for table, _, _, _, _ in DOCUMENTS:
+            schema_editor.execute(f"DROP INDEX {table}_body_ft ON {table}")
+    elif connection.vendor == 'sqlite':
+        for table, _, _, _, _ in DOCUMENTS:
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+def build_documents(apps, schema_editor):
+    db_alias = schema_editor.connection.alias
+    for table, key, app_label, model_name, fields in DOCUMENTS:
+        entity = apps.get_model(app_label, model_name)
+        document = apps.get_model('search', f"{model_name}Document")
+        rows = entity.objects.using(db_alias).order_by().values_list('pk', *fields)
+        document.objects.using(db_alias).bulk_create(
+            [
+                document(**{key: row[0]}, body=' '.join(str(value) for value in row[1:] if value not in (None, '')))
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('accounts', '0003_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
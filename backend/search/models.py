@@ -0,0 +1,71 @@
+"""
+Search Document Models
+
+One row per student, teacher and course holding the text its list
+endpoint searches, flattened from the entity and its related rows so a
+single full-text index covers it. Rows are kept current by
+search.signals and rebuilt by the rebuild_search_index command.
+"""
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Base for search documents. The primary key is a one-to-one link to
+    the indexed entity; source_fields are the field paths, relative to
+    that entity, concatenated into body. identifier_fields, a subset of
+    them, are also matched as substrings ('MATH107', part of an email),
+    which the full-text index's word-prefix matching would miss.
+    """
+    body = models.TextField()
+    
+    source_fields = ()
+    identifier_fields = ()
+    
+    class Meta:
+        abstract = True
+
+
+class StudentDocument(SearchDocument):
+    student = models.OneToOneField(
+        'students.Student',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    
+    source_fields = ('student_id', 'user__first_name', 'user__last_name', 'user__email')
+    identifier_fields = ('student_id', 'user__email')
+    
+    class Meta:
+        db_table = 'search_students'
+
+
+class TeacherDocument(SearchDocument):
+    teacher = models.OneToOneField(
+        'teachers.Teacher',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    
+    source_fields = ('teacher_id', 'user__first_name', 'user__last_name', 'user__email', 'specialization')
+    identifier_fields = ('teacher_id', 'user__email')
+    
+    class Meta:
+        db_table = 'search_teachers'
+
+
+class CourseDocument(SearchDocument):
+    course = models.OneToOneField(
+        'courses.Course',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    
+    source_fields = ('course_code', 'course_name', 'teacher__user__first_name', 'teacher__user__last_name')
+    identifier_fields = ('course_code',)
+    
+    class Meta:
+        db_table = 'search_courses'
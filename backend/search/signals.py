@@ -0,0 +1,56 @@
+"""
+Signal handlers keeping search documents current
+"""
+from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_delete
+
+from .index import dependencies, update_documents
+
+WATCHED = {}
+NULLED_ON_DELETE = {}
+for model, entity, lookup, fields in dependencies():
+    WATCHED.setdefault(model, []).append((entity, lookup, frozenset(fields)))
+    # Deleting the target of a SET_NULL foreign key (a course's teacher)
+    # changes the entity without a save; CASCADE takes the document along
+    # and longer paths are covered by the signals of the row in between
+    if lookup != 'pk' and lookup in {field.name for field in entity._meta.get_fields()}:
+        if entity._meta.get_field(lookup).remote_field.on_delete is models.SET_NULL:
+            NULLED_ON_DELETE.setdefault(model, []).append((entity, lookup))
+
+
+def update_on_save(sender, instance, created, raw, using, update_fields=None, **kwargs):
+    """
+    Rewrite the documents built from a saved row. Saves limited to
+    update_fields that no document uses (last_login, GPA totals, ...)
+    are skipped, as are related rows that were just created and cannot
+    be referenced by any entity yet.
+    """
+    if raw:
+        return
+    for entity, lookup, fields in WATCHED[sender]:
+        if update_fields is not None and not fields.intersection(update_fields):
+            continue
+        if created and lookup != 'pk':
+            continue
+        update_documents(entity.objects.filter(**{lookup: instance.pk}), using=using)
+
+
+def remember_dependents(sender, instance, using, **kwargs):
+    """Note the entities whose foreign key to a row about to be deleted will be nulled"""
+    instance._search_dependents = [
+        (entity, list(entity.objects.using(using).filter(**{lookup: instance.pk}).values_list('pk', flat=True)))
+        for entity, lookup in NULLED_ON_DELETE[sender]
+    ]
+
+
+def update_on_delete(sender, instance, using, **kwargs):
+    for entity, pks in getattr(instance, '_search_dependents', ()):
+        if pks:
+            update_documents(entity.objects.filter(pk__in=pks), using=using)
+
+
+for model in WATCHED:
+    post_save.connect(update_on_save, sender=model, dispatch_uid=f'search-save-{model.__name__}')
+for model in NULLED_ON_DELETE:
+    pre_delete.connect(remember_dependents, sender=model, dispatch_uid=f'search-pre-delete-{model.__name__}')
+    post_delete.connect(update_on_delete, sender=model, dispatch_uid=f'search-delete-{model.__name__}')
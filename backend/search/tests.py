@@ -0,0 +1,81 @@
+import datetime
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from courses.models import Course
+from courses.views import CourseListCreateView
+from students.models import Student
+from students.views import StudentListCreateView
+from teachers.models import Teacher
+
+from .backends import get_backend
+from .filters import FullTextSearchFilter
+
+
+class SearchParityTests(TestCase):
+    """?search= finds the same rows through the full-text index and LIKE"""
+    @classmethod
+    def setUpTestData(cls):
+        teacher_user = User.objects.create_user(
+            'grace.heng@school.edu', 'pw', username='gheng', first_name='Grace', last_name='Heng', role='TEACHER'
+        )
+        teacher = Teacher.objects.create(
+            user=teacher_user, teacher_id='T0001', department='MATH', specialization='Algebra', qualification='MSc'
+        )
+        names = [('John', 'Smith'), ('Joanne', 'Smithers'), ('Anna', 'Lee'), ('Bob', 'Stanley')]
+        for i, (first_name, last_name) in enumerate(names):
+            user = User.objects.create_user(
+                f"{first_name.lower()}.{last_name.lower()}@school.edu", 'pw',
+                username=f"student{i}", first_name=first_name, last_name=last_name, role='STUDENT'
+            )
+            Student.objects.create(
+                user=user, student_id=f"S{300 + i:07d}", date_of_birth=datetime.date(2010, 1, 1), gender='M',
+                grade='10', emergency_contact_name='e', emergency_contact_phone='1', emergency_contact_relation='r'
+            )
+        for code, name in [('GENMATH107-241', 'Mathematics 107'), ('GENENGL110-241', 'English 110'),
+                           ('GENHIST201-241', 'History 201')]:
+            Course.objects.create(
+                course_code=code, course_name=name, teacher=teacher, semester='1', academic_year='2024-2025',
+                schedule='s', room='r', max_students=30
+            )
+
+    def search(self, view_class, term):
+        request = Request(APIRequestFactory().get('/', {'search': term}))
+        view = view_class()
+        view.request = request
+        queryset = view_class.queryset.model.objects.all()
+        return set(FullTextSearchFilter().filter_queryset(request, queryset, view).values_list('pk', flat=True))
+
+    def assertSameResults(self, view_class, term, expected):
+        self.assertIsNotNone(get_backend('default'))
+        fulltext = self.search(view_class, term)
+        with override_settings(SEARCH={**settings.SEARCH, 'BACKEND': 'like'}):
+            like = self.search(view_class, term)
+        self.assertEqual(fulltext, like, term)
+        self.assertEqual(len(fulltext), expected, term)
+
+    def test_course_codes(self):
+        self.assertSameResults(CourseListCreateView, 'MATH107', 1)
+        self.assertSameResults(CourseListCreateView, 'math10', 1)
+        self.assertSameResults(CourseListCreateView, '-241', 3)
+
+    def test_student_ids(self):
+        self.assertSameResults(StudentListCreateView, 'S0000300', 1)
+        self.assertSameResults(StudentListCreateView, '0000302', 1)
+
+    def test_email_fragments(self):
+        self.assertSameResults(StudentListCreateView, 'n.smith', 1)
+        self.assertSameResults(StudentListCreateView, '@school', 4)
+
+    def test_word_prefixes(self):
+        self.assertSameResults(StudentListCreateView, 'smi', 2)
+        self.assertSameResults(StudentListCreateView, 'jo smi', 2)
+        self.assertSameResults(CourseListCreateView, 'grace hist', 1)
+
+    def test_fragment_inside_a_name(self):
+        self.assertSameResults(StudentListCreateView, 'tanl', 1)
+        self.assertSameResults(CourseListCreateView, 'ace', 3)
@@ -0,0 +1,160 @@
+"""
+Liveness/readiness probes and database connection statistics
+
+Connections are persistent (DATABASES[...]['CONN_MAX_AGE']): every worker
+thread keeps one connection per database alias and reuses it across
+requests until it expires or, with CONN_HEALTH_CHECKS, fails the ping run
+before its first query of a request. The counters below are per process
+and count, for every alias, connections opened, requests that started on
+an already open connection, and reused connections that turned out to be
+dead and had to be replaced. GET /health/ready runs SELECT 1 on every
+alias and reports them alongside the connection settings.
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Per-process connection counters for one database alias"""
+    def __init__(self):
+        self.opened = 0
+        self.reused = 0
+        self.stale = 0
+        self.wrappers = weakref.WeakSet()
+
+    def snapshot(self):
+        wrappers = list(self.wrappers)
+        return {
+            'open': sum(1 for wrapper in wrappers if wrapper.connection is not None),
+            'opened': self.opened,
+            'reused': self.reused,
+            'stale': self.stale,
+        }
+
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def stats_for(alias):
+    with _lock:
+        stats = _stats.get(alias)
+        if stats is None:
+            stats = _stats[alias] = ConnectionStats()
+        return stats
+
+
+def _connection_opened(sender, connection, **kwargs):
+    stats = stats_for(connection.alias)
+    with _lock:
+        stats.opened += 1
+        stats.wrappers.add(connection)
+        if getattr(connection, 'reused_in_request', False):
+            # Open at the start of the request, yet reconnected: the
+            # health check (or the first query) found it dead
+            stats.stale += 1
+    connection.reused_in_request = False
+    connection.opened_at = time.monotonic()
+
+
+def _request_started(sender, **kwargs):
+    # Connected after django.db's close_old_connections, so expired
+    # connections have already been closed at this point
+    for connection in connections.all(initialized_only=True):
+        reused = connection.connection is not None
+        connection.reused_in_request = reused
+        if reused:
+            stats = stats_for(connection.alias)
+            with _lock:
+                stats.reused += 1
+                stats.wrappers.add(connection)
+
+
+connection_created.connect(_connection_opened, dispatch_uid='sms_backend.health.opened')
+request_started.connect(_request_started, dispatch_uid='sms_backend.health.request')
+
+
+def pool_size(alias):
+    """Size of the mysql-connector pool behind an alias, None without one"""
+    return settings.DATABASES[alias].get('OPTIONS', {}).get('pool_size')
+
+
+def connection_info(connection):
+    """Settings and lifetime of this thread's connection to one alias"""
+    now = time.monotonic()
+    opened_at = getattr(connection, 'opened_at', None)
+    info = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'pool_size': pool_size(connection.alias),
+        'age_seconds': round(now - opened_at, 1) if opened_at is not None else None,
+        'expires_in_seconds': (
+            round(max(connection.close_at - now, 0.0), 1) if connection.close_at is not None else None
+        ),
+    }
+    info.update(stats_for(connection.alias).snapshot())
+    return info
+
+
+def check_database(alias):
+    """
+    Run SELECT 1 on one alias through this thread's (persistent) connection.
+    Returns (ok, report); failures are logged with their message but only
+    the exception class is reported.
+    """
+    connection = connections[alias]
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as e:
+        logger.error('Database %s is not ready: %s', alias, e)
+        report = {'ok': False, 'error': type(e).__name__}
+        report.update(connection_info(connection))
+        return False, report
+    report = {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+    report.update(connection_info(connection))
+    return True, report
+
+
+def check_databases():
+    """Check every configured alias; returns (all_ok, {alias: report})"""
+    reports = {}
+    ready = True
+    for alias in connections:
+        ok, reports[alias] = check_database(alias)
+        ready = ready and ok
+    return ready, reports
+
+
+def liveness_view(request):
+    """
+    GET /health/live - the process is up and serving requests.
+    Touches no database.
+    """
+    return JsonResponse({'status': 'alive', 'pid': os.getpid()})
+
+
+def readiness_view(request):
+    """
+    GET /health/ready - every database answers; 503 otherwise.
+    Includes this process's connection statistics.
+    """
+    ready, reports = check_databases()
+    return JsonResponse(
+        {'status': 'ready' if ready else 'unavailable', 'pid': os.getpid(), 'databases': reports},
+        status=200 if ready else 503,
+    )
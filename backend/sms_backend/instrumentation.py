@@ -0,0 +1,227 @@
+"""
+Per-request SQL and timing instrumentation
+
+RequestInstrumentationMiddleware samples requests and records, for each
+sampled one, the number of queries and total SQL time on every database
+connection, queries grouped by fingerprint (the SQL with literals and IN
+lists normalised), view time and render time. View time is the time spent
+in the view less its SQL, which for the API's views is mostly
+serialization. Streamed responses (exports) serialize while their body is
+read, after the view returns; that time is measured separately as the
+stream phase, along with the queries run meanwhile.
+
+The figures are sent back in a Server-Timing header (without the stream
+phase, which is not over yet) and logged as one JSON line at INFO on the
+'sms_backend.instrumentation' logger once the response is complete. A
+fingerprint that repeats N_PLUS_ONE_THRESHOLD or more times in one request
+is flagged as a likely N+1 and logged at WARNING, the logger's default
+level.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalise SQL so queries differing only in their parameters compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Counters collected while one sampled request is handled"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.fingerprints = {}
+        self.phases = {}
+        self.view_started = None
+        self.view_sql_time = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += elapsed
+            normalized = fingerprint(sql)
+            entry = self.fingerprints.get(normalized)
+            if entry is None:
+                entry = self.fingerprints[normalized] = {'count': 0, 'time': 0.0}
+            entry['count'] += 1
+            entry['time'] += elapsed
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def start_view(self):
+        self.view_started = time.perf_counter()
+        self.view_sql_time = self.sql_time
+
+    def end_view(self):
+        """Close the view phase, excluding the SQL run since it started"""
+        if self.view_started is not None:
+            elapsed = time.perf_counter() - self.view_started
+            self.add('view', max(elapsed - (self.sql_time - self.view_sql_time), 0.0))
+            self.view_started = None
+
+    def duplicates(self):
+        """Fingerprints run more than once, most frequent first"""
+        repeated = [
+            {
+                'fingerprint': hashlib.blake2b(sql.encode(), digest_size=6).hexdigest(),
+                'count': entry['count'],
+                'ms': round(entry['time'] * 1000, 2),
+                'sql': sql[:300],
+            }
+            for sql, entry in self.fingerprints.items()
+            if entry['count'] > 1
+        ]
+        return sorted(repeated, key=lambda item: -item['count'])
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records SQL, view, render and stream timings for a sample of requests.
+    Configured by settings.REQUEST_INSTRUMENTATION; requests that are not
+    sampled pass straight through.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = getattr(settings, 'REQUEST_INSTRUMENTATION', {})
+        self.enabled = options.get('ENABLED', True)
+        self.sample_rate = options.get('SAMPLE_RATE', 1.0)
+        self.server_timing = options.get('SERVER_TIMING', True)
+        self.threshold = options.get('N_PLUS_ONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with self.recording(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        # Views returning plain (non-template) responses end here
+        metrics.end_view()
+
+        total = time.perf_counter() - metrics.started
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(metrics, total)
+        if response.streaming:
+            response.streaming_content = self.stream(request, response, metrics, response.streaming_content)
+        else:
+            self.log(request, response, metrics, total)
+        return response
+
+    @contextmanager
+    def recording(self, metrics):
+        """Time the queries run on every connection inside the block"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.start_view()
+        return None
+
+    def process_template_response(self, request, response):
+        # Runs when the view has returned, right before the handler renders
+        # DRF responses
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.end_view()
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(self.rendered(metrics))
+        return response
+
+    def stream(self, request, response, metrics, content):
+        """
+        Pass a streamed body through, timing the reads of the wrapped
+        iterator (rows fetched and serialized chunk by chunk) as the stream
+        phase; the request is logged when the body is exhausted or closed
+        """
+        iterator = iter(content)
+        try:
+            while True:
+                sql_time = metrics.sql_time
+                started = time.perf_counter()
+                try:
+                    with self.recording(metrics):
+                        chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = time.perf_counter() - started
+                    metrics.add('stream', max(elapsed - (metrics.sql_time - sql_time), 0.0))
+                yield chunk
+        finally:
+            self.log(request, response, metrics, time.perf_counter() - metrics.started)
+
+    def rendered(self, metrics):
+        def callback(response):
+            metrics.add('render', time.perf_counter() - metrics.render_started)
+        return callback
+
+    def server_timing_header(self, metrics, total):
+        entries = [f'db;desc="{metrics.queries} queries";dur={metrics.sql_time * 1000:.2f}']
+        for phase in ('view', 'render'):
+            if phase in metrics.phases:
+                entries.append(f"{phase};dur={metrics.phases[phase] * 1000:.2f}")
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ', '.join(entries)
+
+    def log(self, request, response, metrics, total):
+        duplicates = metrics.duplicates()
+        n_plus_one = [item for item in duplicates if item['count'] >= self.threshold]
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(metrics.sql_time * 1000, 2),
+            'queries': metrics.queries,
+            'view_ms': round(metrics.phases.get('view', 0.0) * 1000, 2),
+            'render_ms': round(metrics.phases.get('render', 0.0) * 1000, 2),
+            'stream_ms': round(metrics.phases.get('stream', 0.0) * 1000, 2),
+            'duplicates': [
+                {key: item[key] for key in ('fingerprint', 'count', 'ms')} for item in duplicates
+            ],
+            'n_plus_one': n_plus_one,
+        }
+        level = logging.WARNING if n_plus_one else logging.INFO
+        logger.log(level, json.dumps(record))
@@ -0,0 +1,397 @@
+"""
+Prometheus-style metrics shared across worker processes
+
+Every process appends its samples to its own memory-mapped file in
+settings.METRICS['DIRECTORY'] (one slot per metric/label combination,
+updated in place), so recording a sample is a dict lookup and an 8-byte
+write. GET /metrics reads and sums the files of all processes, past and
+present, and renders them in the Prometheus text exposition format.
+Counters and histograms stay monotonic when summed across processes.
+Gauges hold values a process tracks itself and may reset (cache hit
+counts), so only the files of processes still running are summed for
+them.
+
+The endpoint is disabled (404) unless METRICS['AUTH_TOKEN'] is set.
+"""
+import bisect
+import glob
+import hmac
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+_HEADER = struct.Struct('i')
+_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+_INITIAL_SIZE = 64 * 1024
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def metrics_directory():
+    options = getattr(settings, 'METRICS', {})
+    return options.get('DIRECTORY') or os.path.join(tempfile.gettempdir(), 'sms-metrics')
+
+
+class MmapedValues:
+    """
+    Append-only key -> float map stored in a memory-mapped file.
+    Layout: a 4-byte count of used bytes, then entries of a 4-byte key
+    length, the UTF-8 key padded to 8 bytes and an 8-byte double.
+    """
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            with open(path, 'wb') as handle:
+                handle.write(b'\0' * _INITIAL_SIZE)
+        self._file = open(path, 'r+b')
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, _, offset in self._entries(self._map, self._used)}
+
+    @staticmethod
+    def _entries(buffer, used):
+        position = _HEADER.size
+        while position < used:
+            length = _LENGTH.unpack_from(buffer, position)[0]
+            position += _LENGTH.size
+            key = bytes(buffer[position:position + length]).decode('utf-8')
+            position += length + (-(_LENGTH.size + length) % 8)
+            yield key, _VALUE.unpack_from(buffer, position)[0], position
+            position += _VALUE.size
+
+    @classmethod
+    def read(cls, path):
+        """All (key, value) pairs of a file, without keeping it open"""
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        if len(data) < _HEADER.size:
+            return []
+        used = _HEADER.unpack_from(data, 0)[0]
+        return [(key, value) for key, value, _ in cls._entries(data, used)]
+
+    def _slot(self, key):
+        offset = self._offsets.get(key)
+        if offset is None:
+            encoded = key.encode('utf-8')
+            padding = -(_LENGTH.size + len(encoded)) % 8
+            size = _LENGTH.size + len(encoded) + padding + _VALUE.size
+            while self._used + size > self._capacity:
+                self._grow()
+            _LENGTH.pack_into(self._map, self._used, len(encoded))
+            self._map[self._used + _LENGTH.size:self._used + _LENGTH.size + len(encoded)] = encoded
+            offset = self._used + _LENGTH.size + len(encoded) + padding
+            _VALUE.pack_into(self._map, offset, 0.0)
+            self._used += size
+            _HEADER.pack_into(self._map, 0, self._used)
+            self._offsets[key] = offset
+        return offset
+
+    def _grow(self):
+        self._capacity *= 2
+        self._map.close()
+        self._file.truncate(self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def inc(self, key, amount):
+        offset = self._slot(key)
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def set(self, key, value):
+        _VALUE.pack_into(self._map, self._slot(key), value)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class ProcessStore:
+    """This process's metrics file, reopened after a fork"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._values = None
+
+    def _current(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            directory = metrics_directory()
+            os.makedirs(directory, exist_ok=True)
+            self._values = MmapedValues(os.path.join(directory, f"metrics_{pid}.db"))
+            self._pid = pid
+        return self._values
+
+    def inc(self, *increments):
+        """Add each (key, amount) pair"""
+        with self._lock:
+            values = self._current()
+            for key, amount in increments:
+                values.inc(key, amount)
+
+    def set(self, key, value):
+        with self._lock:
+            self._current().set(key, value)
+
+
+store = ProcessStore()
+registry = {}
+
+
+def _key(name, suffix, labels):
+    return json.dumps([name, suffix, labels], sort_keys=True, separators=(',', ':'))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        registry[name] = self
+
+    def keys(self, labels):
+        """Storage keys for a label set, built once per distinct set"""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        keys = self._keys.get(values)
+        if keys is None:
+            keys = self._keys[values] = self.build_keys(dict(zip(self.labelnames, values)))
+        return keys
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def build_keys(self, labels):
+        return _key(self.name, '_total', labels)
+
+    def inc(self, amount=1.0, **labels):
+        store.inc((self.keys(labels), amount))
+
+
+
+class Gauge(Metric):
+    """Current value per process; summed over running processes only"""
+    kind = 'gauge'
+
+    def build_keys(self, labels):
+        return _key(self.name, '', labels)
+
+    def set(self, value, **labels):
+        store.set(self.keys(labels), value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def build_keys(self, labels):
+        # Buckets are stored per interval and made cumulative when exposed
+        buckets = [
+            _key(self.name, '_bucket', dict(labels, le=_format(bound)))
+            for bound in self.buckets + (math.inf,)
+        ]
+        return buckets, _key(self.name, '_sum', labels), _key(self.name, '_count', labels)
+
+    def observe(self, value, **labels):
+        buckets, sum_key, count_key = self.keys(labels)
+        store.inc((buckets[bisect.bisect_left(self.buckets, value)], 1.0), (sum_key, value), (count_key, 1.0))
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(labels[key])}"' for key in sorted(labels))
+        return f"{name}{{{rendered}}} {_format(value)}"
+    return f"{name} {_format(value)}"
+
+
+def process_running(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Sum the samples of every process file: {(name, suffix, labels tuple): value}"""
+    totals = {}
+    for path in glob.glob(os.path.join(metrics_directory(), 'metrics_*.db')):
+        try:
+            entries = MmapedValues.read(path)
+        except OSError:
+            continue
+        pid = int(os.path.basename(path)[len('metrics_'):-len('.db')])
+        running = process_running(pid)
+        for key, value in entries:
+            name, suffix, labels = json.loads(key)
+            metric = registry.get(name)
+            if metric is not None and metric.kind == 'gauge' and not running:
+                continue
+            sample = (name, suffix, tuple(sorted(labels.items())))
+            totals[sample] = totals.get(sample, 0.0) + value
+    return totals
+
+
+def exposition():
+    """Render all registered metrics in the Prometheus text format"""
+    totals = collect()
+    by_metric = {}
+    for (name, suffix, labels), value in totals.items():
+        by_metric.setdefault(name, []).append((suffix, dict(labels), value))
+
+    lines = []
+    for name in sorted(by_metric):
+        metric = registry.get(name)
+        if metric is None:
+            continue
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        samples = by_metric[name]
+        if metric.kind in ('counter', 'gauge'):
+            sample_name = f"{name}_total" if metric.kind == 'counter' else name
+            for _, labels, value in sorted(samples, key=lambda item: sorted(item[1].items())):
+                lines.append(_sample(sample_name, labels, value))
+            continue
+
+        series = {}
+        for suffix, labels, value in samples:
+            bound = labels.pop('le', None)
+            entry = series.setdefault(tuple(sorted(labels.items())), {'buckets': {}, 'sum': 0.0, 'count': 0.0})
+            if suffix == '_bucket':
+                entry['buckets'][bound] = value
+            else:
+                entry[suffix[1:]] = value
+        for labels, entry in sorted(series.items()):
+            labels = dict(labels)
+            cumulative = 0.0
+            for bound in [_format(bucket) for bucket in metric.buckets] + ['+Inf']:
+                cumulative += entry['buckets'].get(bound, 0.0)
+                lines.append(_sample(f"{name}_bucket", dict(labels, le=bound), cumulative))
+            lines.append(_sample(f"{name}_sum", labels, entry['sum']))
+            lines.append(_sample(f"{name}_count", labels, entry['count']))
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('sms_http_requests', 'HTTP requests by URL name, method and status', ['view', 'method', 'status'])
+LATENCY = Histogram('sms_http_request_duration_seconds', 'Request latency by URL name', ['view', 'method'])
+QUERIES = Histogram(
+    'sms_db_queries_per_request', 'SQL queries issued per request by URL name', ['view'], buckets=QUERY_BUCKETS
+)
+# Copied from counters the caches keep in memory, which restart with the
+# process (and the user cache's on clear()), hence gauges
+USER_CACHE = Gauge(
+    'sms_user_cache_lookups', 'Authenticated user cache lookups by result since each process started', ['result']
+)
+REVOCATION = Gauge(
+    'sms_token_revocation_checks',
+    'Refresh token revocation checks by how they were answered since each process started',
+    ['result'],
+)
+
+
+def publish_cache_stats():
+    """Copy this process's cache counters into its metrics file"""
+    from accounts.revocation import revocation_store
+    from accounts.user_cache import user_cache
+
+    USER_CACHE.set(user_cache.hits, result='hit')
+    USER_CACHE.set(user_cache.misses, result='miss')
+    stats = revocation_store.stats()
+    REVOCATION.set(stats['bloom_negatives'], result='bloom_negative')
+    REVOCATION.set(stats['database_checks'], result='database')
+    REVOCATION.set(stats['checks'] - stats['bloom_negatives'] - stats['database_checks'], result='exact_lookup')
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and records latency and query histograms per URL name.
+    Cache counters are published at most once per PUBLISH_INTERVAL seconds.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = getattr(settings, 'METRICS', {})
+        self.enabled = options.get('ENABLED', True)
+        self.publish_interval = options.get('PUBLISH_INTERVAL', 5)
+        self.published = 0.0
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        LATENCY.observe(elapsed, view=view, method=request.method)
+        QUERIES.observe(queries[0], view=view)
+
+        now = time.monotonic()
+        if now - self.published >= self.publish_interval:
+            self.published = now
+            publish_cache_stats()
+        return response
+
+
+def metrics_view(request):
+    """
+    GET /metrics - Prometheus scrape endpoint.
+    Requires 'Authorization: Bearer <METRICS_AUTH_TOKEN>'; without a
+    configured token (or with metrics disabled) the endpoint is not served.
+    """
+    options = getattr(settings, 'METRICS', {})
+    token = options.get('AUTH_TOKEN')
+    if not options.get('ENABLED', True) or not token:
+        raise Http404('Metrics endpoint not configured')
+    supplied = request.META.get('HTTP_AUTHORIZATION', '')
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+
+    publish_cache_stats()
+    return HttpResponse(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
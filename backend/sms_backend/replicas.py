@@ -0,0 +1,151 @@
+"""
+Read-replica routing
+
+ReplicaMiddleware marks GET/HEAD/OPTIONS requests handled by a view of one
+of settings.DATABASE_REPLICAS['APPS']; while such a request runs (and
+while a streamed export is being read), ReplicaRouter sends reads of those
+apps' models to one replica, picked at random per request. Everything else
+uses the primary ('default'):
+
+- writes, and reads after the request has written anything;
+- reads inside transaction.atomic blocks;
+- models of other apps (users, revoked tokens), so authentication never
+  sees a lagging replica;
+- requests of a user who wrote within the last PIN_SECONDS, so a student
+  sees their own enrollment immediately. Pins are kept in
+  CACHES[CACHE_ALIAS], which should be shared across workers.
+
+Replica aliases are every configured database other than 'default'. With
+none configured the middleware removes itself and all reads stay on the
+primary.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def pin_cache():
+    return caches[getattr(settings, 'DATABASE_REPLICAS', {}).get('CACHE_ALIAS', 'default')]
+
+
+class ReplicaState:
+    """Routing decision for one replica-eligible request"""
+    def __init__(self, request, apps, replicas):
+        self.request = request
+        self.apps = apps
+        self.replicas = replicas
+        self.alias = None
+        self.wrote = False
+
+    def read_alias(self):
+        """
+        The replica this request reads from, chosen on the first read so
+        that DRF has authenticated request.user by then; the primary if
+        that user is pinned.
+        """
+        if self.alias is None:
+            user = getattr(self.request, 'user', None)
+            pinned = (
+                user is not None and user.is_authenticated and
+                pin_cache().get(pin_key(user.pk)) is not None
+            )
+            self.alias = DEFAULT_DB_ALIAS if pinned else random.choice(self.replicas)
+        return self.alias
+
+
+class ReplicaRouter:
+    """Database router; see the module docstring for the rules"""
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (
+            state is None or
+            state.wrote or
+            model._meta.app_label not in state.apps or
+            connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.read_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """
+    Enables replica reads for safe-method requests to the configured apps
+    and pins a user to the primary for PIN_SECONDS after each write.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = replica_aliases()
+        if not self.replicas:
+            raise MiddlewareNotUsed
+        options = getattr(settings, 'DATABASE_REPLICAS', {})
+        self.apps = frozenset(options.get('APPS', ()))
+        self.pin_seconds = options.get('PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        token = _routing.set(None)
+        try:
+            response = self.get_response(request)
+            state = _routing.get()
+        finally:
+            _routing.reset(token)
+
+        wrote = request.method not in SAFE_METHODS or (state is not None and state.wrote)
+        if wrote and response.status_code < 400 and self.pin_seconds > 0:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_cache().set(pin_key(user.pk), 1, self.pin_seconds)
+
+        if state is not None and response.streaming:
+            response.streaming_content = self.stream(state, response.streaming_content)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS:
+            return None
+        view = getattr(view_func, 'view_class', view_func)
+        if view.__module__.split('.')[0] in self.apps:
+            _routing.set(ReplicaState(request, self.apps, self.replicas))
+        return None
+
+    def stream(self, state, content):
+        # Streaming bodies are read after __call__ returns; route the reads
+        # they trigger (export iterators) like the rest of the request
+        iterator = iter(content)
+        while True:
+            token = _routing.set(state)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _routing.reset(token)
+            yield chunk
@@ -37,9 +37,14 @@ INSTALLED_APPS = [
     'students',
     'teachers',
     'courses',
+    'stats',
+    'search',
 ]
 
 MIDDLEWARE = [
+    'sms_backend.instrumentation.RequestInstrumentationMiddleware',  # First, so totals cover the whole stack
+    'sms_backend.metrics.MetricsMiddleware',
+    'sms_backend.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS must be before CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,23 +76,172 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sms_backend.wsgi.application'
 
 # Database Configuration
-DATABASES = {
+# DB_ENGINE=sqlite runs against BASE_DIR/<DB_NAME>.sqlite3 instead of MySQL
+# (local development and tests).
+DB_ENGINE = config('DB_ENGINE', default='mysql')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / f"{config('DB_NAME', default='sms_db')}.sqlite3",
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'mysql.connector.django',  # Changed to use mysql-connector-python
+            'NAME': config('DB_NAME', default='sms_db'),
+            'USER': config('DB_USER', default='root'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='3306'),
+            'OPTIONS': {
+                'charset': 'utf8mb4',
+                'use_unicode': True,
+                'autocommit': True,
+                'raise_on_warnings': False,
+            },
+        }
+    }
+
+# Read replicas (sms_backend.replicas). DB_REPLICAS is a comma-separated
+# list of replica hosts (host or host:port, same credentials as the
+# primary) or, with DB_ENGINE=sqlite, of replica database names; they
+# become the aliases replica1, replica2, ...
+DB_REPLICAS = [name for name in config('DB_REPLICAS', default='').split(',') if name]
+
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    database = {**DATABASES['default'], 'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {}))}
+    if DB_ENGINE == 'sqlite':
+        database['NAME'] = BASE_DIR / f"{replica}.sqlite3"
+    else:
+        host, _, port = replica.partition(':')
+        database['HOST'] = host
+        database['PORT'] = port or database['PORT']
+    database['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica{index}'] = database
+
+DATABASE_ROUTERS = ['sms_backend.replicas.ReplicaRouter']
+
+# GET/HEAD/OPTIONS requests to views of APPS read those apps' models from
+# a replica, except within PIN_SECONDS of the same user's last write, which
+# must be recorded in a cache shared by all workers (CACHE_ALIAS).
+DATABASE_REPLICAS = {
+    'APPS': ['students', 'teachers', 'courses'],
+    'PIN_SECONDS': config('DB_REPLICA_PIN_SECONDS', default=5, cast=int),
+    'CACHE_ALIAS': 'default',
+}
+
+# Persistent connections (see sms_backend.health). Each worker thread keeps
+# its connection for DB_CONN_MAX_AGE seconds (0 closes it after every
+# request); with DB_CONN_HEALTH_CHECKS it is pinged before being reused by
+# a new request. DB_POOL_SIZE > 0 additionally puts MySQL connections in a
+# mysql-connector pool of that size (at most 32) per process, which must
+# be at least the number of threads per worker.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=0, cast=int)
+
+for alias, database in DATABASES.items():
+    database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    if DB_POOL_SIZE and database['ENGINE'] == 'mysql.connector.django':
+        database['OPTIONS'].update({
+            'pool_name': f"sms-{alias}",
+            'pool_size': DB_POOL_SIZE,
+            'pool_reset_session': True,
+        })
+
+# Cache Configuration
+CACHES = {
     'default': {
-        'ENGINE': 'mysql.connector.django',  # Changed to use mysql-connector-python
-        'NAME': config('DB_NAME', default='sms_db'),
-        'USER': config('DB_USER', default='root'),
-        'PASSWORD': config('DB_PASSWORD', default=''),
-        'HOST': config('DB_HOST', default='localhost'),
-        'PORT': config('DB_PORT', default='3306'),
-        'OPTIONS': {
-            'charset': 'utf8mb4',
-            'use_unicode': True,
-            'autocommit': True,
-            'raise_on_warnings': False,
-        },
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sms-default',
     }
 }
 
+# Seconds the dashboard summary (/api/stats/summary/) stays cached
+STATS_SUMMARY_CACHE_TTL = config('STATS_SUMMARY_CACHE_TTL', default=30, cast=int)
+
+# Rows accepted by POST /api/auth/users/import/. Passwords are hashed inside
+# the request, so larger files are refused with 413; load those with the
+# import_users management command
+USER_IMPORT_MAX_ROWS = config('USER_IMPORT_MAX_ROWS', default=100, cast=int)
+
+# Refresh token revocation (accounts.revocation). With a shared cache at
+# CACHE_ALIAS revocations reach other workers through a version key; with
+# a process-local one (locmem) tokens missing from the in-memory snapshot
+# are looked up in the database on every refresh.
+TOKEN_REVOCATION = {
+    'REBUILD_INTERVAL': config('TOKEN_REVOCATION_REBUILD_INTERVAL', default=60, cast=int),
+    'FALSE_POSITIVE_RATE': 0.001,
+    'CACHE_ALIAS': 'default',
+}
+
+# Authenticated user cache (accounts.user_cache). BACKEND is 'shared' to
+# keep entries in CACHES[CACHE_ALIAS] or 'local' for a per-process LRU.
+# Invalidations only reach other workers through a shared cache (Redis,
+# Memcached); entries held in one process (the local backend, or the
+# default LocMemCache) live at most LOCAL_TTL seconds instead of TTL.
+USER_CACHE = {
+    'ENABLED': config('USER_CACHE_ENABLED', default=True, cast=bool),
+    'BACKEND': config('USER_CACHE_BACKEND', default='shared'),
+    'MAX_SIZE': config('USER_CACHE_MAX_SIZE', default=1024, cast=int),
+    'TTL': config('USER_CACHE_TTL', default=300, cast=int),
+    'LOCAL_TTL': config('USER_CACHE_LOCAL_TTL', default=5, cast=int),
+    'CACHE_ALIAS': config('USER_CACHE_ALIAS', default='default'),
+}
+
+# Per-request SQL/view/render timings (sms_backend.instrumentation).
+# SAMPLE_RATE is the fraction of requests measured; a query fingerprint
+# repeated N_PLUS_ONE_THRESHOLD times in one request is logged as N+1 at
+# WARNING; set REQUEST_INSTRUMENTATION_LOG_LEVEL=INFO to log every sample.
+REQUEST_INSTRUMENTATION = {
+    'ENABLED': config('REQUEST_INSTRUMENTATION_ENABLED', default=True, cast=bool),
+    'SAMPLE_RATE': config('REQUEST_INSTRUMENTATION_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float),
+    'SERVER_TIMING': config('REQUEST_INSTRUMENTATION_SERVER_TIMING', default=DEBUG, cast=bool),
+    'N_PLUS_ONE_THRESHOLD': config('REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', default=5, cast=int),
+}
+
+# Prometheus metrics (sms_backend.metrics). Every worker process writes
+# to its own memory-mapped file in DIRECTORY, which must be shared by all
+# workers of one deployment; GET /metrics sums them. The endpoint is only
+# served once AUTH_TOKEN is set, and then requires
+# 'Authorization: Bearer <token>' from the scraper.
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+    'DIRECTORY': config('METRICS_DIR', default=''),
+    'AUTH_TOKEN': config('METRICS_AUTH_TOKEN', default=''),
+    'PUBLISH_INTERVAL': 5,
+}
+
+# ?search= on the student, teacher and course lists (search app). BACKEND
+# is 'fulltext' (MySQL FULLTEXT, SQLite FTS5) or 'like' for LIKE '%term%'
+# over the views' search_fields. MYSQL_MIN_TOKEN_LENGTH must match the
+# server's innodb_ft_min_token_size; shorter terms are searched with LIKE.
+SEARCH = {
+    'BACKEND': config('SEARCH_BACKEND', default='fulltext'),
+    'MYSQL_MIN_TOKEN_LENGTH': config('SEARCH_MYSQL_MIN_TOKEN_LENGTH', default=3, cast=int),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'sms_backend.instrumentation': {
+            'handlers': ['console'],
+            'level': config('REQUEST_INSTRUMENTATION_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -129,18 +283,18 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'accounts.pagination.StandardPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'accounts.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'accounts.parsers.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
@@ -167,9 +321,23 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'TOKEN_USER_CLASS': 'accounts.authentication.ClaimsUser',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.RevocableTokenRefreshSerializer',
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Seconds the role/profile claims of an access token are trusted without
+# loading the user (accounts.authentication.ClaimsJWTAuthentication),
+# by default the whole access-token lifetime. Claims are re-read at login
+# and on every token refresh; role or active-flag changes distrust older
+# claims through USER_CACHE's CACHE_ALIAS, which must be shared (Redis,
+# Memcached) for the change to reach other workers.
+JWT_CLAIMS_MAX_AGE = config(
+    'JWT_CLAIMS_MAX_AGE',
+    default=int(SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()),
+    cast=int
+)
+
 # CORS Configuration
 # Allow all origins in development (change for production)
 CORS_ALLOW_ALL_ORIGINS = True  # For development only
@@ -0,0 +1,274 @@
+import datetime
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.checks import check_replica_pin_cache
+from accounts.models import User
+from courses.models import Course, Enrollment
+from students.models import Student
+from teachers.models import Teacher
+
+from .health import stats_for
+from .instrumentation import RequestInstrumentationMiddleware, fingerprint
+from .metrics import Gauge, MmapedValues, _key, collect, registry, store
+from .replicas import ReplicaState, _routing, pin_key
+
+
+def metrics_settings(**options):
+    return override_settings(METRICS={'ENABLED': True, 'DIRECTORY': tempfile.mkdtemp(), **options})
+
+
+class MetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        # Reopen this process's file in the test's directory
+        store._pid = None
+
+
+class MetricsEndpointTests(MetricsTestCase):
+    @metrics_settings(AUTH_TOKEN='')
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @metrics_settings(AUTH_TOKEN='secret')
+    def test_requires_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE sms_user_cache_lookups gauge', response.content.decode())
+
+
+class GaugeTests(MetricsTestCase):
+    def tearDown(self):
+        registry.pop('sms_test_gauge', None)
+
+    @metrics_settings()
+    def test_gauges_of_exited_processes_are_dropped(self):
+        from django.conf import settings
+        gauge = Gauge('sms_test_gauge', 'Test gauge', ['result'])
+        gauge.set(3, result='hit')
+        gauge.set(1, result='hit')
+
+        # A file left behind by a worker that is no longer running
+        exited = MmapedValues(os.path.join(settings.METRICS['DIRECTORY'], 'metrics_999999999.db'))
+        exited.set(_key('sms_test_gauge', '', {'result': 'hit'}), 50.0)
+        exited.close()
+
+        self.assertEqual(collect()[('sms_test_gauge', '', (('result', 'hit'),))], 1.0)
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_parameters_are_normalised(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM users WHERE email = 'it''s@x.com' AND id = 42 AND score > 3.5"),
+            'SELECT * FROM users WHERE email = ? AND id = ? AND score > ?'
+        )
+        self.assertEqual(
+            fingerprint('SELECT "id"\n  FROM "courses"   WHERE "id" = %s'),
+            'SELECT "id" FROM "courses" WHERE "id" = ?'
+        )
+
+    def test_in_lists_of_any_length_compare_equal(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT 1 FROM t WHERE id IN (7)')
+        )
+        self.assertEqual(fingerprint('SELECT 1 FROM t WHERE id IN (1, 2)'), 'SELECT ? FROM t WHERE id IN (...)')
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(fingerprint('SELECT col2 FROM t1'), 'SELECT col2 FROM t1')
+
+
+@override_settings(REQUEST_INSTRUMENTATION={
+    'ENABLED': True, 'SAMPLE_RATE': 1.0, 'SERVER_TIMING': True, 'N_PLUS_ONE_THRESHOLD': 3,
+})
+class NPlusOneTests(TestCase):
+    def handle(self, lookups):
+        def view(request):
+            for pk in range(lookups):
+                User.objects.filter(pk=pk).exists()
+            return HttpResponse()
+        return RequestInstrumentationMiddleware(view)(RequestFactory().get('/api/students/'))
+
+    def test_repeated_query_is_flagged(self):
+        with self.assertLogs('sms_backend.instrumentation', 'WARNING') as logs:
+            response = self.handle(3)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['path'], record['queries']), ('/api/students/', 3))
+        [flagged] = record['n_plus_one']
+        self.assertEqual(flagged['count'], 3)
+        self.assertIn('FROM "users" WHERE "users"."id" = ?', flagged['sql'])
+        self.assertIn('db;desc="3 queries"', response['Server-Timing'])
+
+    def test_repeats_below_threshold_are_not_flagged(self):
+        with self.assertLogs('sms_backend.instrumentation', 'INFO') as logs:
+            self.handle(2)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['n_plus_one'], [])
+        self.assertEqual(record['duplicates'][0]['count'], 2)
+
+
+class HealthTests(TestCase):
+    def test_liveness_touches_no_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/health/live')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'alive', 'pid': os.getpid()})
+
+    def test_ready_reports_connection_stats(self):
+        reused = stats_for('default').reused
+        response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['status'], body['pid']), ('ready', os.getpid()))
+        report = body['databases']['default']
+        self.assertEqual(
+            set(report),
+            {'ok', 'latency_ms', 'vendor', 'conn_max_age', 'health_checks', 'pool_size',
+             'age_seconds', 'expires_in_seconds', 'open', 'opened', 'reused', 'stale'}
+        )
+        self.assertTrue(report['ok'])
+        self.assertEqual(report['vendor'], 'sqlite')
+        self.assertIsNone(report['pool_size'])
+        self.assertGreaterEqual(report['open'], 1)
+        # The test connection was already open when the request started
+        self.assertEqual(report['reused'], reused + 1)
+
+    def test_unready_database_gives_503(self):
+        with mock.patch.object(connection, 'cursor', side_effect=OperationalError('server has gone away')):
+            with self.assertLogs('sms_backend.health', 'ERROR'):
+                response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertEqual(body['status'], 'unavailable')
+        report = body['databases']['default']
+        self.assertEqual((report['ok'], report['error']), (False, 'OperationalError'))
+        self.assertNotIn('server has gone away', response.content.decode())
+
+
+REPLICA = 'replica1'
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Runs with a 'replica1' alias added for the class: a second connection
+    to the test database, so every query can be attributed to the
+    connection that ran it
+    """
+    # Resolved in setUpClass, once the replica alias exists
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # connections.settings is settings.DATABASES
+        connections.settings[REPLICA] = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        teacher = User.objects.create_user('t@x.com', 'pw', username='t', role='TEACHER')
+        self.teacher = teacher
+        self.course = Course.objects.create(
+            course_code='C1', course_name='C1', semester='1', academic_year='2024-2025', schedule='s',
+            room='r', max_students=5, credits=3,
+            teacher=Teacher.objects.create(
+                user=teacher, teacher_id='T1', department='MATH', specialization='x', qualification='y'
+            ),
+        )
+        user = User.objects.create_user('s@x.com', 'pw', username='s', role='STUDENT')
+        self.student = Student.objects.create(
+            user=user, student_id='S1', date_of_birth=datetime.date(2010, 1, 1), gender='M', grade='10',
+            emergency_contact_name='e', emergency_contact_phone='1', emergency_contact_relation='r',
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def request(self, user, method, path, data=None):
+        """Make a request; returns it with the queries run on each alias"""
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = getattr(self.client_for(user), method)(path, data, format='json')
+                if response.streaming:
+                    response.content_bytes = b''.join(response.streaming_content)
+        return response, [q['sql'] for q in primary], [q['sql'] for q in replica]
+
+    def test_safe_reads_use_the_replica(self):
+        response, primary, replica = self.request(self.teacher, 'get', '/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('"courses"' in sql for sql in replica))
+        self.assertFalse(any('"courses"' in sql for sql in primary))
+
+    def test_writes_stay_on_the_primary(self):
+        response, primary, replica = self.request(
+            self.student.user, 'post', '/api/courses/enrollments/',
+            {'student_id': self.student.pk, 'course_id': self.course.pk}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, [])
+        self.assertTrue(any(sql.startswith('INSERT INTO "enrollments"') for sql in primary))
+
+    def test_writer_is_pinned_to_the_primary(self):
+        self.request(
+            self.student.user, 'post', '/api/courses/enrollments/',
+            {'student_id': self.student.pk, 'course_id': self.course.pk}
+        )
+        response, _, replica = self.request(self.student.user, 'get', '/api/courses/enrollments/')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(replica, [])
+
+        # Other users still read from the replica
+        _, _, replica = self.request(self.teacher, 'get', '/api/courses/enrollments/')
+        self.assertNotEqual(replica, [])
+
+        cache.delete(pin_key(self.student.user.pk))
+        _, _, replica = self.request(self.student.user, 'get', '/api/courses/enrollments/')
+        self.assertNotEqual(replica, [])
+
+    def test_reads_after_a_write_and_in_atomic_blocks_use_the_primary(self):
+        state = ReplicaState(RequestFactory().get('/'), frozenset(['courses']), [REPLICA])
+        token = _routing.set(state)
+        try:
+            self.assertEqual(Course.objects.all().db, REPLICA)
+            self.assertEqual(User.objects.all().db, 'default')
+            with transaction.atomic():
+                self.assertEqual(Course.objects.all().db, 'default')
+            Enrollment.objects.create(student=self.student, course=self.course)
+            self.assertEqual(Course.objects.all().db, 'default')
+        finally:
+            _routing.reset(token)
+        self.assertEqual(Course.objects.all().db, 'default')
+
+    def test_streamed_export_reads_the_replica(self):
+        response, primary, replica = self.request(self.teacher, 'get', '/api/courses/export/?fields=course_code')
+        self.assertEqual(response.content_bytes, b'course_code\r\nC1\r\n')
+        self.assertTrue(any('"courses"' in sql for sql in replica))
+        self.assertFalse(any('"courses"' in sql for sql in primary))
+
+    def test_deploy_check_requires_shared_pin_cache(self):
+        [error] = check_replica_pin_cache(None)
+        self.assertEqual(error.id, 'accounts.E001')
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'},
+        }), override_settings(DATABASE_REPLICAS={'APPS': [], 'CACHE_ALIAS': 'shared'}):
+            self.assertEqual(check_replica_pin_cache(None), [])
@@ -6,12 +6,19 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .health import liveness_view, readiness_view
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
     path('api/students/', include('students.urls')),
     path('api/teachers/', include('teachers.urls')),
     path('api/courses/', include('courses.urls')),
+    path('api/stats/', include('stats.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('health/live', liveness_view, name='health-live'),
+    path('health/ready', readiness_view, name='health-ready'),
 ]
 
 # Serve media files in development
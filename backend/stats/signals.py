@@ -0,0 +1,22 @@
+"""
+Signal handlers for stats app
+"""
+from django.db.models.signals import post_delete, post_save
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from students.models import Student
+from teachers.models import Teacher
+from .summary import invalidate_summary
+
+
+def invalidate_summary_on_write(sender, **kwargs):
+    """
+    Any write to a counted table makes the cached summary stale.
+    """
+    invalidate_summary()
+
+
+for model in (User, Student, Teacher, Course, Enrollment):
+    post_save.connect(invalidate_summary_on_write, sender=model, dispatch_uid=f'stats-save-{model.__name__}')
+    post_delete.connect(invalidate_summary_on_write, sender=model, dispatch_uid=f'stats-delete-{model.__name__}')
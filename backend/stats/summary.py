@@ -0,0 +1,96 @@
+"""
+Cached dashboard summary built from aggregate queries
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from students.models import Student
+from teachers.models import Teacher
+
+SUMMARY_CACHE_KEY = 'stats:summary'
+
+
+def get_summary():
+    """Return the dashboard summary, computing it on a cache miss"""
+    summary = cache.get(SUMMARY_CACHE_KEY)
+    if summary is None:
+        summary = build_summary()
+        cache.set(SUMMARY_CACHE_KEY, summary, settings.STATS_SUMMARY_CACHE_TTL)
+    return summary
+
+
+def invalidate_summary():
+    """Drop the cached summary once the current write commits"""
+    transaction.on_commit(lambda: cache.delete(SUMMARY_CACHE_KEY))
+
+
+def build_summary():
+    """Compute all dashboard counts with one aggregate query per table"""
+    users_by_role = {
+        row['role']: row['count']
+        for row in User.objects.order_by().values('role').annotate(count=Count('id'))
+    }
+
+    students_by_grade = (
+        Student.objects.order_by().values('grade')
+        .annotate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+    )
+    active_by_grade = {}
+    students_total = students_active = 0
+    for row in students_by_grade:
+        active_by_grade[row['grade']] = row['active']
+        students_total += row['total']
+        students_active += row['active']
+
+    teachers = Teacher.objects.aggregate(
+        total=Count('id'), active=Count('id', filter=Q(is_active=True))
+    )
+
+    courses_by_status = {}
+    courses_by_term = []
+    for row in (
+        Course.objects.order_by('academic_year', 'semester', 'status')
+        .values('academic_year', 'semester', 'status')
+        .annotate(count=Count('id'))
+    ):
+        courses_by_status[row['status']] = courses_by_status.get(row['status'], 0) + row['count']
+        if courses_by_term and courses_by_term[-1]['academic_year'] == row['academic_year'] \
+                and courses_by_term[-1]['semester'] == row['semester']:
+            courses_by_term[-1]['count'] += row['count']
+        else:
+            courses_by_term.append({
+                'academic_year': row['academic_year'],
+                'semester': row['semester'],
+                'count': row['count'],
+            })
+
+    enrollments_by_status = {
+        row['status']: row['count']
+        for row in Enrollment.objects.order_by().values('status').annotate(count=Count('id'))
+    }
+
+    return {
+        'users': {
+            'total': sum(users_by_role.values()),
+            'by_role': users_by_role,
+        },
+        'students': {
+            'total': students_total,
+            'active': students_active,
+            'active_by_grade': dict(sorted(active_by_grade.items(), key=lambda item: int(item[0]))),
+        },
+        'teachers': teachers,
+        'courses': {
+            'total': sum(courses_by_status.values()),
+            'by_status': courses_by_status,
+            'by_term': courses_by_term,
+        },
+        'enrollments': {
+            'total': sum(enrollments_by_status.values()),
+            'by_status': enrollments_by_status,
+        },
+    }
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from .summary import get_summary
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher@x.com', 'pw', username='teacher', role='TEACHER')
+
+    def add_student_user(self, number):
+        return User.objects.create_user(f"s{number}@x.com", 'pw', username=f"s{number}", role='STUDENT')
+
+    def test_summary_is_cached(self):
+        self.assertEqual(get_summary()['users']['by_role'], {'TEACHER': 1})
+        with self.assertNumQueries(0):
+            get_summary()
+
+    def test_commit_invalidates_summary(self):
+        get_summary()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_student_user(1)
+        self.assertEqual(get_summary()['users'], {'total': 2, 'by_role': {'TEACHER': 1, 'STUDENT': 1}})
+
+    def test_uncommitted_write_keeps_cached_summary(self):
+        get_summary()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.add_student_user(1)
+        self.assertTrue(callbacks)
+        self.assertEqual(get_summary()['users']['total'], 1)
+
+    def test_endpoint_is_for_admins_and_teachers(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        response = client.get('/api/stats/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['users']['total'], 1)
+
+        client.force_authenticate(self.add_student_user(1))
+        self.assertEqual(client.get('/api/stats/summary/').status_code, 403)
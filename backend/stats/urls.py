@@ -0,0 +1,9 @@
+"""
+URL patterns for statistics endpoints
+"""
+from django.urls import path
+from .views import SummaryView
+
+urlpatterns = [
+    path('summary/', SummaryView.as_view(), name='stats-summary'),
+]
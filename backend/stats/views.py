@@ -0,0 +1,22 @@
+"""
+Dashboard Statistics Views
+"""
+from rest_framework import views
+
+from accounts.permissions import IsAdminOrTeacher
+from accounts.utils import success_response
+from .summary import get_summary
+
+
+class SummaryView(views.APIView):
+    """
+    API endpoint for dashboard totals
+    GET /api/stats/summary/ - Only admins and teachers
+    """
+    permission_classes = [IsAdminOrTeacher]
+    
+    def get(self, request):
+        return success_response(
+            data=get_summary(),
+            message='Summary retrieved successfully'
+        )
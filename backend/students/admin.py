@@ -27,8 +27,8 @@ class StudentAdmin(admin.ModelAdmin):
             'fields': ('address', 'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relation')
         }),
         ('Academic Information', {
-            'fields': ('gpa', 'is_active')
+            'fields': ('gpa', 'class_rank', 'class_percentile', 'is_active')
         }),
     )
     
-    readonly_fields = ['enrollment_date', 'created_at', 'updated_at']
+    readonly_fields = ['gpa', 'class_rank', 'class_percentile', 'enrollment_date', 'created_at', 'updated_at']
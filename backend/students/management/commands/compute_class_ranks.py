@@ -0,0 +1,158 @@
+"""
+Compute dense class rank and percentile for every student per grade level
+
+GPAs are recomputed from one read of students and graded enrollments; only
+class_rank and class_percentile are written, so the running GPA totals kept
+by Enrollment.save() are never overwritten.
+
+Usage:
+    python manage.py compute_class_ranks
+    python manage.py compute_class_ranks --chunk-size 50000 --dry-run
+
+Requires NumPy (pip install numpy).
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.models import Enrollment
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'Vectorized class rank and percentile batch job for all students'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20000,
+            help='Rows read per database round-trip and written per bulk update',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute and report without writing results',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('compute_class_ranks requires NumPy: pip install numpy')
+
+        chunk_size = options['chunk_size']
+        timings = {}
+
+        # 1. Stream students and graded enrollments into arrays. Both reads
+        # share one transaction so they see the same snapshot where the
+        # database provides one (REPEATABLE READ on MySQL)
+        started = time.perf_counter()
+        with transaction.atomic():
+            student_rows = Student.objects.order_by('id').values_list('id', 'grade', 'is_active')
+            student_ids, levels, active = self._columns(
+                np, student_rows.iterator(chunk_size=chunk_size), chunk_size,
+                dtypes=(np.int64, np.int16, np.bool_),
+                convert=lambda row: (row[0], int(row[1]), row[2])
+            )
+            enrollment_rows = (
+                Enrollment.objects.filter(grade_points__isnull=False)
+                .exclude(status='DROPPED')
+                .order_by()
+                .values_list('student_id', 'course__credits', 'grade_points')
+            )
+            # Grade points are kept as integer hundredths so the sums are exact
+            enrolled_ids, credits, points = self._columns(
+                np, enrollment_rows.iterator(chunk_size=chunk_size), chunk_size,
+                dtypes=(np.int64, np.int64, np.int64),
+                convert=lambda row: (row[0], row[1], int(row[2] * 100))
+            )
+        timings['load'] = time.perf_counter() - started
+
+        # 2. Weighted GPA, dense rank and percentile, vectorized per grade level
+        started = time.perf_counter()
+        index = np.searchsorted(student_ids, enrolled_ids)
+        # Without a snapshot a student can appear between the two reads; drop
+        # enrollments whose student was not read rather than give them to a neighbour
+        known = index < len(student_ids)
+        known[known] = student_ids[index[known]] == enrolled_ids[known]
+        index, credits, points = index[known], credits[known], points[known]
+        quality_points = np.bincount(index, weights=credits * points, minlength=len(student_ids)).astype(np.int64)
+        attempted_credits = np.bincount(index, weights=credits, minlength=len(student_ids)).astype(np.int64)
+
+        # GPA in hundredths, rounded half up with integer arithmetic to match compute_gpa()
+        safe_credits = np.maximum(attempted_credits, 1)
+        gpa = np.where(attempted_credits > 0, (2 * quality_points + safe_credits) // (2 * safe_credits), 0)
+
+        ranks = np.zeros(len(student_ids), dtype=np.int64)
+        percentiles = np.full(len(student_ids), np.nan)
+        rankable = active & (attempted_credits > 0)
+        for level in np.unique(levels[rankable]):
+            members = np.flatnonzero(rankable & (levels == level))
+            level_gpa = gpa[members]
+            # Dense rank: 1 for the highest GPA, ties share a rank
+            _, inverse = np.unique(-level_gpa, return_inverse=True)
+            ranks[members] = inverse + 1
+            # Percentile rank: share of the level below, counting ties as half
+            ordered = np.sort(level_gpa)
+            below = np.searchsorted(ordered, level_gpa, side='left')
+            equal = np.searchsorted(ordered, level_gpa, side='right') - below
+            percentiles[members] = 100.0 * (below + 0.5 * equal) / len(members)
+        timings['compute'] = time.perf_counter() - started
+
+        # 3. Write back in chunks
+        started = time.perf_counter()
+        if not options['dry_run']:
+            # GPA totals belong to Enrollment.save(); rewriting them from this
+            # unlocked read would lose grades committed since
+            fields = ['class_rank', 'class_percentile']
+            for start in range(0, len(student_ids), chunk_size):
+                stop = start + chunk_size
+                batch = [
+                    Student(
+                        pk=int(pk),
+                        class_rank=int(rank) if rank else None,
+                        class_percentile=None if np.isnan(pct) else Decimal(f"{pct:.2f}"),
+                    )
+                    for pk, rank, pct in zip(
+                        student_ids[start:stop], ranks[start:stop], percentiles[start:stop]
+                    )
+                ]
+                with transaction.atomic():
+                    Student.objects.bulk_update(batch, fields, batch_size=1000)
+        timings['write'] = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Students: {len(student_ids)} ({int(rankable.sum())} ranked), "
+            f"graded enrollments: {int(known.sum())}"
+        )
+        for stage, seconds in timings.items():
+            self.stdout.write(f"  {stage:<8} {seconds:8.3f}s")
+        self.stdout.write(f"  {'total':<8} {sum(timings.values()):8.3f}s")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing written'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Class ranks updated'))
+
+    def _columns(self, np, rows, chunk_size, dtypes, convert):
+        """Read row tuples into one NumPy array per column, a chunk at a time"""
+        parts = [[] for _ in dtypes]
+        buffer = []
+
+        def flush():
+            if buffer:
+                for part, column, dtype in zip(parts, zip(*buffer), dtypes):
+                    part.append(np.fromiter(column, dtype=dtype, count=len(buffer)))
+                buffer.clear()
+
+        for row in rows:
+            buffer.append(convert(row))
+            if len(buffer) >= chunk_size:
+                flush()
+        flush()
+        return [
+            np.concatenate(part) if part else np.empty(0, dtype=dtype)
+            for part, dtype in zip(parts, dtypes)
+        ]
@@ -0,0 +1,61 @@
+"""
+Compare incrementally maintained GPA totals against a full recomputation
+
+Usage:
+    python manage.py verify_gpa_totals
+    python manage.py verify_gpa_totals --fix
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import Student, compute_gpa, quantize_points
+
+
+class Command(BaseCommand):
+    help = 'Diff running quality points, credits and GPA against values recomputed from enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite mismatched students from the full recomputation',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of students read per chunk',
+        )
+
+    def handle(self, *args, **options):
+        checked = 0
+        mismatched = []
+        students = (
+            Student.objects.with_grade_totals()
+            .only('id', 'student_id', 'quality_points', 'attempted_credits', 'gpa')
+            .order_by('id')
+        )
+        for student in students.iterator(chunk_size=options['batch_size']):
+            checked += 1
+            expected_points = quantize_points(student.computed_quality_points)
+            expected_credits = student.computed_attempted_credits
+            expected_gpa = compute_gpa(expected_points, expected_credits)
+            if (student.quality_points, student.attempted_credits, student.gpa) != \
+                    (expected_points, expected_credits, expected_gpa):
+                self.stdout.write(
+                    f"  [MISMATCH] {student.student_id}: "
+                    f"points={student.quality_points}/{expected_points} "
+                    f"credits={student.attempted_credits}/{expected_credits} "
+                    f"gpa={student.gpa}/{expected_gpa}"
+                )
+                mismatched.append(student.pk)
+
+        if mismatched and options['fix']:
+            Student.objects.filter(pk__in=mismatched).recalculate_gpa()
+
+        summary = f"Checked {checked} students, {len(mismatched)} mismatched"
+        if mismatched and options['fix']:
+            self.stdout.write(self.style.SUCCESS(summary + ' (fixed)'))
+        elif mismatched:
+            raise CommandError(summary)
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
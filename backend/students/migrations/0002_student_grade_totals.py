@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:50
+
+from django.db import migrations, models
+from django.db.models import F, Q, Sum
+
+
+def backfill_grade_totals(apps, schema_editor):
+    Student = apps.get_model('students', 'Student')
+    graded = Q(enrollments__grade_points__isnull=False) & ~Q(enrollments__status='DROPPED')
+    students = Student.objects.annotate(
+        points=Sum(
+            F('enrollments__grade_points') * F('enrollments__course__credits'),
+            filter=graded,
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        ),
+        credits=Sum('enrollments__course__credits', filter=graded)
+    ).filter(credits__gt=0)
+    for student in students.iterator():
+        Student.objects.filter(pk=student.pk).update(
+            quality_points=round(student.points, 2),
+            attempted_credits=student.credits
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+        ('courses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='attempted_credits',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Sum of course credits over graded enrollments'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='quality_points',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Sum of grade points x course credits over graded enrollments', max_digits=10),
+        ),
+        migrations.RunPython(backfill_grade_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_grade_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='class_percentile',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='class_rank',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_class_rank'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='student',
+            name='students_enrollm_89e94c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['enrollment_date', 'id'], name='students_enrollm_ce93c7_idx'),
+        ),
+    ]
@@ -1,11 +1,77 @@
 """
 Student Model and Related Information
 """
-from django.db import models
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import models, transaction
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
+class StudentQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for Student records
+    """
+    def with_grade_totals(self):
+        """
+        Annotate each student with quality points and attempted credits
+        summed from their enrollments (full recomputation).
+        Ungraded, 'I' and 'W' enrollments (null grade points) and dropped
+        courses do not count.
+        """
+        graded = Q(enrollments__grade_points__isnull=False) & ~Q(enrollments__status='DROPPED')
+        return self.order_by().annotate(
+            computed_quality_points=Coalesce(
+                Sum(
+                    F('enrollments__grade_points') * F('enrollments__course__credits'),
+                    filter=graded,
+                    output_field=models.DecimalField(max_digits=10, decimal_places=2)
+                ),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2)
+            ),
+            computed_attempted_credits=Coalesce(
+                Sum('enrollments__course__credits', filter=graded), Value(0)
+            )
+        )
+    
+    def recalculate_gpa(self):
+        """
+        Rebuild grade totals and GPA for every student in the queryset.
+        Totals are summed in one aggregate query and written back with bulk_update.
+        Returns the number of students updated.
+        """
+        # Re-select by id so filters on enrollments cannot narrow the sums
+        students = list(
+            self.model.objects.filter(pk__in=self.values('pk'))
+            .with_grade_totals()
+            .only('id', 'quality_points', 'attempted_credits', 'gpa')
+        )
+        for student in students:
+            student.quality_points = quantize_points(student.computed_quality_points)
+            student.attempted_credits = student.computed_attempted_credits
+            student.gpa = compute_gpa(student.quality_points, student.attempted_credits)
+        self.model.objects.bulk_update(
+            students, ['quality_points', 'attempted_credits', 'gpa'], batch_size=500
+        )
+        return len(students)
+
+
+def quantize_points(value):
+    """Round quality points to the two places stored on Student"""
+    return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def compute_gpa(quality_points, credits):
+    """Credit-weighted GPA rounded to two places (0.00 with no credits)"""
+    if not credits:
+        return Decimal('0.00')
+    gpa = Decimal(quality_points) / Decimal(credits)
+    return gpa.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
 class Student(models.Model):
     """
     Student model extending the User model
@@ -62,6 +128,30 @@ class Student(models.Model):
         validators=[MinValueValidator(0.00), MaxValueValidator(4.00)]
     )
     
+    # Running GPA totals, maintained incrementally by Enrollment
+    quality_points = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Sum of grade points x course credits over graded enrollments"
+    )
+    attempted_credits = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Sum of course credits over graded enrollments"
+    )
+    
+    # Class standing within the grade level, written by compute_class_ranks
+    class_rank = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    class_percentile = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        editable=False
+    )
+    
     # Status
     is_active = models.BooleanField(default=True)
     
@@ -69,6 +159,8 @@ class Student(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StudentQuerySet.as_manager()
+    
     class Meta:
         db_table = 'students'
         verbose_name = 'Student'
@@ -77,7 +169,7 @@ class Student(models.Model):
         indexes = [
             models.Index(fields=['student_id']),
             models.Index(fields=['grade']),
-            models.Index(fields=['enrollment_date']),
+            models.Index(fields=['enrollment_date', 'id']),
         ]
     
     def __str__(self):
@@ -93,6 +185,28 @@ class Student(models.Model):
         """Return student's email from user"""
         return self.user.email
     
+    @classmethod
+    def apply_grade_delta(cls, student_id, quality_points, credits):
+        """
+        Add a grade change to a student's running totals and refresh the GPA.
+        The student row is locked so concurrent grade changes add up correctly.
+        """
+        if not quality_points and not credits:
+            return
+        with transaction.atomic():
+            student = (
+                cls.objects.select_for_update()
+                .only('id', 'quality_points', 'attempted_credits', 'gpa')
+                .filter(pk=student_id)
+                .first()
+            )
+            if student is None:
+                return
+            student.quality_points = quantize_points(student.quality_points + quality_points)
+            student.attempted_credits = max(student.attempted_credits + credits, 0)
+            student.gpa = compute_gpa(student.quality_points, student.attempted_credits)
+            student.save(update_fields=['quality_points', 'attempted_credits', 'gpa', 'updated_at'])
+    
     @property
     def age(self):
         """Calculate student's age"""
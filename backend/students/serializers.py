@@ -1,16 +1,20 @@
 """
 Serializers for Student Management
 """
+from datetime import date
+
 from rest_framework import serializers
 from .models import Student
-from accounts.serializers import UserSerializer
+from accounts.fieldsets import SparseFieldsMixin
+from accounts.rows import ValuesRowSerializer
+from accounts.serializers import UserSerializer, UserSummarySerializer
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Student model (read operations)
+    user is a compact summary unless ?expand=user
     """
-    user = UserSerializer(read_only=True)
     full_name = serializers.ReadOnlyField()
     email = serializers.ReadOnlyField()
     age = serializers.ReadOnlyField()
@@ -22,10 +26,74 @@ class StudentSerializer(serializers.ModelSerializer):
             'date_of_birth', 'age', 'gender', 'grade',
             'address', 'emergency_contact_name',
             'emergency_contact_phone', 'emergency_contact_relation',
-            'enrollment_date', 'gpa', 'is_active',
-            'created_at', 'updated_at'
+            'enrollment_date', 'gpa', 'class_rank', 'class_percentile',
+            'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'enrollment_date', 'created_at', 'updated_at']
+        expandable_fields = {'user': (UserSerializer, UserSummarySerializer)}
+        select_related = {'full_name': ['user'], 'email': ['user']}
+
+
+class StudentSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact student representation for nesting in other resources
+    """
+    full_name = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Student
+        fields = ['id', 'student_id', 'full_name']
+        select_related = {'full_name': ['user']}
+
+
+class StudentRowSerializer(ValuesRowSerializer):
+    """
+    values()-based equivalent of StudentSerializer's default output,
+    used by the student list
+    """
+    serializer_class = StudentSerializer
+    values = (
+        'id', 'user_id', 'user__email', 'user__first_name', 'user__last_name',
+        'student_id', 'date_of_birth', 'gender', 'grade', 'address',
+        'emergency_contact_name', 'emergency_contact_phone', 'emergency_contact_relation',
+        'enrollment_date', 'gpa', 'class_rank', 'class_percentile',
+        'is_active', 'created_at', 'updated_at',
+    )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.today = date.today()
+    
+    def age(self, born):
+        return self.today.year - born.year - (
+            (self.today.month, self.today.day) < (born.month, born.day)
+        )
+    
+    def to_representation(self, row):
+        full_name = f"{row['user__first_name']} {row['user__last_name']}"
+        email = row['user__email']
+        return {
+            'id': row['id'],
+            'user': {'id': row['user_id'], 'email': email, 'full_name': full_name},
+            'student_id': row['student_id'],
+            'full_name': full_name,
+            'email': email,
+            'date_of_birth': self.format('date_of_birth', row['date_of_birth']),
+            'age': self.age(row['date_of_birth']),
+            'gender': row['gender'],
+            'grade': row['grade'],
+            'address': row['address'],
+            'emergency_contact_name': row['emergency_contact_name'],
+            'emergency_contact_phone': row['emergency_contact_phone'],
+            'emergency_contact_relation': row['emergency_contact_relation'],
+            'enrollment_date': self.format('enrollment_date', row['enrollment_date']),
+            'gpa': self.format('gpa', row['gpa']),
+            'class_rank': row['class_rank'],
+            'class_percentile': self.format('class_percentile', row['class_percentile']),
+            'is_active': row['is_active'],
+            'created_at': self.format('created_at', row['created_at']),
+            'updated_at': self.format('updated_at', row['updated_at']),
+        }
 
 
 class StudentCreateSerializer(serializers.ModelSerializer):
@@ -39,7 +107,7 @@ class StudentCreateSerializer(serializers.ModelSerializer):
         fields = [
             'user_id', 'student_id', 'date_of_birth', 'gender', 'grade',
             'address', 'emergency_contact_name',
-            'emergency_contact_phone', 'emergency_contact_relation', 'gpa'
+            'emergency_contact_phone', 'emergency_contact_relation'
         ]
     
     def validate_student_id(self, value):
@@ -71,5 +139,5 @@ class StudentUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'date_of_birth', 'gender', 'grade', 'address',
             'emergency_contact_name', 'emergency_contact_phone',
-            'emergency_contact_relation', 'gpa', 'is_active'
+            'emergency_contact_relation', 'is_active'
         ]
@@ -0,0 +1,99 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from courses.models import Course, Enrollment
+from teachers.models import Teacher
+
+from .models import Student
+from .serializers import StudentRowSerializer, StudentSerializer
+
+
+class StudentGPATests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('admin@x.com', 'pw', username='admin', role='ADMIN')
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+        user = User.objects.create_user('s1@x.com', 'pw', username='s1', first_name='S', last_name='One', role='STUDENT')
+        self.student = Student.objects.create(
+            user=user, student_id='S00001', date_of_birth=datetime.date(2010, 2, 3), gender='F', grade='10',
+            emergency_contact_name='e', emergency_contact_phone='1', emergency_contact_relation='r'
+        )
+        teacher_user = User.objects.create_user('t1@x.com', 'pw', username='t1', role='TEACHER')
+        teacher = Teacher.objects.create(
+            user=teacher_user, teacher_id='T1', department='MATH', specialization='x', qualification='y'
+        )
+        course = Course.objects.create(
+            course_code='MATH1', course_name='Math', teacher=teacher, semester='1', academic_year='2024-2025',
+            schedule='s', room='r', max_students=5
+        )
+        Enrollment.objects.create(student=self.student, course=course, status='COMPLETED', grade='B')
+
+    def test_gpa_is_read_only_through_the_api(self):
+        response = self.client.patch(
+            reverse('student-detail', kwargs={'pk': self.student.pk}),
+            {'gpa': '4.00', 'address': 'Street 1'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.gpa, self.student.address), (Decimal('3.00'), 'Street 1'))
+
+    def test_gpa_is_ignored_on_create(self):
+        user = User.objects.create_user('s2@x.com', 'pw', username='s2', role='STUDENT')
+        response = self.client.post(reverse('student-list-create'), {
+            'user_id': user.pk, 'student_id': 'S00002', 'date_of_birth': '2010-05-01', 'gender': 'M',
+            'grade': '8', 'emergency_contact_name': 'e', 'emergency_contact_phone': '1',
+            'emergency_contact_relation': 'r', 'gpa': '4.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Student.objects.get(student_id='S00002').gpa, Decimal('0.00'))
+
+    def test_row_serializer_matches_student_serializer(self):
+        queryset = Student.objects.select_related('user').filter(pk=self.student.pk)
+        rows = StudentRowSerializer()
+        self.assertEqual(rows.serialize(rows.prepare(queryset)), StudentSerializer(queryset, many=True).data)
+
+
+class ClassRankTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user('t1@x.com', 'pw', username='t1', role='TEACHER')
+        teacher = Teacher.objects.create(
+            user=teacher_user, teacher_id='T1', department='MATH', specialization='x', qualification='y'
+        )
+        self.course = Course.objects.create(
+            course_code='MATH1', course_name='Math', teacher=teacher, semester='1', academic_year='2024-2025',
+            schedule='s', room='r', max_students=10
+        )
+
+    def make_student(self, number, grade):
+        user = User.objects.create_user(f"s{number}@x.com", 'pw', username=f"s{number}", role='STUDENT')
+        student = Student.objects.create(
+            user=user, student_id=f"S{number:05d}", date_of_birth=datetime.date(2010, 1, 1), gender='M',
+            grade='10', emergency_contact_name='e', emergency_contact_phone='1', emergency_contact_relation='r'
+        )
+        if grade:
+            Enrollment.objects.create(student=student, course=self.course, status='COMPLETED', grade=grade)
+        return student
+
+    def test_ranks_without_touching_gpa_totals(self):
+        top, tied, last, ungraded = (
+            self.make_student(number, grade) for number, grade in enumerate(['A', 'B', 'B', None])
+        )
+        # A grade committed after the job read its rows must survive the write
+        Student.objects.filter(pk=last.pk).update(gpa=Decimal('1.00'), quality_points=Decimal('3.00'))
+
+        call_command('compute_class_ranks', stdout=StringIO())
+
+        ranks = dict(Student.objects.values_list('pk', 'class_rank'))
+        self.assertEqual(ranks, {top.pk: 1, tied.pk: 2, last.pk: 2, ungraded.pk: None})
+        self.assertEqual(Student.objects.get(pk=top.pk).class_percentile, Decimal('83.33'))
+        last.refresh_from_db()
+        self.assertEqual((last.gpa, last.quality_points), (Decimal('1.00'), Decimal('3.00')))
@@ -3,12 +3,13 @@ URL patterns for student endpoints
 """
 from django.urls import path
 from .views import (
-    StudentListCreateView, StudentDetailView, StudentMyProfileView
+    StudentListCreateView, StudentDetailView, StudentMyProfileView, StudentExportView
 )
 
 urlpatterns = [
     # Student endpoints
     path('', StudentListCreateView.as_view(), name='student-list-create'),
+    path('export/', StudentExportView.as_view(), name='student-export'),
     path('my-profile/', StudentMyProfileView.as_view(), name='student-my-profile'),
     path('<int:pk>/', StudentDetailView.as_view(), name='student-detail'),
 ]
@@ -7,25 +7,31 @@ from django.db import transaction
 
 from .models import Student
 from .serializers import (
-    StudentSerializer, StudentCreateSerializer, StudentUpdateSerializer
+    StudentSerializer, StudentRowSerializer,
+    StudentCreateSerializer, StudentUpdateSerializer
 )
+from accounts.exports import ExportMixin
+from accounts.fieldsets import SparseFieldsViewMixin
 from accounts.permissions import IsAdminOrTeacher, IsAdmin
 from accounts.utils import success_response, error_response
+from search.filters import FullTextSearchFilter
 
 
-class StudentListCreateView(generics.ListCreateAPIView):
+class StudentListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     API endpoint to list and create students
     GET /api/students/
     POST /api/students/
     """
     queryset = Student.objects.select_related('user').all()
+    read_serializer_class = StudentSerializer
     permission_classes = [IsAdminOrTeacher]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['grade', 'gender', 'is_active']
     search_fields = ['student_id', 'user__first_name', 'user__last_name', 'user__email']
     ordering_fields = ['enrollment_date', 'gpa', 'grade']
     ordering = ['-enrollment_date']
+    cursor_ordering = ['-enrollment_date', '-id']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -34,15 +40,27 @@ class StudentListCreateView(generics.ListCreateAPIView):
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        
+        # Plain listings are built from values() rows; nested fields and
+        # expansions go through the full serializer
+        rows = StudentRowSerializer.for_request(request, context=self.get_serializer_context())
+        if rows is not None:
+            queryset = rows.prepare(queryset)
+        
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = StudentSerializer(page, many=True)
+            if rows is not None:
+                return self.get_paginated_response(rows.serialize(page))
+            serializer = StudentSerializer(page, many=True, context=self.get_serializer_context())
             return self.get_paginated_response(serializer.data)
         
-        serializer = StudentSerializer(queryset, many=True)
+        if rows is not None:
+            data = rows.serialize(queryset)
+        else:
+            data = StudentSerializer(queryset, many=True, context=self.get_serializer_context()).data
         return success_response(
-            data=serializer.data,
+            data=data,
             message='Students retrieved successfully'
         )
     
@@ -63,7 +81,7 @@ class StudentListCreateView(generics.ListCreateAPIView):
             )
             
             return success_response(
-                data=StudentSerializer(student).data,
+                data=StudentSerializer(student, context=self.get_serializer_context()).data,
                 message='Student created successfully',
                 status_code=status.HTTP_201_CREATED
             )
@@ -75,7 +93,7 @@ class StudentListCreateView(generics.ListCreateAPIView):
             )
 
 
-class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class StudentDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to get, update, or delete a specific student
     GET /api/students/<id>/
@@ -84,6 +102,7 @@ class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
     DELETE /api/students/<id>/
     """
     queryset = Student.objects.select_related('user').all()
+    read_serializer_class = StudentSerializer
     permission_classes = [IsAdminOrTeacher]
     
     def get_serializer_class(self):
@@ -93,7 +112,7 @@ class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = StudentSerializer(instance)
+        serializer = StudentSerializer(instance, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Student retrieved successfully'
@@ -109,7 +128,7 @@ class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
             self.perform_update(serializer)
             
             return success_response(
-                data=StudentSerializer(instance).data,
+                data=StudentSerializer(instance, context=self.get_serializer_context()).data,
                 message='Student updated successfully'
             )
         except Exception as e:
@@ -155,3 +174,34 @@ class StudentMyProfileView(generics.RetrieveAPIView):
             data=serializer.data,
             message='Your student profile retrieved successfully'
         )
+
+
+class StudentExportView(ExportMixin, StudentListCreateView):
+    """
+    API endpoint to export students as CSV or NDJSON (Admin/Teacher)
+    GET /api/students/export/?format=csv
+    GET /api/students/export/?format=ndjson
+    Accepts the same filters, search and ordering as the student list.
+    """
+    export_name = 'students'
+    export_columns = (
+        ('id', 'id'),
+        ('student_id', 'student_id'),
+        ('first_name', 'user__first_name'),
+        ('last_name', 'user__last_name'),
+        ('email', 'user__email'),
+        ('date_of_birth', 'date_of_birth'),
+        ('gender', 'gender'),
+        ('grade', 'grade'),
+        ('address', 'address'),
+        ('emergency_contact_name', 'emergency_contact_name'),
+        ('emergency_contact_phone', 'emergency_contact_phone'),
+        ('emergency_contact_relation', 'emergency_contact_relation'),
+        ('enrollment_date', 'enrollment_date'),
+        ('gpa', 'gpa'),
+        ('class_rank', 'class_rank'),
+        ('class_percentile', 'class_percentile'),
+        ('is_active', 'is_active'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
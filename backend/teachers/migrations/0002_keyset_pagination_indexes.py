@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['join_date', 'id'], name='teachers_join_da_5dbef4_idx'),
+        ),
+    ]
@@ -63,6 +63,7 @@ class Teacher(models.Model):
         indexes = [
             models.Index(fields=['teacher_id']),
             models.Index(fields=['department']),
+            models.Index(fields=['join_date', 'id']),
         ]
     
     def __str__(self):
@@ -3,14 +3,15 @@ Serializers for Teacher Management
 """
 from rest_framework import serializers
 from .models import Teacher
-from accounts.serializers import UserSerializer
+from accounts.fieldsets import SparseFieldsMixin
+from accounts.serializers import UserSerializer, UserSummarySerializer
 
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Teacher model (read operations)
+    user is a compact summary unless ?expand=user
     """
-    user = UserSerializer(read_only=True)
     full_name = serializers.ReadOnlyField()
     email = serializers.ReadOnlyField()
     
@@ -23,6 +24,20 @@ class TeacherSerializer(serializers.ModelSerializer):
             'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'join_date', 'created_at', 'updated_at']
+        expandable_fields = {'user': (UserSerializer, UserSummarySerializer)}
+        select_related = {'full_name': ['user'], 'email': ['user']}
+
+
+class TeacherSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact teacher representation for nesting in other resources
+    """
+    full_name = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Teacher
+        fields = ['id', 'teacher_id', 'full_name']
+        select_related = {'full_name': ['user']}
 
 
 class TeacherCreateSerializer(serializers.ModelSerializer):
@@ -9,23 +9,28 @@ from .models import Teacher
 from .serializers import (
     TeacherSerializer, TeacherCreateSerializer, TeacherUpdateSerializer
 )
+from accounts.exports import ExportMixin
+from accounts.fieldsets import SparseFieldsViewMixin
 from accounts.permissions import IsAdminOrTeacher, IsAdmin
 from accounts.utils import success_response, error_response
+from search.filters import FullTextSearchFilter
 
 
-class TeacherListCreateView(generics.ListCreateAPIView):
+class TeacherListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     API endpoint to list and create teachers
     GET /api/teachers/
     POST /api/teachers/
     """
     queryset = Teacher.objects.select_related('user').all()
+    read_serializer_class = TeacherSerializer
     permission_classes = [IsAdminOrTeacher]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['department', 'is_active']
     search_fields = ['teacher_id', 'user__first_name', 'user__last_name', 'user__email', 'specialization']
     ordering_fields = ['join_date', 'experience_years']
     ordering = ['-join_date']
+    cursor_ordering = ['-join_date', '-id']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -37,10 +42,10 @@ class TeacherListCreateView(generics.ListCreateAPIView):
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = TeacherSerializer(page, many=True)
+            serializer = TeacherSerializer(page, many=True, context=self.get_serializer_context())
             return self.get_paginated_response(serializer.data)
         
-        serializer = TeacherSerializer(queryset, many=True)
+        serializer = TeacherSerializer(queryset, many=True, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Teachers retrieved successfully'
@@ -70,7 +75,7 @@ class TeacherListCreateView(generics.ListCreateAPIView):
             )
             
             return success_response(
-                data=TeacherSerializer(teacher).data,
+                data=TeacherSerializer(teacher, context=self.get_serializer_context()).data,
                 message='Teacher created successfully',
                 status_code=status.HTTP_201_CREATED
             )
@@ -82,7 +87,7 @@ class TeacherListCreateView(generics.ListCreateAPIView):
             )
 
 
-class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TeacherDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to get, update, or delete a specific teacher
     GET /api/teachers/<id>/
@@ -91,6 +96,7 @@ class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
     DELETE /api/teachers/<id>/
     """
     queryset = Teacher.objects.select_related('user').all()
+    read_serializer_class = TeacherSerializer
     permission_classes = [IsAdminOrTeacher]
     
     def get_serializer_class(self):
@@ -100,7 +106,7 @@ class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = TeacherSerializer(instance)
+        serializer = TeacherSerializer(instance, context=self.get_serializer_context())
         return success_response(
             data=serializer.data,
             message='Teacher retrieved successfully'
@@ -116,7 +122,7 @@ class TeacherDetailView(generics.RetrieveUpdateDestroyAPIView):
             self.perform_update(serializer)
             
             return success_response(
-                data=TeacherSerializer(instance).data,
+                data=TeacherSerializer(instance, context=self.get_serializer_context()).data,
                 message='Teacher updated successfully'
             )
         except Exception as e:
@@ -169,3 +175,29 @@ class TeacherMyProfileView(generics.RetrieveAPIView):
             data=serializer.data,
             message='Your teacher profile retrieved successfully'
         )
+
+
+class TeacherExportView(ExportMixin, TeacherListCreateView):
+    """
+    API endpoint to export teachers as CSV or NDJSON (Admin/Teacher)
+    GET /api/teachers/export/?format=csv
+    GET /api/teachers/export/?format=ndjson
+    Accepts the same filters, search and ordering as the teacher list.
+    """
+    export_name = 'teachers'
+    export_columns = (
+        ('id', 'id'),
+        ('teacher_id', 'teacher_id'),
+        ('first_name', 'user__first_name'),
+        ('last_name', 'user__last_name'),
+        ('email', 'user__email'),
+        ('department', 'department'),
+        ('specialization', 'specialization'),
+        ('qualification', 'qualification'),
+        ('experience_years', 'experience_years'),
+        ('join_date', 'join_date'),
+        ('office_room', 'office_room'),
+        ('is_active', 'is_active'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
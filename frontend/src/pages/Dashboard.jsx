@@ -16,15 +16,12 @@ const Dashboard = () => {
   const fetchStats = async () => {
     try {
       if (user.role === 'ADMIN' || user.role === 'TEACHER') {
-        const [studentsRes, teachersRes, coursesRes] = await Promise.all([
-          api.get('/students/'),
-          api.get('/teachers/'),
-          api.get('/courses/')
-        ])
+        const response = await api.get('/stats/summary/')
+        const summary = response.data.data
         setStats({
-          students: studentsRes.data.data?.length || studentsRes.data.results?.length || 0,
-          teachers: teachersRes.data.data?.length || teachersRes.data.results?.length || 0,
-          courses: coursesRes.data.data?.length || coursesRes.data.results?.length || 0
+          students: summary.students.total,
+          teachers: summary.teachers.total,
+          courses: summary.courses.total
         })
       }
     } catch (error) {